@@ -1,9 +1,29 @@
+import json
 import os
 from dotenv import load_dotenv
 import pathlib
 
 load_dotenv()
 
+
+def _env(key, default):
+    """Env value with empty strings (KEY="" as in env_example.txt) treated as unset"""
+    return os.environ.get(key) or default
+
+
+def _env_int(key, default):
+    return int(_env(key, default))
+
+
+def _env_float(key, default):
+    return float(_env(key, default))
+
+
+def _env_bool(key, default):
+    value = os.environ.get(key)
+    return value.lower() == "true" if value else default
+
+
 class Config:
 
     API_URL = os.getenv("API_URL", "http://127.0.0.1:8000")
@@ -16,12 +36,43 @@ class Config:
 
     PROJECT_ROOT = pathlib.Path(__file__).parent.parent.parent
     KNOWLEDGE_BASE_DIR = "./data/knowledge_base_files"
+    KB_MANIFEST_PATH = _env("KB_MANIFEST_PATH", "./data/kb_manifest.json")
+    INGEST_MODE = _env("INGEST_MODE", "verified").lower() #verified | fire_and_forget
+    INGEST_READY_TIMEOUT_SECONDS = _env_float("INGEST_READY_TIMEOUT_SECONDS", 5)
+    INGEST_WORKERS = _env_int("INGEST_WORKERS", 2)
+    INGEST_MAX_PENDING = _env_int("INGEST_MAX_PENDING", 100)
+    INGEST_JOBS_RETAINED = _env_int("INGEST_JOBS_RETAINED", 1000)
+    INGEST_PARSE_WORKERS = _env_int("INGEST_PARSE_WORKERS", min(4, os.cpu_count() or 1))
+    INGEST_PDF_PAGES_PER_TASK = _env_int("INGEST_PDF_PAGES_PER_TASK", 50)
+    INGEST_TABLE_CHUNK_ROWS = _env_int("INGEST_TABLE_CHUNK_ROWS", 5000)
+    INGEST_DOCUMENT_BATCH_SIZE = _env_int("INGEST_DOCUMENT_BATCH_SIZE", 1000)
+    CHUNKING_MODE = _env("CHUNKING_MODE", "char").lower() #char | token
+    CHUNK_SIZE = _env_int("CHUNK_SIZE", 500) #characters, or tokens in token mode
+    CHUNK_OVERLAP = _env_int("CHUNK_OVERLAP", 50)
+    TOKEN_ENCODING = _env("TOKEN_ENCODING", "cl100k_base")
+    DEDUP_ENABLED = _env_bool("DEDUP_ENABLED", False) #opt-in: strips repeated pdf lines and loads every chunk at startup
+    DEDUP_MAX_DISTANCE = _env_int("DEDUP_MAX_DISTANCE", 6) #simhash bits that may differ
+    DEDUP_SHINGLE_SIZE = _env_int("DEDUP_SHINGLE_SIZE", 3)
+    DEDUP_REPEATED_LINE_RATIO = _env_float("DEDUP_REPEATED_LINE_RATIO", 0.5) #share of pdf pages a header/footer line repeats on
+    TABULAR_GROUPING = _env("TABULAR_GROUPING", "row").lower() #row | rows | key
+    TABULAR_GROUP_SIZE = _env_int("TABULAR_GROUP_SIZE", 25)
+    TABULAR_GROUP_KEY = os.environ.get("TABULAR_GROUP_KEY", "") #column to group on in key mode
+    TABULAR_GROUP_MAX_CHARS = _env_int("TABULAR_GROUP_MAX_CHARS", 2000)
     
+    #vector store config
+    VECTOR_STORE_BACKEND = _env("VECTOR_STORE_BACKEND", "milvus").lower() #milvus | local
+    LOCAL_VECTOR_STORE_DIR = _env("LOCAL_VECTOR_STORE_DIR", "./data/vector_store")
+
     #milvus config
     MILVUS_DATABASE = os.environ.get("MILVUS_DATABASE", "")
     MILVUS_HOST = os.environ.get("MILVUS_HOST", "")
     MILVUS_PORT = os.environ.get("MILVUS_PORT", "")
-    MILVUS_COLLECTION_NAME = os.environ.get("MILVUS_COLLECTION_NAME", "")
+    MILVUS_COLLECTION_NAME = os.environ.get("MILVUS_COLLECTION_NAME", "") #alias the query path reads from
+    MILVUS_KEEP_OLD_VERSIONS = _env_int("MILVUS_KEEP_OLD_VERSIONS", 1)
+    MILVUS_INDEX_TYPE = os.environ.get("MILVUS_INDEX_TYPE", "").upper() #HNSW | IVF_FLAT | IVF_SQ8 | FLAT, empty keeps the langchain default
+    MILVUS_METRIC_TYPE = _env("MILVUS_METRIC_TYPE", "L2").upper()
+    MILVUS_INDEX_PARAMS = json.loads(os.environ.get("MILVUS_INDEX_PARAMS") or "null") #e.g. {"M": 16, "efConstruction": 200}
+    MILVUS_SEARCH_PARAMS = json.loads(os.environ.get("MILVUS_SEARCH_PARAMS") or "{}") #e.g. {"ef": 64} or {"nprobe": 16}
 
     #aws s3 config
     S3_BUCKET_NAME = os.environ.get("S3_BUCKET_NAME", "")
@@ -40,6 +91,60 @@ class Config:
 
     DATABASE_URL = os.getenv("DATABASE_URL","")
 
+    #semantic response cache config
+    SEMANTIC_CACHE_ENABLED = _env_bool("SEMANTIC_CACHE_ENABLED", True)
+    SEMANTIC_CACHE_THRESHOLD = _env_float("SEMANTIC_CACHE_THRESHOLD", 0.92)
+    SEMANTIC_CACHE_TTL_SECONDS = _env_int("SEMANTIC_CACHE_TTL_SECONDS", 3600)
+    SEMANTIC_CACHE_MAX_ENTRIES = _env_int("SEMANTIC_CACHE_MAX_ENTRIES", 500)
+
+    #retrieval config
+    RETRIEVAL_MODE = _env("RETRIEVAL_MODE", "dense").lower() #dense | hybrid
+    HYBRID_CANDIDATES = _env_int("HYBRID_CANDIDATES", 20)
+    HYBRID_RRF_K = _env_int("HYBRID_RRF_K", 60)
+    RETRIEVAL_FETCH_K = _env_int("RETRIEVAL_FETCH_K", 12)
+    MMR_LAMBDA = _env_float("MMR_LAMBDA", 0.7)
+    CONTEXT_MAX_CHUNKS = _env_int("CONTEXT_MAX_CHUNKS", 6)
+    CONTEXT_TOKEN_BUDGET = _env_int("CONTEXT_TOKEN_BUDGET", 1500)
+
+    #conversation memory config
+    CHAT_MEMORY_MAX_TURNS = _env_int("CHAT_MEMORY_MAX_TURNS", 2)
+    CHAT_MEMORY_IDLE_TTL_SECONDS = _env_int("CHAT_MEMORY_IDLE_TTL_SECONDS", 1800)
+    CHAT_MEMORY_MAX_CONVERSATIONS = _env_int("CHAT_MEMORY_MAX_CONVERSATIONS", 1000)
+    CHAT_MEMORY_MAX_TOTAL_MESSAGES = _env_int("CHAT_MEMORY_MAX_TOTAL_MESSAGES", 20000)
+
+    #embedding cache config
+    EMBEDDING_CACHE_ENABLED = _env_bool("EMBEDDING_CACHE_ENABLED", True)
+    EMBEDDING_CACHE_PATH = _env("EMBEDDING_CACHE_PATH", "./data/embedding_cache.sqlite3")
+    EMBEDDING_CACHE_MAX_ENTRIES = _env_int("EMBEDDING_CACHE_MAX_ENTRIES", 200000)
+
+    #embedding batching config
+    EMBEDDING_BATCH_SIZE = _env_int("EMBEDDING_BATCH_SIZE", 64)
+    EMBEDDING_BATCH_MAX_TOKENS = _env_int("EMBEDDING_BATCH_MAX_TOKENS", 20000)
+    EMBEDDING_CONCURRENCY = _env_int("EMBEDDING_CONCURRENCY", 4)
+    EMBEDDING_MAX_RETRIES = _env_int("EMBEDDING_MAX_RETRIES", 3)
+
+    #llm resilience config
+    LLM_MAX_RETRIES = _env_int("LLM_MAX_RETRIES", 3)
+    LLM_RETRY_BASE_DELAY = _env_float("LLM_RETRY_BASE_DELAY", 0.5) #seconds, doubled per attempt with full jitter
+    LLM_RETRY_MAX_DELAY = _env_float("LLM_RETRY_MAX_DELAY", 20)
+    LLM_CIRCUIT_FAILURE_THRESHOLD = _env_int("LLM_CIRCUIT_FAILURE_THRESHOLD", 5) #consecutive 429/5xx/timeouts per provider
+    LLM_CIRCUIT_RECOVERY_SECONDS = _env_float("LLM_CIRCUIT_RECOVERY_SECONDS", 30)
+
+    #llm routing config
+    LLM_DEPLOYMENTS = json.loads(os.environ.get("LLM_DEPLOYMENTS") or "null") #e.g. [{"model": "azure/gpt-4o", "api_key": "...", "api_base": "...", "api_version": "..."}, {"model": "gemini/gemini-2.5-flash"}]
+    LLM_HEDGING = _env_bool("LLM_HEDGING", False) #only between deployments listed in LLM_DEPLOYMENTS
+    LLM_HEDGE_AFTER_SECONDS = _env_float("LLM_HEDGE_AFTER_SECONDS", 0) #0 hedges after the deployment's rolling p95
+    LLM_ROUTER_WINDOW = _env_int("LLM_ROUTER_WINDOW", 100) #latency/outcome samples kept per deployment
+    LLM_ROUTER_WINDOW_SECONDS = _env_float("LLM_ROUTER_WINDOW_SECONDS", 300)
+    LLM_ROUTER_MAX_ERROR_RATE = _env_float("LLM_ROUTER_MAX_ERROR_RATE", 0.5)
+
+    #llm http pool config
+    LLM_HTTP_MAX_CONNECTIONS = _env_int("LLM_HTTP_MAX_CONNECTIONS", 100)
+    LLM_HTTP_MAX_KEEPALIVE = _env_int("LLM_HTTP_MAX_KEEPALIVE", 20)
+    LLM_HTTP_KEEPALIVE_EXPIRY = _env_float("LLM_HTTP_KEEPALIVE_EXPIRY", 60) #seconds an idle connection is kept
+    LLM_HTTP_TIMEOUT = _env_float("LLM_HTTP_TIMEOUT", 60) #seconds per request phase (read covers gaps between streamed chunks)
+    LLM_HTTP_CONNECT_TIMEOUT = _env_float("LLM_HTTP_CONNECT_TIMEOUT", 10)
+
     
 
     
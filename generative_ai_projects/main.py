@@ -11,7 +11,7 @@ import bcrypt
 import litellm
 from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.security import HTTPBasic
 from jose import jwt
 from passlib.context import CryptContext
@@ -24,8 +24,12 @@ from src.database.states_schema import *
 
 # Local imports - Services/Agents
 from src.llm.litellm_client import LiteLLMClient
+from src.llm.resilience import get_resilience_stats
+from src.llm.router import get_llm_router
+from src.llm.http_pool import get_http_registry
 from src.agents.ticket_agent import TicketManagementAgent
 from src.rag.rag_core import FacilitiesRAGSystem
+from src.rag.ingest_jobs import IngestJobQueue, IngestQueueFullError
 
 # Local imports - Config
 from config.constant_config import Config
@@ -217,6 +221,9 @@ async def shutdown_scheduler():
     """Shutdown the scheduler gracefully"""
     if scheduler.running:
         scheduler.shutdown()
+    if ingest_queue is not None:
+        ingest_queue.shutdown(wait=False)
+    await get_http_registry().aclose()
 
 
 
@@ -259,6 +266,16 @@ def format_ticket_response(ticket: Ticket) -> TicketResponse:
     )
 
     
+ticket_agent = None
+
+def get_ticket_agent() -> TicketManagementAgent:
+    """Get or build the shared ticket agent; its graph is compiled once per process"""
+    global ticket_agent
+    if ticket_agent is None:
+        ticket_agent = TicketManagementAgent()
+    return ticket_agent
+
+
 @app.post("/api/v1/ticket_agent", response_model=ChatResponse)
 async def chat_with_ticket_agent(
     request: ChatRequest,
@@ -269,15 +286,14 @@ async def chat_with_ticket_agent(
         logger.info(f"Request from user: {request.user_id}")
         logger.info(f"Message: {request.message}")
         
-        ticket_agent = TicketManagementAgent(db_session=db)
-        
         loop = asyncio.get_event_loop()
         response = await asyncio.wait_for(
             loop.run_in_executor(
                 None,
-                ticket_agent.process_message,
+                get_ticket_agent().process_message,
                 request.message,
-                request.user_id
+                request.user_id,
+                db
             ),
             timeout=90
         )
@@ -332,6 +348,76 @@ def get_rag_system() -> FacilitiesRAGSystem:
     return rag_system
     
 
+ingest_queue = None
+
+def run_ingest_job(payload: dict, progress) -> dict:
+    """Process one queued upload on an ingest worker"""
+    system = get_rag_system()
+    wrapped_file = FormFileWrapper(payload["filename"], payload["content"])
+    result = system.process_file(wrapped_file, ingest_mode=payload.get("ingest_mode"), progress=progress)
+    if isinstance(result, dict):
+        return result
+    return {"success": bool(result), "message": "File processed" if result else "File processing failed. Check server logs."}
+
+def get_ingest_queue() -> IngestJobQueue:
+    """Get or create the in-process ingest job queue"""
+    global ingest_queue
+    if ingest_queue is None:
+        ingest_queue = IngestJobQueue(
+            run_ingest_job,
+            max_workers=Config.INGEST_WORKERS,
+            max_pending=Config.INGEST_MAX_PENDING,
+            max_retained=Config.INGEST_JOBS_RETAINED,
+        )
+    return ingest_queue
+
+
+async def read_upload_form(request: Request, system: FacilitiesRAGSystem):
+    """Validate the multipart upload, returns the form, filename, file bytes and size in KB"""
+    form = await request.form()
+    
+    if "file" not in form:
+        raise HTTPException(
+            status_code=400,
+            detail="No file provided. Please upload a file with key 'file' in form-data"
+        )
+    
+    uploaded_file = form["file"]
+    
+    if not hasattr(uploaded_file, 'filename'):
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid file object in form-data"
+        )
+    
+    filename = uploaded_file.filename
+    print(f"[API_UPLOAD] Received file: {filename}")
+    
+    file_ext = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if file_ext not in system.supported_formats:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "error": f"Unsupported file format: .{file_ext}",
+                "supported_formats": list(system.supported_formats.keys())
+            }
+        )
+    
+    file_content = await uploaded_file.read()
+    file_size_bytes = len(file_content)
+    file_size_kb = file_size_bytes / 1024
+    
+    print(f"[API_UPLOAD] File size: {file_size_kb:.2f} KB")
+    
+    if file_size_bytes == 0:
+        raise HTTPException(
+            status_code=400,
+            detail="Uploaded file is empty (0 bytes)"
+        )
+    
+    return form, filename, file_content, file_size_kb
+
+
 @app.post("/api/v1/upload_knowledgebase_file", response_model=FileUploadResponse, tags=["Documentsknowledgebase"])
 async def upload_document(request: Request):
     """
@@ -339,62 +425,27 @@ async def upload_document(request: Request):
     
     **Form-data required:**
     - file: The document file (PDF, CSV, Excel, TXT)
+
+    **Form-data optional:**
+    - ingest_mode: "verified" (default) or "fire_and_forget" for bulk loads
     
     **Returns:**
     - Success status
     - S3 presigned URL
     - Chunks added information
+
+    Large files can be queued with POST /api/v1/ingest_jobs instead.
     """
     print("File upload request received")
     
     try:
         system = get_rag_system()
-        
-        form = await request.form()
-        
-        if "file" not in form:
-            raise HTTPException(
-                status_code=400,
-                detail="No file provided. Please upload a file with key 'file' in form-data"
-            )
-        
-        uploaded_file = form["file"]
-        
-        if not hasattr(uploaded_file, 'filename'):
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid file object in form-data"
-            )
-        
-        filename = uploaded_file.filename
-        print(f"[API_UPLOAD] Received file: {filename}")
-        
-        file_ext = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
-        if file_ext not in system.supported_formats:
-            raise HTTPException(
-                status_code=400,
-                detail={
-                    "error": f"Unsupported file format: .{file_ext}",
-                    "supported_formats": list(system.supported_formats.keys())
-                }
-            )
-        
-        file_content = await uploaded_file.read()
-        file_size_bytes = len(file_content)
-        file_size_kb = file_size_bytes / 1024
-        
-        print(f"[API_UPLOAD] File size: {file_size_kb:.2f} KB")
-        
-        if file_size_bytes == 0:
-            raise HTTPException(
-                status_code=400,
-                detail="Uploaded file is empty (0 bytes)"
-            )
+        form, filename, file_content, file_size_kb = await read_upload_form(request, system)
         
         wrapped_file = FormFileWrapper(filename, file_content)
         
         print(f"[API_UPLOAD] Processing file...")
-        result = system.process_file(wrapped_file)
+        result = await asyncio.to_thread(system.process_file, wrapped_file, ingest_mode=form.get("ingest_mode"))
         
         if isinstance(result, dict):
             success = result.get("success", False)
@@ -447,6 +498,117 @@ async def upload_document(request: Request):
             }
         )
 
+
+@app.post("/api/v1/ingest_jobs", response_model=IngestJobSubmitResponse, status_code=202, tags=["Documentsknowledgebase"])
+async def submit_ingest_job(request: Request):
+    """
+    Upload a document and queue it for processing into the knowledge base
+    
+    **Form-data required:**
+    - file: The document file (PDF, CSV, Excel, TXT)
+
+    **Form-data optional:**
+    - ingest_mode: "verified" (default) or "fire_and_forget" for bulk loads
+    
+    **Returns:**
+    - Job id and status URL; poll /api/v1/ingest_jobs/{job_id} for progress
+    """
+    print("Ingest job request received")
+    
+    try:
+        system = get_rag_system()
+        form, filename, file_content, file_size_kb = await read_upload_form(request, system)
+        
+        try:
+            job_id = get_ingest_queue().submit(
+                {
+                    "filename": filename,
+                    "content": file_content,
+                    "ingest_mode": form.get("ingest_mode"),
+                },
+                filename=filename,
+            )
+        except IngestQueueFullError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        
+        print(f"[API_UPLOAD] Queued ingest job {job_id}")
+        return IngestJobSubmitResponse(
+            success=True,
+            message="Document queued for processing",
+            job_id=job_id,
+            filename=filename,
+            file_size_kb=round(file_size_kb, 2),
+            status_url=f"/api/v1/ingest_jobs/{job_id}",
+            timestamp=datetime.utcnow().isoformat()
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"[API_UPLOAD] Error: {str(e)}")
+        print(traceback.format_exc())
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "error": "Internal server error during file upload",
+                "message": str(e)
+            }
+        )
+
+
+@app.get("/api/v1/ingest_jobs/{job_id}", response_model=IngestJobStatusResponse, tags=["Documentsknowledgebase"])
+async def get_ingest_job(job_id: str):
+    """
+    Status of a queued upload
+
+    **Returns:**
+    - Status (queued, running, succeeded, failed) and the last completed stage
+    - Per-stage timings (uploaded, parsed, chunked, embedded, indexed)
+    - Processing result or error once finished
+    """
+    job = get_ingest_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Ingest job {job_id} not found")
+    return IngestJobStatusResponse(**job)
+
+
+@app.post("/api/v1/sync_knowledgebase", tags=["Documentsknowledgebase"])
+async def sync_knowledgebase():
+    """
+    Incrementally sync the knowledge base with KNOWLEDGE_BASE_DIR
+
+    **Returns:**
+    - Files added, updated, removed and unchanged since the last sync
+    - Number of chunks inserted and deleted
+    """
+    try:
+        system = get_rag_system()
+        result = await asyncio.to_thread(system.sync_knowledge_base_from_directory)
+        return JSONResponse(content=result, status_code=200 if result.get("success") else 500)
+    except Exception as e:
+        print(f"[API_SYNC] Error: {str(e)}")
+        print(traceback.format_exc())
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "error": "Internal server error during knowledge base sync",
+                "message": str(e)
+            }
+        )
+
+def to_source_info(doc) -> SourceInfo:
+    """Build API source info from a retrieved chunk"""
+    return SourceInfo(
+        title=doc.metadata.get("title", "Unknown"),
+        source=doc.metadata.get("source", "Unknown"),
+        content=doc.page_content[:200] + "..." if len(doc.page_content) > 200 else doc.page_content,
+        file_type=doc.metadata.get("file_type", "unknown"),
+        s3_url=doc.metadata.get("s3_url") or None,
+        sheet_name=doc.metadata.get("sheet_name") or None,
+        row_start=doc.metadata.get("row_start") or None,
+        row_end=doc.metadata.get("row_end") or None
+    )
+
 def count_tokens(text: str) -> int:
     """Estimate token count (rough approximation: 1 token ≈ 4 characters)"""
     return len(text) // 4
@@ -483,7 +645,10 @@ async def chat_query(request: ChatRequest):
             )
         
         print("Generating response...")
-        result = system.generate_response(request.message)
+        result = await system.agenerate_response(
+            request.message,
+            conversation_id=request.conversation_id or request.user_id,
+        )
         
         if result.get("error"):
             raise HTTPException(
@@ -495,15 +660,7 @@ async def chat_query(request: ChatRequest):
         source_docs = result.get("sources", [])
         llm_token_usage = result.get("token_usage", None)
 
-        sources = []
-        for doc in source_docs:
-            sources.append(SourceInfo(
-                title=doc.metadata.get("title", "Unknown"),
-                source=doc.metadata.get("source", "Unknown"),
-                content=doc.page_content[:200] + "..." if len(doc.page_content) > 200 else doc.page_content,
-                file_type=doc.metadata.get("file_type", "unknown"),
-                s3_url=doc.metadata.get("s3_url")
-            ))
+        sources = [to_source_info(doc) for doc in source_docs]
         
         if llm_token_usage:
             token_usage = TokenUsage(
@@ -520,7 +677,7 @@ async def chat_query(request: ChatRequest):
             )
             print("No token usage info from LLM")
         
-        print(f"Response generated successfully")
+        print(f"Response generated successfully{' (semantic cache hit)' if result.get('cached') else ''}{' (coalesced)' if result.get('coalesced') else ''}")
         print(f"Sources: {len(sources)} documents")
         print("="*60 + "\n")
         
@@ -547,3 +704,123 @@ async def chat_query(request: ChatRequest):
             }
         )
 
+
+def format_sse(event: str, data) -> str:
+    """Format a server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/api/v1/facility_qna/stream", tags=["Chatqna"])
+async def chat_query_stream(request: ChatRequest):
+    """
+    Ask a question and stream the answer as server-sent events
+
+    **Request body:**
+    - message: The question to ask
+
+    **Events:**
+    - sources: Source documents used (sent before the first token)
+    - token: Answer text delta
+    - usage: Token usage (final event)
+    - error: Error message (final event on failure)
+    """
+    print(f"[API_CHAT_STREAM] Query received: {request.message}")
+
+    if not request.message or len(request.message.strip()) == 0:
+        raise HTTPException(
+            status_code=400,
+            detail="Message cannot be empty"
+        )
+
+    system = get_rag_system()
+
+    if not system.vectorstore:
+        raise HTTPException(
+            status_code=400,
+            detail="Knowledge base not initialized. Please upload documents first."
+        )
+
+    async def event_stream():
+        try:
+            async for event in system.agenerate_response_stream(
+                request.message,
+                conversation_id=request.conversation_id or request.user_id,
+            ):
+                if event["type"] == "sources":
+                    sources = [to_source_info(doc).model_dump() for doc in event["sources"]]
+                    yield format_sse("sources", {"sources": sources})
+                elif event["type"] == "token":
+                    yield format_sse("token", {"content": event["content"]})
+                elif event["type"] == "usage":
+                    token_usage = event.get("token_usage") or {}
+                    usage = TokenUsage(
+                        prompt_tokens=token_usage.get("prompt_tokens", 0),
+                        completion_tokens=token_usage.get("completion_tokens", 0),
+                        total_tokens=token_usage.get("total_tokens", 0)
+                    )
+                    yield format_sse("usage", {
+                        "token_usage": usage.model_dump(),
+                        "cached": event.get("cached", False),
+                        "timestamp": datetime.utcnow().isoformat(),
+                    })
+                elif event["type"] == "error":
+                    yield format_sse("error", {"message": event["content"]})
+        except Exception as e:
+            print(f"[API_CHAT_STREAM] Error: {str(e)}")
+            print(traceback.format_exc())
+            yield format_sse("error", {"message": f"Internal server error during query processing: {str(e)}"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/api/v1/facility_qna/cache_stats", tags=["Chatqna"])
+async def get_qna_cache_stats():
+    """
+    Semantic answer cache and embedding cache counters
+
+    **Returns:**
+    - Hit/miss counters, hit rate and current size for tuning the similarity threshold
+    - Embedding cache hit rate and size
+    - Number of requests that shared an identical in-flight answer
+    """
+    try:
+        system = get_rag_system()
+        embedding_cache_stats = {"enabled": False}
+        if hasattr(system.embedding_function, "get_cache_stats"):
+            embedding_cache_stats = system.embedding_function.get_cache_stats()
+        return {
+            "response_cache": system.get_response_cache_stats(),
+            "embedding_cache": embedding_cache_stats,
+            "single_flight": system.get_single_flight_stats(),
+        }
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "error": "Internal server error while reading cache stats",
+                "message": str(e)
+            }
+        )
+
+
+@app.get("/api/v1/llm_resilience_stats", tags=["Chatqna"])
+async def get_llm_resilience_stats():
+    """
+    Retry, circuit breaker, routing and connection pool counters for LLM and embedding calls
+
+    **Returns:**
+    - Per provider: calls, retries, rate-limited and transient errors, fail-fast rejections
+    - Current circuit state (closed | open | half_open) and consecutive failures
+    - Router: per-deployment p50/p95 latency and error rate, current ranking, hedges and fallbacks
+    - HTTP pool: limits, requests sent, open/idle/active connections, queued requests and utilization
+    """
+    return {
+        "providers": get_resilience_stats(),
+        "router": get_llm_router().get_stats(),
+        "http_pool": get_http_registry().get_stats(),
+    }
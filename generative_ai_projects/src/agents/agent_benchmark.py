@@ -0,0 +1,117 @@
+"""
+Agent Benchmark Module - Per-request overhead of building the ticket agent vs reusing one compiled graph
+
+Run from the project root:
+    python -m src.agents.agent_benchmark --requests 200
+
+The LLM is a local fake behind the real router and tickets live in an
+in-memory SQLite database, so the numbers are agent overhead only.
+"""
+
+import argparse
+import json
+import logging
+import statistics
+import time
+from typing import Callable, Dict
+
+import litellm
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.agents.ticket_agent import TicketManagementAgent
+from src.database.models import Base
+from src.llm.router import Deployment, LLMRouter
+
+
+INTENTS = [
+    {"action": "create_ticket", "parameters": {"category": "Maintenance", "priority": "High",
+                                               "description": "Broken AC in Room 12"}},
+    {"action": "get_my_tickets", "parameters": {}},
+    {"action": "get_ticket_stats", "parameters": {}},
+]
+
+
+def fake_router() -> LLMRouter:
+    """Router whose only deployment answers instantly with a canned intent"""
+    calls = {"count": 0}
+
+    def completion(model, messages, **kwargs):
+        intent = INTENTS[calls["count"] % len(INTENTS)]
+        calls["count"] += 1
+        return litellm.ModelResponse(
+            model="gpt-4o-mini",
+            choices=[{"message": {"role": "assistant", "content": json.dumps(intent)}}],
+            usage={"prompt_tokens": 120, "completion_tokens": 30, "total_tokens": 150},
+        )
+
+    return LLMRouter([Deployment("fake", "fake")], completion_fn=completion)
+
+
+def timed(fn: Callable[[], None], iterations: int) -> Dict[str, float]:
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return {
+        "mean_ms": round(statistics.mean(latencies), 3),
+        "p50_ms": round(latencies[len(latencies) // 2], 3),
+        "p95_ms": round(latencies[max(0, int(len(latencies) * 0.95) - 1)], 3),
+    }
+
+
+def run_benchmark(requests: int = 200) -> dict:
+    """Time construction alone, then full requests with a new agent each time vs one shared agent"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    make_session = sessionmaker(bind=engine)
+    router = fake_router()
+
+    def per_request_agent():
+        db = make_session()
+        try:
+            TicketManagementAgent(router=router).process_message("Create ticket for broken AC", "bench-user", db)
+        finally:
+            db.close()
+
+    shared = TicketManagementAgent(router=router)
+
+    def shared_agent():
+        db = make_session()
+        try:
+            shared.process_message("Create ticket for broken AC", "bench-user", db)
+        finally:
+            db.close()
+
+    # Warm up imports, SQLAlchemy mappers and litellm's cost map
+    for _ in range(5):
+        per_request_agent()
+        shared_agent()
+
+    results = {
+        "build_only": timed(lambda: TicketManagementAgent(router=router), requests),
+        "before_new_agent_per_request": timed(per_request_agent, requests),
+        "after_shared_compiled_graph": timed(shared_agent, requests),
+    }
+    results["saved_per_request_ms"] = round(
+        results["before_new_agent_per_request"]["mean_ms"] - results["after_shared_compiled_graph"]["mean_ms"], 3
+    )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure ticket agent per-request overhead before/after graph reuse")
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    logging.getLogger("src.agents.ticket_agent").setLevel(logging.WARNING)
+    results = run_benchmark(args.requests)
+    for name, row in results.items():
+        print(f"[AGENT_BENCHMARK] {name}: {row}")
+
+
+if __name__ == "__main__":
+    main()
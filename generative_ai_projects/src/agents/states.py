@@ -2,7 +2,7 @@
 Agent State Definitions
 All TypedDict state classes for LangGraph agents
 """
-from typing import TypedDict, List, Dict, Optional
+from typing import Any, TypedDict, List, Dict, Optional
 
 
 
@@ -10,6 +10,7 @@ class TicketAgentState(TypedDict):
     """State for ticket management agent"""
     messages: List[Dict]
     user_id: str
+    db_session: Any
     ticket_data: Dict
     response: str
     token_usage: Dict
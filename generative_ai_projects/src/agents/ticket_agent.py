@@ -7,7 +7,8 @@ import uuid
 import logging
 import re
 import json
-from litellm import completion, completion_cost
+from litellm import completion_cost
+from src.llm.router import get_llm_router
 from src.agents.states import TicketAgentState
 
 dotenv.load_dotenv()
@@ -17,32 +18,31 @@ logger = logging.getLogger(__name__)
 
 
 class TicketManagementAgent:
-    """Agent for handling ticket-related queries and actions"""
+    """Agent for handling ticket-related queries and actions
+
+    Stateless: the graph is compiled once and shared by all requests, while the
+    database session and user travel in TicketAgentState.
+    """
     
-    def __init__(self, db_session):
-        """Initialize with database session"""
-        self.db = db_session
+    def __init__(self, router=None):
+        """Initialize with the shared LLM router"""
         logger.info("TicketManagementAgent initialized")
         
-        self.model = os.getenv("LLM_MODEL", "gemini/gemini-2.5-flash")
-        self.api_key = os.getenv("GOOGLE_API_KEY")
-        
-        if self.api_key:
-            os.environ["GEMINI_API_KEY"] = self.api_key
+        self.router = router or get_llm_router()
         
-        logger.info(f"Using LiteLLM model: {self.model}")
+        logger.info(f"Using LiteLLM deployments: {[d.name for d in self.router.deployments]}")
         
         self.graph = self._build_graph()
     
     def call_llm(self, messages: List[Dict], temperature: float = 0.7, max_tokens: int = int(os.getenv("MAX_TOKENS", 300))) -> Dict:
         """Call LiteLLM and return response with token usage and cost"""
         try:
-            response = completion(
-                model=self.model,
-                messages=messages,
+            response = self.router.complete(
+                messages,
                 temperature=temperature,
                 max_tokens=max_tokens
             )
+            model = getattr(response, "model", None)
             
             token_usage = {
                 "prompt_tokens": response.usage.prompt_tokens,
@@ -56,14 +56,14 @@ class TicketManagementAgent:
                 cost_info = {
                     "total_cost": round(cost, 6),
                     "currency": "USD",
-                    "model": self.model
+                    "model": model
                 }
             except Exception as e:
                 logger.warning(f"Could not calculate cost: {e}")
                 cost_info = {
                     "total_cost": 0.0,
                     "currency": "USD",
-                    "model": self.model,
+                    "model": model,
                     "note": "Cost calculation not available"
                 }
             
@@ -86,7 +86,7 @@ class TicketManagementAgent:
                 "cost_info": {"total_cost": 0.0, "currency": "USD", "error": str(e)}
             }
     
-    def create_ticket_tool(self, category: str, description: str, priority: str, user_id: str) -> Dict:
+    def create_ticket_tool(self, db, category: str, description: str, priority: str, user_id: str) -> Dict:
         """Create a new ticket"""
         try:
             logger.info(f"Creating ticket for user: {user_id}")
@@ -112,9 +112,9 @@ class TicketManagementAgent:
 
             )
             
-            self.db.add(new_ticket)
-            self.db.commit()
-            self.db.refresh(new_ticket)
+            db.add(new_ticket)
+            db.commit()
+            db.refresh(new_ticket)
             
             logger.info(f"Ticket created successfully: {ticket_id}")
             
@@ -132,16 +132,16 @@ class TicketManagementAgent:
             
         except Exception as e:
             logger.error(f"Error creating ticket: {str(e)}", exc_info=True)
-            self.db.rollback()
+            db.rollback()
             return {"success": False, "error": f"Database error: {str(e)}"}
     
-    def get_my_tickets_tool(self, user_id: str, status: str = None) -> Dict:
+    def get_my_tickets_tool(self, db, user_id: str, status: str = None) -> Dict:
         """Get user tickets"""
         try:
             logger.info(f"Getting tickets for user: {user_id}, status: {status}")
             from src.database.models import Ticket
             
-            query = self.db.query(Ticket).filter(Ticket.user_id == user_id)
+            query = db.query(Ticket).filter(Ticket.user_id == user_id)
             
             if status:
                 query = query.filter(Ticket.status == status)
@@ -173,13 +173,13 @@ class TicketManagementAgent:
             logger.error(f"Error getting user tickets: {str(e)}", exc_info=True)
             return {"success": False, "error": f"Database error: {str(e)}"}
     
-    def get_all_tickets_tool(self, status: str = None, priority: str = None) -> Dict:
+    def get_all_tickets_tool(self, db, status: str = None, priority: str = None) -> Dict:
         """Get all tickets - NO RBAC CHECK"""
         try:
             logger.info(f"Getting all tickets - status: {status}, priority: {priority}")
             from src.database.models import Ticket
             
-            query = self.db.query(Ticket)
+            query = db.query(Ticket)
             
             if status:
                 query = query.filter(Ticket.status == status)
@@ -215,18 +215,18 @@ class TicketManagementAgent:
             logger.error(f"Error getting all tickets: {str(e)}", exc_info=True)
             return {"success": False, "error": f"Database error: {str(e)}"}
     
-    def get_ticket_stats_tool(self) -> Dict:
+    def get_ticket_stats_tool(self, db) -> Dict:
         """Get ticket stats - NO RBAC CHECK"""
         try:
             logger.info("Getting ticket statistics")
             from src.database.models import Ticket
             from sqlalchemy import func
             
-            total = self.db.query(func.count(Ticket.id)).scalar() or 0
-            open_count = self.db.query(func.count(Ticket.id)).filter(Ticket.status == "Open").scalar() or 0
-            in_progress = self.db.query(func.count(Ticket.id)).filter(Ticket.status == "In Progress").scalar() or 0
-            escalated = self.db.query(func.count(Ticket.id)).filter(Ticket.status == "Escalated").scalar() or 0
-            resolved = self.db.query(func.count(Ticket.id)).filter(Ticket.status == "Resolved").scalar() or 0
+            total = db.query(func.count(Ticket.id)).scalar() or 0
+            open_count = db.query(func.count(Ticket.id)).filter(Ticket.status == "Open").scalar() or 0
+            in_progress = db.query(func.count(Ticket.id)).filter(Ticket.status == "In Progress").scalar() or 0
+            escalated = db.query(func.count(Ticket.id)).filter(Ticket.status == "Escalated").scalar() or 0
+            resolved = db.query(func.count(Ticket.id)).filter(Ticket.status == "Resolved").scalar() or 0
             
             resolution_rate = (resolved / total * 100) if total > 0 else 0
             
@@ -406,6 +406,7 @@ class TicketManagementAgent:
         """Execute the determined action"""
         action = state["ticket_data"].get("action")
         params = state["ticket_data"].get("parameters", {})
+        db = state["db_session"]
         
         logger.info(f"Executing action: {action}")
         
@@ -415,24 +416,24 @@ class TicketManagementAgent:
                     k: v for k, v in params.items() 
                     if k in ['category', 'description', 'priority', 'user_id']
                 }
-                result = self.create_ticket_tool(**filtered_params)
+                result = self.create_ticket_tool(db, **filtered_params)
                 
             elif action == "get_my_tickets":
                 filtered_params = {
                     k: v for k, v in params.items() 
                     if k in ['user_id', 'status']
                 }
-                result = self.get_my_tickets_tool(**filtered_params)
+                result = self.get_my_tickets_tool(db, **filtered_params)
                 
             elif action == "get_all_tickets":
                 filtered_params = {
                     k: v for k, v in params.items() 
                     if k in ['status', 'priority']
                 }
-                result = self.get_all_tickets_tool(**filtered_params)
+                result = self.get_all_tickets_tool(db, **filtered_params)
                 
             elif action == "get_ticket_stats":
-                result = self.get_ticket_stats_tool()
+                result = self.get_ticket_stats_tool(db)
             else:
                 result = {"success": False, "error": "Unknown action"}
             
@@ -518,11 +519,12 @@ class TicketManagementAgent:
         
         return state
     
-    def process_message(self, message: str, user_id: str) -> Dict:
+    def process_message(self, message: str, user_id: str, db_session) -> Dict:
         """Process a user message and return response with token info - NO ROLE PARAMETER"""
         initial_state = {
             "messages": [{"role": "user", "content": message}],
             "user_id": user_id,
+            "db_session": db_session,
             "ticket_data": {},
             "response": "",
             "token_usage": {},
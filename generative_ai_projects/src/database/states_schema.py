@@ -92,9 +92,42 @@ class FileUploadResponse(BaseModel):
     total_chunks: Optional[int] = None
     timestamp: str
 
+class IngestJobSubmitResponse(BaseModel):
+    """Response model for a queued file upload"""
+    success: bool
+    message: str
+    job_id: str
+    filename: str
+    file_size_kb: Optional[float] = None
+    status_url: str
+    timestamp: str
+
+class IngestJobStage(BaseModel):
+    """Completed ingest stage with its timing"""
+    stage: str
+    completed_at: float
+    duration_seconds: float
+
+class IngestJobStatusResponse(BaseModel):
+    """Response model for ingest job status polling"""
+    job_id: str
+    filename: Optional[str] = None
+    status: str
+    stage: Optional[str] = None
+    stages: List[IngestJobStage]
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    queue_seconds: float
+    run_seconds: Optional[float] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+
 class ChatRequest(BaseModel):
     """Request model for chat Q&A"""
     message: str
+    user_id: Optional[str] = None
+    conversation_id: Optional[str] = None
 class SourceInfo(BaseModel):
     """Source document information"""
     title: str
@@ -102,6 +135,9 @@ class SourceInfo(BaseModel):
     content: str
     file_type: str
     s3_url: Optional[str] = None
+    sheet_name: Optional[str] = None
+    row_start: Optional[int] = None
+    row_end: Optional[int] = None
 
 
 class TokenUsage(BaseModel):
@@ -1,38 +1,124 @@
-from typing import List, Dict
-from litellm import completion, embedding
+from typing import Any, List, Dict
+from litellm import embedding, aembedding
 from langchain_core.embeddings import Embeddings
 from langchain_core.language_models import BaseChatModel
-from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
-from langchain_core.outputs import ChatResult, ChatGeneration, LLMResult
-from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, AIMessageChunk, SystemMessage
+from langchain_core.outputs import ChatResult, ChatGeneration, ChatGenerationChunk, LLMResult
+from langchain_core.callbacks import CallbackManagerForLLMRun, AsyncCallbackManagerForLLMRun
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
+import asyncio
 import os
+import threading
 import dotenv
 from config.constant_config import Config
+from src.llm.embedding_cache import EmbeddingCache
+from src.llm.http_pool import get_http_registry
+from src.llm.resilience import RetryPolicy, acall_with_retry, call_with_retry
+from src.llm.router import LLMRouter, get_llm_router
 
 dotenv.load_dotenv()
 
 class LiteLLMEmbeddings(Embeddings):
     """LangChain-compatible embeddings using LiteLM"""
     
-    def __init__(self, model: str, azure_key: str, azure_api_base: str, api_version: str):
+    def __init__(self, model: str, azure_key: str, azure_api_base: str, api_version: str,
+                 cache: EmbeddingCache = None, batch_size: int = 64, batch_max_tokens: int = 20000,
+                 concurrency: int = 4, max_retries: int = 3):
         self.model = f"azure/{model}"
         self.azure_key = azure_key
         self.azure_api_base = azure_api_base
         self.api_version = api_version
+        self.cache = cache
+        self.batch_size = max(1, batch_size)
+        self.batch_max_tokens = max(1, batch_max_tokens)
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max(0, max_retries)
+        self.retry_policy = RetryPolicy(self.max_retries, Config.LLM_RETRY_BASE_DELAY, Config.LLM_RETRY_MAX_DELAY)
     
-    def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        """Embed multiple documents"""
-        try:
-            response = embedding(
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        """Estimate token count (rough approximation: 1 token ≈ 4 characters)"""
+        return len(text) // 4 + 1
+    
+    def _make_batches(self, texts: List[str]) -> List[List[str]]:
+        """Split texts into batches bounded by input count and estimated tokens"""
+        batches = []
+        current = []
+        current_tokens = 0
+        for text in texts:
+            tokens = self._estimate_tokens(text)
+            if current and (len(current) >= self.batch_size or current_tokens + tokens > self.batch_max_tokens):
+                batches.append(current)
+                current = []
+                current_tokens = 0
+            current.append(text)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+    
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Call the embedding endpoint for a single batch, retrying retryable errors"""
+        response = call_with_retry(
+            lambda: embedding(
                 model=self.model,
                 input=texts,
                 api_key=self.azure_key,
                 api_base=self.azure_api_base,
-                api_version=self.api_version
-
-            )
-            return [item['embedding'] for item in response.data]
+                api_version=self.api_version,
+                max_retries=0
+            ),
+            provider="azure",
+            policy=self.retry_policy,
+        )
+        return [item['embedding'] for item in response.data]
+    
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts in concurrent batches, each batch retried on its own"""
+        batches = self._make_batches(texts)
+        if len(batches) == 1:
+            return self._embed_batch(batches[0])
+        
+        workers = min(self.concurrency, len(batches))
+        print(f"[EMBEDDINGS] Embedding {len(texts)} texts in {len(batches)} batches with {workers} workers")
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(self._embed_batch, batches))
+        
+        return [vector for batch in results for vector in batch]
+    
+    def _embed_with_cache(self, texts: List[str]) -> List[List[float]]:
+        """Embed only texts whose (model, sha256) is not cached yet"""
+        if not self.cache:
+            return self._embed(texts)
+        
+        cached = self.cache.get_many(self.model, texts)
+        cache_hits = sum(1 for text in texts if self.cache.text_hash(text) in cached)
+        
+        missing_texts = []
+        seen = set()
+        for text in texts:
+            text_hash = self.cache.text_hash(text)
+            if text_hash not in cached and text_hash not in seen:
+                seen.add(text_hash)
+                missing_texts.append(text)
+        
+        if missing_texts:
+            new_vectors = self._embed(missing_texts)
+            self.cache.put_many(self.model, missing_texts, new_vectors)
+            for text, vector in zip(missing_texts, new_vectors):
+                cached[self.cache.text_hash(text)] = vector
+        
+        if len(texts) > 1:
+            print(f"[EMBEDDINGS] {cache_hits}/{len(texts)} embeddings served from cache")
+        
+        return [cached[self.cache.text_hash(text)] for text in texts]
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed multiple documents"""
+        try:
+            return self._embed_with_cache(texts)
         except Exception as e:
             print(f"Error in embed_documents: {str(e)}")
             raise
@@ -40,40 +126,112 @@ class LiteLLMEmbeddings(Embeddings):
     def embed_query(self, text: str) -> List[float]:
         """Embed a single query"""
         try:
-            response = embedding(
+            return self._embed_with_cache([text])[0]
+        except Exception as e:
+            print(f"Error in embed_query: {str(e)}")
+            raise
+    
+    async def _aembed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Call the embedding endpoint for a single batch without blocking the event loop"""
+        get_http_registry().install()
+        response = await acall_with_retry(
+            lambda: aembedding(
                 model=self.model,
-                input=[text],
+                input=texts,
                 api_key=self.azure_key,
                 api_base=self.azure_api_base,
-                api_version=self.api_version
-            )
-            return response.data[0]['embedding']
+                api_version=self.api_version,
+                max_retries=0
+            ),
+            provider="azure",
+            policy=self.retry_policy,
+        )
+        return [item['embedding'] for item in response.data]
+    
+    async def aembed_query(self, text: str) -> List[float]:
+        """Embed a single query asynchronously"""
+        try:
+            if self.cache:
+                text_hash = self.cache.text_hash(text)
+                cached = await asyncio.to_thread(self.cache.get_many, self.model, [text])
+                if text_hash in cached:
+                    return cached[text_hash]
+            
+            vector = (await self._aembed_batch([text]))[0]
+            
+            if self.cache:
+                await asyncio.to_thread(self.cache.put_many, self.model, [text], [vector])
+            return vector
         except Exception as e:
-            print(f"Error in embed_query: {str(e)}")
+            print(f"Error in aembed_query: {str(e)}")
             raise
+    
+    def get_cache_stats(self) -> dict:
+        """Get embedding cache hit-rate statistics"""
+        if not self.cache:
+            return {"enabled": False}
+        return {"enabled": True, **self.cache.get_stats()}
 
 
 class LiteLLMChat(BaseChatModel):
-    """LangChain-compatible chat model using LiteLM"""
+    """LangChain-compatible chat model using LiteLM, routed across the configured deployments"""
     
-    model: str
-    azure_key: str
-    azure_api_base: str
-    api_version: str
+    router: Any
     temperature: float = 0.3
     max_tokens: int = 1000
     
-    def __init__(self, model: str, azure_key: str, azure_api_base: str, 
-                 api_version: str, temperature: float = 0.3, max_tokens: int = 1000):
+    def __init__(self, router: LLMRouter, temperature: float = 0.3, max_tokens: int = 1000):
         super().__init__(
-            model=model,
-            azure_key=azure_key,
-            azure_api_base=azure_api_base,
-            api_version=api_version,
+            router=router,
             temperature=temperature,
             max_tokens=max_tokens
         )
     
+    @staticmethod
+    def _to_litellm_messages(messages: List[BaseMessage]) -> List[Dict]:
+        """Convert LangChain messages to LiteLLM chat format"""
+        litellm_messages = []
+        for msg in messages:
+            if isinstance(msg, HumanMessage):
+                litellm_messages.append({"role": "user", "content": msg.content})
+            elif isinstance(msg, AIMessage):
+                litellm_messages.append({"role": "assistant", "content": msg.content})
+            elif isinstance(msg, SystemMessage):
+                litellm_messages.append({"role": "system", "content": msg.content})
+            else:
+                litellm_messages.append({"role": "user", "content": str(msg.content)})
+        return litellm_messages
+    
+    def _completion_args(self, **kwargs) -> Dict:
+        """Sampling arguments; model and credentials come from the deployment the router picks"""
+        return {
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            **kwargs
+        }
+    
+    @staticmethod
+    def _to_chat_result(response) -> ChatResult:
+        """Convert a LiteLLM completion response to a LangChain ChatResult"""
+        content = response.choices[0].message.content
+        
+        usage = response.get('usage', {})
+        token_usage = {
+            'prompt_tokens': usage.get('prompt_tokens', 0),
+            'completion_tokens': usage.get('completion_tokens', 0),
+            'total_tokens': usage.get('total_tokens', 0)
+        }
+        
+        generation = ChatGeneration(
+            message=AIMessage(content=content),
+            generation_info={"token_usage": token_usage}
+        )
+        
+        return ChatResult(
+            generations=[generation],
+            llm_output={"token_usage": token_usage}
+        )
+    
     def _generate(
         self,
         messages: List[BaseMessage],
@@ -83,106 +241,132 @@ class LiteLLMChat(BaseChatModel):
     ) -> ChatResult:
         """Generate response using LiteLM"""
         try:
-            litellm_messages = []
-            for msg in messages:
-                if isinstance(msg, HumanMessage):
-                    litellm_messages.append({"role": "user", "content": msg.content})
-                elif isinstance(msg, AIMessage):
-                    litellm_messages.append({"role": "assistant", "content": msg.content})
-                elif isinstance(msg, SystemMessage):
-                    litellm_messages.append({"role": "system", "content": msg.content})
-                else:
-                    litellm_messages.append({"role": "user", "content": str(msg.content)})
+            litellm_messages = self._to_litellm_messages(messages)
             
-            response = completion(
-                model=f"azure/{self.model}",
-                messages=litellm_messages,
-                api_key=self.azure_key,
-                api_base=self.azure_api_base,
-                api_version=self.api_version,
-                temperature=self.temperature,
-                max_tokens=self.max_tokens,
-                **kwargs
-            )
-            
-            content = response.choices[0].message.content
+            response = self.router.complete(litellm_messages, **self._completion_args(**kwargs))
             
-            usage = response.get('usage', {})
-            token_usage = {
-                'prompt_tokens': usage.get('prompt_tokens', 0),
-                'completion_tokens': usage.get('completion_tokens', 0),
-                'total_tokens': usage.get('total_tokens', 0)
-            }
+            return self._to_chat_result(response)
+        except Exception as e:
+            print(f"Error in _generate: {str(e)}")
+            raise
+    
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: List[str] = None,
+        run_manager: AsyncCallbackManagerForLLMRun = None,
+        **kwargs
+    ) -> ChatResult:
+        """Generate response using LiteLM without blocking the event loop"""
+        try:
+            litellm_messages = self._to_litellm_messages(messages)
             
-            generation = ChatGeneration(
-                message=AIMessage(content=content),
-                generation_info={"token_usage": token_usage}
-            )
+            response = await self.router.acomplete(litellm_messages, **self._completion_args(**kwargs))
             
-            return ChatResult(
-                generations=[generation],
-                llm_output={"token_usage": token_usage}
-            )
+            return self._to_chat_result(response)
         except Exception as e:
-            print(f"Error in _generate: {str(e)}")
+            print(f"Error in _agenerate: {str(e)}")
             raise
     
     def _stream(self, messages: List[BaseMessage], stop: List[str] = None, 
                 run_manager: CallbackManagerForLLMRun = None, **kwargs):
         """Stream response using LiteLM"""
         try:
-            litellm_messages = []
-            for msg in messages:
-                if isinstance(msg, HumanMessage):
-                    litellm_messages.append({"role": "user", "content": msg.content})
-                elif isinstance(msg, AIMessage):
-                    litellm_messages.append({"role": "assistant", "content": msg.content})
-                elif isinstance(msg, SystemMessage):
-                    litellm_messages.append({"role": "system", "content": msg.content})
-                else:
-                    litellm_messages.append({"role": "user", "content": str(msg.content)})
+            litellm_messages = self._to_litellm_messages(messages)
             
-            response = completion(
-                model=f"azure/{self.model}",
-                messages=litellm_messages,
-                api_key=self.azure_key,
-                api_base=self.azure_api_base,
-                api_version=self.api_version,
-                temperature=self.temperature,
-                max_tokens=self.max_tokens,
-                stream=True,
-                **kwargs
-            )
+            response = self.router.stream(litellm_messages, **self._completion_args(**kwargs))
             
             for chunk in response:
-                if chunk.choices[0].delta.content:
-                    yield ChatGeneration(
-                        message=AIMessage(content=chunk.choices[0].delta.content)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield ChatGenerationChunk(
+                        message=AIMessageChunk(content=chunk.choices[0].delta.content)
                     )
         except Exception as e:
             print(f"Error in _stream: {str(e)}")
             raise
     
+    async def _astream(self, messages: List[BaseMessage], stop: List[str] = None,
+                       run_manager: AsyncCallbackManagerForLLMRun = None, **kwargs):
+        """Stream response using LiteLM, ending with a usage-only chunk"""
+        try:
+            litellm_messages = self._to_litellm_messages(messages)
+            
+            response = self.router.astream(
+                litellm_messages, **self._completion_args(stream_options={"include_usage": True}, **kwargs)
+            )
+            
+            async for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield ChatGenerationChunk(
+                        message=AIMessageChunk(content=chunk.choices[0].delta.content)
+                    )
+                
+                usage = getattr(chunk, "usage", None)
+                if usage:
+                    yield ChatGenerationChunk(
+                        message=AIMessageChunk(
+                            content="",
+                            usage_metadata={
+                                "input_tokens": usage.prompt_tokens or 0,
+                                "output_tokens": usage.completion_tokens or 0,
+                                "total_tokens": usage.total_tokens or 0,
+                            }
+                        )
+                    )
+        except Exception as e:
+            print(f"Error in _astream: {str(e)}")
+            raise
+    
     @property
     def _llm_type(self) -> str:
-        return "litellm-azure-chat"
+        return "litellm-router-chat"
+
+
+_embedding_cache = None
+_llm_clients = None
+_llm_clients_lock = threading.Lock()
+
+
+def get_embedding_cache():
+    """Get the process-wide on-disk embedding cache, if enabled"""
+    global _embedding_cache
+    if _embedding_cache is None and Config.EMBEDDING_CACHE_ENABLED:
+        _embedding_cache = EmbeddingCache(
+            db_path=Config.EMBEDDING_CACHE_PATH,
+            max_entries=Config.EMBEDDING_CACHE_MAX_ENTRIES,
+        )
+    return _embedding_cache
 
 
 def setup_llm_clients():
-    """Setup LiteLLM embeddings and LLM objects with LangChain compatibility."""
+    """Setup LiteLLM embeddings and LLM objects with LangChain compatibility.
+
+    Built once per process, so every RAG system and UI session shares the same clients and connection pool.
+    """
+    global _llm_clients
+    with _llm_clients_lock:
+        if _llm_clients is None:
+            _llm_clients = _create_llm_clients()
+        return _llm_clients or (None, None)
+
+
+def _create_llm_clients():
     try:
+        get_http_registry()
         embedding_function = LiteLLMEmbeddings(
             model=Config.AZURE_EMBEDDING_DEPLOYMENT,
             azure_key=Config.AZURE_API_KEY,
             azure_api_base=Config.AZURE_ENDPOINT,
-            api_version=Config.AZURE_API_VERSION
+            api_version=Config.AZURE_API_VERSION,
+            cache=get_embedding_cache(),
+            batch_size=Config.EMBEDDING_BATCH_SIZE,
+            batch_max_tokens=Config.EMBEDDING_BATCH_MAX_TOKENS,
+            concurrency=Config.EMBEDDING_CONCURRENCY,
+            max_retries=Config.EMBEDDING_MAX_RETRIES,
         )
         
         llm = LiteLLMChat(
-            model=Config.AZURE_DEPLOYMENT,
-            azure_key=Config.AZURE_API_KEY,
-            azure_api_base=Config.AZURE_ENDPOINT,
-            api_version=Config.AZURE_API_VERSION,
+            router=get_llm_router(),
             temperature=float(Config.LLM_TEMP) if float(Config.LLM_TEMP) else 0.3,
             max_tokens=int(Config.MAX_TOKENS) if int(Config.MAX_TOKENS) else 1000,
 
@@ -191,7 +375,7 @@ def setup_llm_clients():
         return embedding_function, llm
     except Exception as e:
         st.error(f"Error setting up LiteLLM clients: {str(e)}")
-        return None, None
+        return None
 
 
 def get_llm_greeting_response(chat_history: List[Dict], query: str):
@@ -207,14 +391,8 @@ def get_llm_greeting_response(chat_history: List[Dict], query: str):
             
         messages.append({"role": "user", "content": query})
         
-        model_string = f"azure/{Config.AZURE_DEPLOYMENT}"
-        
-        response = completion(
-            model=model_string,
-            messages=messages,
-            api_key=Config.AZURE_API_KEY,
-            api_base=Config.AZURE_ENDPOINT,
-            api_version=Config.AZURE_API_VERSION,
+        response = get_llm_router().complete(
+            messages,
             temperature=float(Config.GREETING_LLM_TEMP) if float(Config.GREETING_LLM_TEMP) else 0.7
         )
         
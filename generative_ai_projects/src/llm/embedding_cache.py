@@ -0,0 +1,168 @@
+"""
+Embedding Cache Module - Content-addressed on-disk store for embeddings
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Dict, List
+
+
+# Access times only drive LRU eviction, so they are buffered and written in batches
+ACCESS_FLUSH_SIZE = 256
+ACCESS_FLUSH_SECONDS = 30.0
+
+
+class EmbeddingCache:
+    """SQLite-backed embedding cache keyed by (model, sha256(text))"""
+
+    def __init__(self, db_path: str, max_entries: int = 200000):
+        self.db_path = db_path
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                dim INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings (last_access)")
+        self._conn.commit()
+
+        # Upper bound on the row count (replaced rows are counted twice), recounted only when it passes max_entries
+        self._entries = self._count()
+        self._pending_access = {}
+        self._last_flush = time.time()
+
+        print(f"[EMBEDDING_CACHE] Using {db_path} (max_entries={max_entries}, entries={self._entries})")
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def _flush_access(self, commit: bool = True):
+        """Write buffered last_access times (caller holds the lock)"""
+        if self._pending_access:
+            self._conn.executemany(
+                "UPDATE embeddings SET last_access = ? WHERE model = ? AND text_hash = ?",
+                [(accessed, model, text_hash) for (model, text_hash), accessed in self._pending_access.items()],
+            )
+            self._pending_access.clear()
+            if commit:
+                self._conn.commit()
+        self._last_flush = time.time()
+
+    def flush(self):
+        """Persist buffered access times now"""
+        with self._lock:
+            self._flush_access()
+
+    def get_many(self, model: str, texts: List[str]) -> Dict[str, List[float]]:
+        """Return cached vectors keyed by text hash for the texts that are present"""
+        hashes = list({self.text_hash(text) for text in texts})
+        found = {}
+
+        with self._lock:
+            for start in range(0, len(hashes), 500):
+                batch = hashes[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *batch],
+                ).fetchall()
+                for text_hash, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[text_hash] = vector.tolist()
+
+            if found:
+                now = time.time()
+                for text_hash in found:
+                    self._pending_access[(model, text_hash)] = now
+                if len(self._pending_access) >= ACCESS_FLUSH_SIZE or now - self._last_flush >= ACCESS_FLUSH_SECONDS:
+                    self._flush_access()
+
+            for text in texts:
+                if self.text_hash(text) in found:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+
+        return found
+
+    def put_many(self, model: str, texts: List[str], vectors: List[List[float]]):
+        """Store vectors for texts and evict least recently used entries past the size bound"""
+        if not texts:
+            return
+
+        now = time.time()
+        rows = [
+            (model, self.text_hash(text), len(vector), array("f", vector).tobytes(), now)
+            for text, vector in zip(texts, vectors)
+        ]
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, dim, vector, last_access) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._entries += len(rows)
+
+            if self._entries > self.max_entries:
+                self._flush_access(commit=False)
+                self._entries = self._count()
+                overflow = self._entries - self.max_entries
+                if overflow > 0:
+                    self._conn.execute(
+                        "DELETE FROM embeddings WHERE rowid IN (SELECT rowid FROM embeddings ORDER BY last_access ASC LIMIT ?)",
+                        (overflow,),
+                    )
+                    self.evictions += overflow
+                    self._entries = self.max_entries
+
+            self._conn.commit()
+
+    def clear(self):
+        """Remove every cached embedding"""
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self._pending_access.clear()
+            self._entries = 0
+
+    def get_stats(self) -> dict:
+        """Get hit-rate and size statistics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": self._entries,
+                "max_entries": self.max_entries,
+                "evictions": self.evictions,
+                "db_path": self.db_path,
+            }
@@ -0,0 +1,203 @@
+"""
+HTTP Pool Module - One keep-alive connection pool shared by every LiteLLM call in the process
+"""
+
+import asyncio
+import threading
+import weakref
+
+import httpx
+import litellm
+from litellm.llms.custom_httpx.http_handler import AsyncHTTPHandler, HTTPHandler
+
+from config.constant_config import Config
+
+
+class HttpClientRegistry:
+    """Lazily built sync and async httpx clients with tuned pool limits and timeouts
+
+    Installed as litellm.client_session / aclient_session, so the OpenAI and
+    Azure SDK clients litellm builds for chat, embedding and agent calls all
+    reuse the same connections instead of repeating TLS handshakes. An async
+    client only works on the event loop it was created in, so one is kept per
+    loop and install() from inside a loop points aclient_session at that
+    loop's client. A client rebuilt after being closed is installed again.
+    Gemini goes through litellm's own HTTP handler instead of those sessions,
+    so provider_client() wraps the pool for it.
+    """
+
+    def __init__(self, max_connections: int = 100, max_keepalive: int = 20, keepalive_expiry: float = 60.0,
+                 timeout: float = 60.0, connect_timeout: float = 10.0):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self._client = None
+        self._async_clients = weakref.WeakKeyDictionary()  # event loop -> httpx.AsyncClient
+        self._async_handlers = weakref.WeakKeyDictionary()  # event loop -> litellm AsyncHTTPHandler
+        self._installed = False
+        self._lock = threading.Lock()
+        self._requests = {"sync": 0, "async": 0}
+
+    def _count(self, kind: str):
+        with self._lock:
+            self._requests[kind] += 1
+
+    @staticmethod
+    def _flush_sdk_clients():
+        """Drop litellm's cached SDK clients so none keeps wrapping a closed session"""
+        cache = getattr(litellm, "in_memory_llm_clients_cache", None)
+        if cache is not None:
+            cache.flush_cache()
+
+    @property
+    def client(self) -> httpx.Client:
+        with self._lock:
+            if self._client is None or self._client.is_closed:
+                rebuilt = self._client is not None
+                self._client = httpx.Client(
+                    limits=self.limits,
+                    timeout=self.timeout,
+                    follow_redirects=True,
+                    event_hooks={"request": [lambda request: self._count("sync")]},
+                )
+                if self._installed:
+                    litellm.client_session = self._client
+                    if rebuilt:
+                        self._flush_sdk_clients()
+            return self._client
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        """The running event loop's client, created on first use in that loop"""
+        loop = asyncio.get_running_loop()
+
+        async def on_request(request):
+            self._count("async")
+
+        with self._lock:
+            client = self._async_clients.get(loop)
+            if client is None or client.is_closed:
+                installed = client is not None and litellm.aclient_session is client
+                client = self._async_clients[loop] = httpx.AsyncClient(
+                    limits=self.limits,
+                    timeout=self.timeout,
+                    follow_redirects=True,
+                    event_hooks={"request": [on_request]},
+                )
+                if installed:
+                    litellm.aclient_session = client
+                    self._flush_sdk_clients()
+            return client
+
+    def install(self):
+        """Make litellm route OpenAI/Azure traffic through the shared clients
+
+        Called from inside an event loop it also installs that loop's async
+        client; async callers call it before each request so litellm's
+        per-loop SDK clients are built around the right loop's pool.
+        """
+        self._installed = True
+        litellm.client_session = self.client
+        litellm.request_timeout = self.timeout.read
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        client = self.async_client
+        if litellm.aclient_session is not client:
+            litellm.aclient_session = client
+
+    def provider_client(self, model: str, is_async: bool = False):
+        """A litellm HTTP handler over the pool for providers that ignore the installed sessions, else None"""
+        if not model.startswith("gemini/"):
+            return None
+        if not is_async:
+            return HTTPHandler(timeout=self.timeout, client=self.client)
+        loop = asyncio.get_running_loop()
+        client = self.async_client
+        with self._lock:
+            handler = self._async_handlers.get(loop)
+            if handler is None:
+                handler = self._async_handlers[loop] = AsyncHTTPHandler(timeout=self.timeout)
+            if handler.client is not client:
+                handler.client = client
+            return handler
+
+    @staticmethod
+    def _pool_stats(client) -> dict:
+        """Connection counts read from httpcore's pool; empty when the transport does not expose one"""
+        pool = getattr(getattr(client, "_transport", None), "_pool", None)
+        if pool is None:
+            return {}
+        connections = list(getattr(pool, "connections", []))
+        idle = sum(1 for conn in connections if conn.is_idle())
+        return {
+            "open_connections": len(connections),
+            "idle_connections": idle,
+            "active_connections": len(connections) - idle,
+            "queued_requests": sum(1 for request in list(getattr(pool, "_requests", [])) if request.is_queued()),
+        }
+
+    def get_stats(self) -> dict:
+        """Pool limits, request counts and current connection usage per client"""
+        with self._lock:
+            requests = dict(self._requests)
+            clients = {"sync": [self._client], "async": list(self._async_clients.values())}
+        stats = {
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "keepalive_expiry": self.limits.keepalive_expiry,
+            "event_loops": len(clients["async"]),
+        }
+        for kind, kind_clients in clients.items():
+            pool = {}
+            for client in kind_clients:
+                if client is None or client.is_closed:
+                    continue
+                for key, value in self._pool_stats(client).items():
+                    pool[key] = pool.get(key, 0) + value
+            if pool and self.limits.max_connections:
+                # Each client has its own pool, so utilization is against the combined limit
+                capacity = self.limits.max_connections * len(kind_clients)
+                pool["utilization"] = round(pool["active_connections"] / capacity, 4)
+            stats[kind] = {"requests": requests[kind], **pool}
+        return stats
+
+    def close(self):
+        """Close the sync client; the async one is closed by aclose"""
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+
+    async def aclose(self):
+        """Close the sync client and the running loop's async client"""
+        self.close()
+        with self._lock:
+            client = self._async_clients.get(asyncio.get_running_loop())
+        if client is not None:
+            await client.aclose()
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_http_registry() -> HttpClientRegistry:
+    """Process-wide registry, installed into litellm on first use"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = HttpClientRegistry(
+                max_connections=Config.LLM_HTTP_MAX_CONNECTIONS,
+                max_keepalive=Config.LLM_HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=Config.LLM_HTTP_KEEPALIVE_EXPIRY,
+                timeout=Config.LLM_HTTP_TIMEOUT,
+                connect_timeout=Config.LLM_HTTP_CONNECT_TIMEOUT,
+            )
+            _registry.install()
+            print(f"[HTTP_POOL] Shared LLM connection pool: max {Config.LLM_HTTP_MAX_CONNECTIONS} connections, "
+                  f"{Config.LLM_HTTP_MAX_KEEPALIVE} keep-alive")
+        return _registry
@@ -1,6 +1,7 @@
 import litellm
 from typing import List, Dict
 from .base import BaseLLM
+from .resilience import acall_with_retry, provider_of
 
 
 class LiteLLMClient(BaseLLM):
@@ -9,17 +10,25 @@ class LiteLLMClient(BaseLLM):
         self.embedding_model_name = embedding_model
     
     async def generate(self, messages: List[Dict], **kwargs) -> str:
-        response = await litellm.acompletion(
-            model=self.model,
-            messages=messages,
-            temperature=kwargs.get("temperature", 0.3),
-            max_tokens=kwargs.get("max_tokens", 500)
+        response = await acall_with_retry(
+            lambda: litellm.acompletion(
+                model=self.model,
+                messages=messages,
+                temperature=kwargs.get("temperature", 0.3),
+                max_tokens=kwargs.get("max_tokens", 500),
+                max_retries=0
+            ),
+            provider=provider_of(self.model),
         )
         return response.choices[0].message.content
     
     async def embed(self, text: str) -> List[float]:
-        response = await litellm.aembedding(
-            model=self.embedding_model_name,
-            input=[text]
+        response = await acall_with_retry(
+            lambda: litellm.aembedding(
+                model=self.embedding_model_name,
+                input=[text],
+                max_retries=0
+            ),
+            provider=provider_of(self.embedding_model_name),
         )
         return response.data[0].embedding
\ No newline at end of file
@@ -0,0 +1,255 @@
+"""
+Resilience Module - Retries with backoff and jitter plus per-provider circuit breakers for LLM calls
+"""
+
+import asyncio
+import random
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Optional
+
+from config.constant_config import Config
+
+
+RATE_LIMIT = "rate_limit"
+TRANSIENT = "transient"
+FATAL = "fatal"
+
+TRANSIENT_STATUS_CODES = {408, 409, 500, 502, 503, 504}
+TRANSIENT_ERROR_NAMES = {"Timeout", "APIConnectionError", "ServiceUnavailableError", "InternalServerError",
+                         "BadGatewayError", "APITimeoutError"}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the provider while its circuit is open"""
+
+    def __init__(self, provider: str, retry_in: float):
+        super().__init__(f"Circuit for '{provider}' is open, retry in {retry_in:.1f}s")
+        self.provider = provider
+        self.retry_in = retry_in
+
+
+def classify_error(error: Exception) -> str:
+    """rate_limit (429), transient (5xx, timeouts, connection errors) or fatal (everything else)"""
+    status_code = getattr(error, "status_code", None)
+    if status_code == 429 or type(error).__name__ == "RateLimitError":
+        return RATE_LIMIT
+    if isinstance(error, CircuitOpenError):
+        return FATAL
+    if status_code in TRANSIENT_STATUS_CODES or (isinstance(status_code, int) and status_code >= 500):
+        return TRANSIENT
+    if isinstance(error, (TimeoutError, ConnectionError, asyncio.TimeoutError)):
+        return TRANSIENT
+    if any(cls.__name__ in TRANSIENT_ERROR_NAMES for cls in type(error).__mro__):
+        return TRANSIENT
+    return FATAL
+
+
+def provider_of(model: str) -> str:
+    """Provider prefix of a litellm model string, e.g. azure/gpt-4o -> azure"""
+    return model.split("/", 1)[0] if "/" in model else "openai"
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds from a Retry-After header on a rate limit error, if the provider sent one"""
+    headers = getattr(error, "litellm_response_headers", None) or \
+        getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after") or headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter; rate limits wait at least the provider's Retry-After"""
+
+    def __init__(self, max_retries: int = 3, base_delay: float = 0.5, max_delay: float = 20.0):
+        self.max_retries = max(0, max_retries)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int, error: Exception) -> float:
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if classify_error(error) == RATE_LIMIT:
+            retry_after = _retry_after(error)
+            if retry_after is not None:
+                delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+
+class CircuitBreaker:
+    """Opens after failure_threshold consecutive retryable failures, lets one probe through after recovery_seconds"""
+
+    def __init__(self, provider: str, failure_threshold: int = 5, recovery_seconds: float = 30.0):
+        self.provider = provider
+        self.failure_threshold = max(1, failure_threshold)
+        self.recovery_seconds = recovery_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raise CircuitOpenError while open; in half-open state only one caller probes"""
+        with self._lock:
+            if self.state == "closed":
+                return
+            retry_in = self.opened_at + self.recovery_seconds - time.monotonic()
+            if self.state == "open" and retry_in > 0:
+                raise CircuitOpenError(self.provider, retry_in)
+            if self._probing:
+                raise CircuitOpenError(self.provider, max(retry_in, 0.0))
+            self.state = "half_open"
+            self._probing = True
+
+    def record_success(self):
+        with self._lock:
+            if self.state != "closed":
+                print(f"[RESILIENCE] Circuit for '{self.provider}' closed")
+            self.state = "closed"
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self) -> bool:
+        """Count a retryable failure, returns True when this failure opened the circuit"""
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == "half_open" or (self.state == "closed" and self.failures >= self.failure_threshold):
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                print(f"[RESILIENCE] Circuit for '{self.provider}' opened after {self.failures} failures")
+                return True
+            return False
+
+    def release_probe(self):
+        """Give up a half-open probe that ended in a non-retryable error"""
+        with self._lock:
+            self._probing = False
+
+
+class ResilienceMetrics:
+    """Per-provider counters for calls, retries, failures and fail-fast rejections"""
+
+    FIELDS = ("calls", "successes", "retries", "rate_limited", "transient_errors", "fatal_errors",
+              "exhausted", "short_circuited", "circuit_opened")
+
+    def __init__(self):
+        self._counters = defaultdict(lambda: dict.fromkeys(self.FIELDS, 0))
+        self._lock = threading.Lock()
+
+    def incr(self, provider: str, field: str):
+        with self._lock:
+            self._counters[provider][field] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {provider: dict(counters) for provider, counters in self._counters.items()}
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+metrics = ResilienceMetrics()
+
+
+def default_policy() -> RetryPolicy:
+    return RetryPolicy(Config.LLM_MAX_RETRIES, Config.LLM_RETRY_BASE_DELAY, Config.LLM_RETRY_MAX_DELAY)
+
+
+def get_breaker(provider: str) -> CircuitBreaker:
+    """Process-wide circuit breaker for a provider"""
+    with _breakers_lock:
+        if provider not in _breakers:
+            _breakers[provider] = CircuitBreaker(
+                provider, Config.LLM_CIRCUIT_FAILURE_THRESHOLD, Config.LLM_CIRCUIT_RECOVERY_SECONDS
+            )
+        return _breakers[provider]
+
+
+def get_resilience_stats() -> dict:
+    """Counters and circuit state per provider"""
+    stats = metrics.snapshot()
+    with _breakers_lock:
+        breakers = dict(_breakers)
+    for provider, breaker in breakers.items():
+        stats.setdefault(provider, dict.fromkeys(ResilienceMetrics.FIELDS, 0))
+        stats[provider]["circuit_state"] = breaker.state
+        stats[provider]["consecutive_failures"] = breaker.failures
+    return stats
+
+
+def _on_error(provider: str, breaker: CircuitBreaker, error: Exception, attempt: int,
+              policy: RetryPolicy) -> Optional[float]:
+    """Record a failed attempt, returns the backoff delay or None when the error should be raised"""
+    kind = classify_error(error)
+    if isinstance(error, CircuitOpenError):
+        metrics.incr(provider, "short_circuited")
+        return None
+    if kind == FATAL:
+        metrics.incr(provider, "fatal_errors")
+        breaker.release_probe()
+        return None
+
+    metrics.incr(provider, "rate_limited" if kind == RATE_LIMIT else "transient_errors")
+    if breaker.record_failure():
+        metrics.incr(provider, "circuit_opened")
+        return None
+    if attempt >= policy.max_retries:
+        metrics.incr(provider, "exhausted")
+        return None
+
+    delay = policy.delay(attempt, error)
+    metrics.incr(provider, "retries")
+    print(f"[RESILIENCE] {provider} {kind} error ({error}), retry {attempt + 1}/{policy.max_retries} in {delay:.2f}s")
+    return delay
+
+
+def call_with_retry(fn: Callable[[], Any], provider: str, policy: RetryPolicy = None) -> Any:
+    """Call fn with retries and the provider's circuit breaker (blocking sleep, for sync callers)"""
+    policy = policy or default_policy()
+    breaker = get_breaker(provider)
+    metrics.incr(provider, "calls")
+    attempt = 0
+    while True:
+        try:
+            breaker.before_call()
+            result = fn()
+        except Exception as e:
+            delay = _on_error(provider, breaker, e, attempt, policy)
+            if delay is None:
+                raise
+            time.sleep(delay)
+            attempt += 1
+            continue
+        breaker.record_success()
+        metrics.incr(provider, "successes")
+        return result
+
+
+async def acall_with_retry(fn: Callable[[], Awaitable[Any]], provider: str, policy: RetryPolicy = None) -> Any:
+    """Await fn() with retries and the provider's circuit breaker, backing off without blocking the event loop"""
+    policy = policy or default_policy()
+    breaker = get_breaker(provider)
+    metrics.incr(provider, "calls")
+    attempt = 0
+    while True:
+        try:
+            breaker.before_call()
+            result = await fn()
+        except asyncio.CancelledError:
+            breaker.release_probe()
+            raise
+        except Exception as e:
+            delay = _on_error(provider, breaker, e, attempt, policy)
+            if delay is None:
+                raise
+            await asyncio.sleep(delay)
+            attempt += 1
+            continue
+        breaker.record_success()
+        metrics.incr(provider, "successes")
+        return result
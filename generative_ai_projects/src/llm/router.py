@@ -0,0 +1,395 @@
+"""
+Router Module - Latency-aware routing, hedging and fallback across LLM deployments
+"""
+
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+import litellm
+
+from config.constant_config import Config
+from src.llm.http_pool import get_http_registry
+from src.llm.resilience import (
+    FATAL, CircuitOpenError, RetryPolicy, acall_with_retry, call_with_retry, classify_error, default_policy,
+    get_breaker,
+)
+
+
+MIN_SAMPLES = 5
+DEPLOYMENT_KEYS = ("name", "model")
+
+
+class Deployment:
+    """One routable model with a rolling window of latencies and outcomes"""
+
+    def __init__(self, name: str, model: str, params: Dict = None, window: int = 100, window_seconds: float = 300):
+        self.name = name
+        self.model = model
+        self.params = params or {}
+        self.window_seconds = window_seconds
+        self._samples = deque(maxlen=max(MIN_SAMPLES, window))
+        self._lock = threading.Lock()
+
+    def request_args(self, messages: List[Dict], kwargs: Dict) -> Dict:
+        """LiteLLM arguments for this deployment; retries are left to the resilience layer"""
+        return {"model": self.model, "messages": messages, **self.params, "max_retries": 0, **kwargs}
+
+    def record(self, latency: Optional[float], ok: bool):
+        with self._lock:
+            self._samples.append((time.monotonic(), latency, ok))
+
+    def _recent(self) -> list:
+        cutoff = time.monotonic() - self.window_seconds
+        with self._lock:
+            while self._samples and self._samples[0][0] < cutoff:
+                self._samples.popleft()
+            return list(self._samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Latency percentile in seconds over successful calls, None until MIN_SAMPLES are in the window"""
+        latencies = sorted(latency for _, latency, ok in self._recent() if ok and latency is not None)
+        if len(latencies) < MIN_SAMPLES:
+            return None
+        return latencies[max(0, math.ceil(q * len(latencies)) - 1)]
+
+    def explored(self) -> bool:
+        """Whether the window holds enough calls (completions or streams) to judge the deployment"""
+        return len(self._recent()) >= MIN_SAMPLES
+
+    def error_rate(self) -> float:
+        samples = self._recent()
+        if len(samples) < MIN_SAMPLES:
+            return 0.0
+        return sum(1 for _, _, ok in samples if not ok) / len(samples)
+
+    def healthy(self, max_error_rate: float) -> bool:
+        return get_breaker(self.name).state != "open" and self.error_rate() <= max_error_rate
+
+    def get_stats(self, max_error_rate: float) -> dict:
+        p50, p95 = self.percentile(0.5), self.percentile(0.95)
+        return {
+            "model": self.model,
+            "samples": len(self._recent()),
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "error_rate": round(self.error_rate(), 4),
+            "healthy": self.healthy(max_error_rate),
+            "circuit_state": get_breaker(self.name).state,
+        }
+
+
+def _is_request_error(error: Exception) -> bool:
+    """400-style errors are caused by the request, not the deployment, so they do not count against its health"""
+    return classify_error(error) == FATAL and getattr(error, "status_code", None) in (400, 413, 422)
+
+
+def _record_failure(deployment: Deployment, error: Exception):
+    """Failed call sample; fail-fast rejections are left to the circuit breaker"""
+    if not isinstance(error, CircuitOpenError):
+        deployment.record(None, _is_request_error(error))
+
+
+class LLMRouter:
+    """Routes each completion to the fastest healthy deployment
+
+    Deployments are ranked by rolling p95 latency, unhealthy ones go last. A
+    deployment with fewer than MIN_SAMPLES calls in the window is tried first
+    until it has them, so a fresh or recovered deployment gets measured instead
+    of starving behind the ones that already are. A request still running
+    after the hedge delay is duplicated to the next deployment and the first
+    answer wins. Failed calls fall through to the next deployment. The
+    completion functions are injectable so the router can run against a fake provider.
+    http_clients (the shared HttpClientRegistry) supplies pooled clients per call.
+    """
+
+    def __init__(self, deployments: List[Deployment], completion_fn: Callable = None, acompletion_fn: Callable = None,
+                 hedging: bool = False, hedge_after_seconds: float = 0.0, max_error_rate: float = 0.5,
+                 http_clients=None):
+        if not deployments:
+            raise ValueError("LLMRouter needs at least one deployment")
+        self.deployments = deployments
+        self.completion_fn = completion_fn or litellm.completion
+        self.acompletion_fn = acompletion_fn or litellm.acompletion
+        self.hedging = hedging and len(deployments) > 1
+        self.hedge_after_seconds = hedge_after_seconds
+        self.max_error_rate = max_error_rate
+        self.http_clients = http_clients
+        # With somewhere to fall back to, a failing deployment is left at once instead of backing off on it
+        self.retry_policy = RetryPolicy(0) if len(deployments) > 1 else default_policy()
+        self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm-router") if self.hedging else None
+
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.fallbacks = 0
+
+    def rank(self) -> List[Deployment]:
+        """Healthy before unhealthy, then unexplored, then by p95 latency, then config order"""
+        keyed = []
+        for position, deployment in enumerate(self.deployments):
+            p95 = deployment.percentile(0.95)
+            if p95 is None:
+                # Stream-only traffic records no latency, so only deployments short of samples are explored
+                p95 = math.inf if deployment.explored() else 0.0
+            keyed.append(((not deployment.healthy(self.max_error_rate), p95, position), deployment))
+        return [deployment for _, deployment in sorted(keyed, key=lambda item: item[0])]
+
+    def _hedge_delay(self, deployment: Deployment) -> Optional[float]:
+        if self.hedge_after_seconds > 0:
+            return self.hedge_after_seconds
+        return deployment.percentile(0.95)
+
+    def _request_args(self, deployment: Deployment, messages: List[Dict], kwargs: Dict, is_async: bool = False) -> Dict:
+        """Deployment arguments plus the pooled client for providers that bypass litellm's sessions"""
+        args = deployment.request_args(messages, kwargs)
+        if self.http_clients is not None:
+            if is_async:
+                self.http_clients.install()
+            client = self.http_clients.provider_client(deployment.model, is_async)
+            if client is not None:
+                args.setdefault("client", client)
+        return args
+
+    def _call(self, deployment: Deployment, messages: List[Dict], kwargs: Dict):
+        started = time.perf_counter()
+        try:
+            response = call_with_retry(
+                lambda: self.completion_fn(**self._request_args(deployment, messages, kwargs)),
+                provider=deployment.name,
+                policy=self.retry_policy,
+            )
+        except Exception as e:
+            _record_failure(deployment, e)
+            raise
+        deployment.record(time.perf_counter() - started, True)
+        return response
+
+    async def _acall(self, deployment: Deployment, messages: List[Dict], kwargs: Dict):
+        started = time.perf_counter()
+        try:
+            response = await acall_with_retry(
+                lambda: self.acompletion_fn(**self._request_args(deployment, messages, kwargs, is_async=True)),
+                provider=deployment.name,
+                policy=self.retry_policy,
+            )
+        except Exception as e:
+            _record_failure(deployment, e)
+            raise
+        deployment.record(time.perf_counter() - started, True)
+        return response
+
+    def _on_failure(self, deployment: Deployment, error: Exception, remaining: int):
+        if _is_request_error(error):
+            raise error
+        if remaining:
+            self.fallbacks += 1
+            print(f"[LLM_ROUTER] {deployment.name} failed ({error}), falling back")
+
+    def complete(self, messages: List[Dict], **kwargs):
+        """Blocking completion with hedging and fallback"""
+        candidates = self.rank()
+        if not self.hedging:
+            last_error = None
+            for position, deployment in enumerate(candidates):
+                try:
+                    return self._call(deployment, messages, kwargs)
+                except Exception as e:
+                    self._on_failure(deployment, e, len(candidates) - position - 1)
+                    last_error = e
+            raise last_error
+
+        running = {}
+        hedged = False
+        last_error = None
+        while candidates or running:
+            if not running:
+                deployment = candidates.pop(0)
+                running[self._executor.submit(self._call, deployment, messages, kwargs)] = (deployment, False)
+            timeout = None
+            if candidates and not hedged:
+                timeout = self._hedge_delay(next(iter(running.values()))[0])
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                hedged = True
+                self.hedges += 1
+                deployment = candidates.pop(0)
+                print(f"[LLM_ROUTER] Hedging to {deployment.name} after {timeout:.2f}s")
+                running[self._executor.submit(self._call, deployment, messages, kwargs)] = (deployment, True)
+                continue
+            for future in done:
+                deployment, is_hedge = running.pop(future)
+                try:
+                    response = future.result()
+                except Exception as e:
+                    self._on_failure(deployment, e, len(candidates) + len(running))
+                    last_error = e
+                    continue
+                if is_hedge:
+                    self.hedge_wins += 1
+                return response
+        raise last_error
+
+    async def acomplete(self, messages: List[Dict], **kwargs):
+        """Async completion with hedging and fallback; a losing hedge is cancelled"""
+        candidates = self.rank()
+        running = {}
+        hedged = False
+        last_error = None
+        try:
+            while candidates or running:
+                if not running:
+                    deployment = candidates.pop(0)
+                    running[asyncio.ensure_future(self._acall(deployment, messages, kwargs))] = (deployment, False)
+                timeout = None
+                if self.hedging and candidates and not hedged:
+                    timeout = self._hedge_delay(next(iter(running.values()))[0])
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedged = True
+                    self.hedges += 1
+                    deployment = candidates.pop(0)
+                    print(f"[LLM_ROUTER] Hedging to {deployment.name} after {timeout:.2f}s")
+                    running[asyncio.ensure_future(self._acall(deployment, messages, kwargs))] = (deployment, True)
+                    continue
+                for task in done:
+                    deployment, is_hedge = running.pop(task)
+                    try:
+                        response = task.result()
+                    except Exception as e:
+                        self._on_failure(deployment, e, len(candidates) + len(running))
+                        last_error = e
+                        continue
+                    if is_hedge:
+                        self.hedge_wins += 1
+                    return response
+            raise last_error
+        finally:
+            for task in running:
+                task.cancel()
+
+    def stream(self, messages: List[Dict], **kwargs) -> Iterator[Any]:
+        """Blocking stream; falls back only until the first chunk has been received
+
+        Streams record outcomes only, so time-to-first-chunk does not skew the completion latency window.
+        """
+        candidates = self.rank()
+        last_error = None
+        for position, deployment in enumerate(candidates):
+            try:
+                response = call_with_retry(
+                    lambda: self.completion_fn(**self._request_args(deployment, messages, {**kwargs, "stream": True})),
+                    provider=deployment.name,
+                    policy=self.retry_policy,
+                )
+                iterator = iter(response)
+                first = next(iterator, None)
+            except Exception as e:
+                _record_failure(deployment, e)
+                self._on_failure(deployment, e, len(candidates) - position - 1)
+                last_error = e
+                continue
+            deployment.record(None, True)
+            if first is not None:
+                yield first
+            yield from iterator
+            return
+        raise last_error
+
+    async def astream(self, messages: List[Dict], **kwargs) -> AsyncIterator[Any]:
+        """Async stream; falls back only until the first chunk has been received"""
+        candidates = self.rank()
+        last_error = None
+        for position, deployment in enumerate(candidates):
+            try:
+                response = await acall_with_retry(
+                    lambda: self.acompletion_fn(**self._request_args(deployment, messages, {**kwargs, "stream": True},
+                                                                     is_async=True)),
+                    provider=deployment.name,
+                    policy=self.retry_policy,
+                )
+                iterator = response.__aiter__()
+                try:
+                    first = await iterator.__anext__()
+                except StopAsyncIteration:
+                    first = None
+            except Exception as e:
+                _record_failure(deployment, e)
+                self._on_failure(deployment, e, len(candidates) - position - 1)
+                last_error = e
+                continue
+            deployment.record(None, True)
+            if first is None:
+                return
+            yield first
+            async for chunk in iterator:
+                yield chunk
+            return
+        raise last_error
+
+    def get_stats(self) -> dict:
+        """Per-deployment latency/health plus hedge and fallback counters"""
+        return {
+            "deployments": {d.name: d.get_stats(self.max_error_rate) for d in self.deployments},
+            "ranking": [d.name for d in self.rank()],
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "fallbacks": self.fallbacks,
+        }
+
+
+def deployments_from_config() -> List[Deployment]:
+    """LLM_DEPLOYMENTS if set, else the Azure chat deployment followed by the agent's LLM_MODEL"""
+    specs = Config.LLM_DEPLOYMENTS
+    if not specs:
+        specs = []
+        if Config.AZURE_DEPLOYMENT:
+            specs.append({
+                "model": f"azure/{Config.AZURE_DEPLOYMENT}",
+                "api_key": Config.AZURE_API_KEY,
+                "api_base": Config.AZURE_ENDPOINT,
+                "api_version": Config.AZURE_API_VERSION,
+            })
+        if os.getenv("LLM_MODEL") or os.getenv("GOOGLE_API_KEY") or not specs:
+            specs.append({"model": os.getenv("LLM_MODEL", "gemini/gemini-2.5-flash")})
+
+    deployments = []
+    for spec in specs:
+        params = {key: value for key, value in spec.items() if key not in DEPLOYMENT_KEYS}
+        deployments.append(Deployment(
+            name=spec.get("name") or spec["model"],
+            model=spec["model"],
+            params=params,
+            window=Config.LLM_ROUTER_WINDOW,
+            window_seconds=Config.LLM_ROUTER_WINDOW_SECONDS,
+        ))
+    return deployments
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_llm_router() -> LLMRouter:
+    """Process-wide router shared by the RAG chat model and the ticket agent"""
+    global _router
+    with _router_lock:
+        if _router is None:
+            http_clients = get_http_registry()
+            if os.getenv("GOOGLE_API_KEY"):
+                os.environ.setdefault("GEMINI_API_KEY", os.getenv("GOOGLE_API_KEY"))
+            # Hedging duplicates slow prompts, so it never applies to the implicit Azure + Gemini fallback pair
+            _router = LLMRouter(
+                deployments_from_config(),
+                hedging=Config.LLM_HEDGING and bool(Config.LLM_DEPLOYMENTS),
+                hedge_after_seconds=Config.LLM_HEDGE_AFTER_SECONDS,
+                max_error_rate=Config.LLM_ROUTER_MAX_ERROR_RATE,
+                http_clients=http_clients,
+            )
+            print(f"[LLM_ROUTER] Deployments: {', '.join(d.name for d in _router.deployments)} "
+                  f"(hedging {'on' if _router.hedging else 'off'})")
+        return _router
@@ -1,16 +1,21 @@
 from functools import wraps
-import time
+import asyncio
+
+from src.llm.resilience import RetryPolicy, acall_with_retry, call_with_retry
+
+def retry_on_failure(max_retries=3, delay=1, provider="default"):
+    """Retry retryable errors with jittered exponential backoff; async functions back off with asyncio.sleep"""
+    policy = RetryPolicy(max_retries=max_retries - 1, base_delay=delay)
 
-def retry_on_failure(max_retries=3, delay=1):
     def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                return await acall_with_retry(lambda: func(*args, **kwargs), provider, policy)
+            return async_wrapper
+
         @wraps(func)
-        async def wrapper(*args, **kwargs):
-            for attempt in range(max_retries):
-                try:
-                    return await func(*args, **kwargs)
-                except Exception as e:
-                    if attempt == max_retries - 1:
-                        raise e
-                    time.sleep(delay * (attempt + 1))
+        def wrapper(*args, **kwargs):
+            return call_with_retry(lambda: func(*args, **kwargs), provider, policy)
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
@@ -4,15 +4,28 @@ RAG Module - Complete RAG Pipeline
 
 from .chunker import DocumentChunker
 from .embeddings import EmbeddingManager
-from .vector_store import MilvusStore
+from .vector_store import VectorStore, MilvusStore
+from .local_vector_store import LocalVectorStore
 from .retriever import KnowledgeRetriever
+from .semantic_cache import SemanticResponseCache
+from .conversation_memory import ConversationMemoryStore
+from .sparse_index import BM25Index
+from .kb_manifest import KnowledgeBaseManifest
+from .dedup import ChunkDeduplicator
 from .rag_core import FacilitiesRAGSystem
 
 __all__ = [
     "DocumentChunker",
     "EmbeddingManager",
+    "VectorStore",
     "MilvusStore",
+    "LocalVectorStore",
     "KnowledgeRetriever",
+    "SemanticResponseCache",
+    "ConversationMemoryStore",
+    "BM25Index",
+    "KnowledgeBaseManifest",
+    "ChunkDeduplicator",
     "FacilitiesRAGSystem",
     
 ]
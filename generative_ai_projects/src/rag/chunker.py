@@ -2,30 +2,58 @@
 Document Chunking Module
 """
 
+from functools import partial
 from typing import List
 from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+from src.utils.token_counter import DEFAULT_ENCODING, count_tokens, count_tokens_batch
+
 
 class DocumentChunker:
-    """Handles document chunking"""
-    
-    def __init__(self, chunk_size: int = 500, chunk_overlap: int = 50):
+    """Handles document chunking
+
+    mode="char" measures chunk_size/chunk_overlap in characters, mode="token" in tiktoken tokens.
+    """
+
+    def __init__(self, chunk_size: int = 500, chunk_overlap: int = 50, mode: str = "char",
+                 encoding_name: str = DEFAULT_ENCODING):
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
-        
+        self.mode = mode
+        self.encoding_name = encoding_name
+
+        if mode == "token":
+            length_function = partial(count_tokens, encoding_name=encoding_name)
+        else:
+            length_function = len
+
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=self.chunk_size,
             chunk_overlap=self.chunk_overlap,
-            length_function=len,
+            length_function=length_function,
             separators=["\n\n", "\n", " ", ""]
         )
-    
+
+    def _lengths(self, texts: List[str]) -> List[int]:
+        if self.mode == "token":
+            return count_tokens_batch(texts, self.encoding_name)
+        return [len(text) for text in texts]
+
     def chunk_documents(self, documents: List[Document]) -> List[Document]:
-        """Split documents into chunks"""
+        """Split documents into chunks, grouped table rows and documents that already fit are kept whole"""
         if not documents:
             return []
-        
-        chunks = self.text_splitter.split_documents(documents)
+
+        lengths = self._lengths([doc.page_content for doc in documents])
+        chunks = []
+        for doc, length in zip(documents, lengths):
+            if doc.metadata.get("row_end", 0) > doc.metadata.get("row_start", 0):
+                chunks.append(doc)
+            elif length <= self.chunk_size:
+                text = doc.page_content.strip()
+                if text:
+                    chunks.append(Document(page_content=text, metadata=dict(doc.metadata)))
+            else:
+                chunks.extend(self.text_splitter.split_documents([doc]))
         return chunks
-    
\ No newline at end of file
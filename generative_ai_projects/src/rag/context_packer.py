@@ -0,0 +1,90 @@
+"""
+Context Packing Module - MMR reranking and token-budgeted context assembly
+"""
+
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+
+def mmr_select(query_embedding: List[float], candidates: List[Tuple[Document, Optional[List[float]]]],
+               k: int, lambda_mult: float = 0.7) -> List[Document]:
+    """Pick k candidates by maximal marginal relevance over their embeddings"""
+    if not candidates:
+        return []
+
+    vectors = np.asarray([vector for _, vector in candidates], dtype=np.float32)
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    query = np.asarray(query_embedding, dtype=np.float32)
+    query /= max(float(np.linalg.norm(query)), 1e-12)
+
+    relevance = vectors @ query
+    similarity = vectors @ vectors.T
+
+    selected = [int(np.argmax(relevance))]
+    remaining = set(range(len(candidates))) - set(selected)
+
+    while remaining and len(selected) < k:
+        best_idx, best_score = None, -np.inf
+        for idx in remaining:
+            redundancy = max(similarity[idx, chosen] for chosen in selected)
+            score = lambda_mult * relevance[idx] - (1 - lambda_mult) * redundancy
+            if score > best_score:
+                best_idx, best_score = idx, score
+        selected.append(best_idx)
+        remaining.remove(best_idx)
+
+    return [candidates[idx][0] for idx in selected]
+
+
+def _overlap(left: str, right: str, min_overlap: int, max_overlap: int) -> int:
+    """Length of the longest suffix of left that is also a prefix of right"""
+    for size in range(min(max_overlap, len(left), len(right)), min_overlap - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split()).lower()
+
+
+def pack_context(documents: List[Document], token_budget: int, count_tokens: Callable[[str], int],
+                 max_overlap: int = 200, min_overlap: int = 20) -> List[Document]:
+    """Fit ranked chunks into a token budget, dropping duplicates and trimming overlap with packed neighbours"""
+    packed = []
+    seen_texts = []
+    used_tokens = 0
+
+    for doc in documents:
+        text = doc.page_content.strip()
+        normalized = _normalize(text)
+        if not normalized or any(normalized in seen for seen in seen_texts):
+            continue
+
+        source = doc.metadata.get("title") or doc.metadata.get("source")
+        for other in packed:
+            if (other.metadata.get("title") or other.metadata.get("source")) != source:
+                continue
+            head = _overlap(other.page_content, text, min_overlap, max_overlap)
+            if head:
+                text = text[head:].lstrip()
+            tail = _overlap(text, other.page_content, min_overlap, max_overlap)
+            if tail:
+                text = text[:-tail].rstrip()
+        if not text:
+            continue
+
+        tokens = count_tokens(text)
+        if used_tokens + tokens > token_budget:
+            if packed:
+                continue
+            text = text[:token_budget * 4]
+            tokens = count_tokens(text)
+
+        packed.append(Document(page_content=text, metadata=dict(doc.metadata)))
+        seen_texts.append(normalized)
+        used_tokens += tokens
+
+    return packed
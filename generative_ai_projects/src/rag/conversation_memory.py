@@ -0,0 +1,108 @@
+"""
+Conversation Memory Module - Bounded per-conversation chat history
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, List
+
+
+class ConversationMemoryStore:
+    """Keeps the last N turns per conversation with idle eviction and a global cap"""
+
+    def __init__(self, max_turns: int = 2, idle_ttl_seconds: int = 1800,
+                 max_conversations: int = 1000, max_total_messages: int = 20000):
+        self.max_turns = max(1, max_turns)
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.max_conversations = max_conversations
+        self.max_total_messages = max_total_messages
+
+        self._conversations = OrderedDict()
+        self._total_messages = 0
+        self._lock = threading.Lock()
+
+        self.evicted_idle = 0
+        self.evicted_capacity = 0
+
+    def _drop(self, conversation_id: str):
+        entry = self._conversations.pop(conversation_id)
+        self._total_messages -= len(entry["messages"])
+
+    def _evict(self, now: float):
+        idle = [
+            conversation_id for conversation_id, entry in self._conversations.items()
+            if now - entry["last_access"] > self.idle_ttl_seconds
+        ]
+        for conversation_id in idle:
+            self._drop(conversation_id)
+        self.evicted_idle += len(idle)
+
+        while self._conversations and (
+            len(self._conversations) > self.max_conversations
+            or self._total_messages > self.max_total_messages
+        ):
+            self._drop(next(iter(self._conversations)))
+            self.evicted_capacity += 1
+
+    def get_history(self, conversation_id: str) -> List[Dict]:
+        """Get the retained turns of a conversation, oldest first"""
+        if not conversation_id:
+            return []
+
+        with self._lock:
+            entry = self._conversations.get(conversation_id)
+            if not entry:
+                return []
+            if time.time() - entry["last_access"] > self.idle_ttl_seconds:
+                self._drop(conversation_id)
+                self.evicted_idle += 1
+                return []
+            return list(entry["messages"])
+
+    def add_turn(self, conversation_id: str, user_message: str, assistant_message: str):
+        """Append a user/assistant turn, discarding the oldest turn when full"""
+        if not conversation_id:
+            return
+
+        now = time.time()
+        with self._lock:
+            entry = self._conversations.get(conversation_id)
+            if entry is None:
+                entry = {"messages": deque(maxlen=self.max_turns * 2), "last_access": now}
+                self._conversations[conversation_id] = entry
+
+            for message in (
+                {"role": "user", "content": user_message},
+                {"role": "assistant", "content": assistant_message},
+            ):
+                if len(entry["messages"]) == entry["messages"].maxlen:
+                    self._total_messages -= 1
+                entry["messages"].append(message)
+                self._total_messages += 1
+
+            entry["last_access"] = now
+            self._conversations.move_to_end(conversation_id)
+            self._evict(now)
+
+    def clear(self, conversation_id: str = None):
+        """Forget one conversation, or every conversation when no id is given"""
+        with self._lock:
+            if conversation_id is None:
+                self._conversations.clear()
+                self._total_messages = 0
+            elif conversation_id in self._conversations:
+                self._drop(conversation_id)
+
+    def get_stats(self) -> dict:
+        """Get memory usage statistics"""
+        with self._lock:
+            return {
+                "conversations": len(self._conversations),
+                "total_messages": self._total_messages,
+                "max_turns": self.max_turns,
+                "max_conversations": self.max_conversations,
+                "max_total_messages": self.max_total_messages,
+                "evicted_idle": self.evicted_idle,
+                "evicted_capacity": self.evicted_capacity,
+            }
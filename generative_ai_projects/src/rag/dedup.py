@@ -0,0 +1,219 @@
+"""
+Dedup Module - Drop exact and near-duplicate chunks before they are embedded
+"""
+
+import hashlib
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Iterable, List, Optional
+
+from langchain_core.documents import Document
+
+from src.rag.sparse_index import document_key
+
+
+WORD_PATTERN = re.compile(r"\w+")
+MAX_DUPLICATE_SOURCES = 20
+MIN_NEAR_DUPLICATE_WORDS = 20
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase words only, so whitespace and punctuation changes do not defeat matching"""
+    return " ".join(WORD_PATTERN.findall(text.lower()))
+
+
+def simhash(text: str, shingle_size: int = 3) -> int:
+    """64-bit SimHash over word shingles"""
+    words = text.split()
+    if len(words) > shingle_size:
+        shingles = Counter(" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1))
+    else:
+        shingles = Counter([" ".join(words)])
+
+    weights = [0] * 64
+    for shingle, count in shingles.items():
+        value = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(64):
+            if value >> bit & 1:
+                weights[bit] += count
+            else:
+                weights[bit] -= count
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def remove_repeated_lines(documents: List[Document], min_ratio: float = 0.5, min_pages: int = 3) -> List[Document]:
+    """Strip header/footer lines that repeat on at least min_ratio of a PDF's pages"""
+    pages_by_title = defaultdict(list)
+    for doc in documents:
+        if doc.metadata.get("file_type") == "pdf":
+            pages_by_title[doc.metadata.get("title")].append(doc)
+
+    for pages in pages_by_title.values():
+        if len(pages) < min_pages:
+            continue
+        line_pages = Counter()
+        for doc in pages:
+            line_pages.update({line.strip() for line in doc.page_content.splitlines() if line.strip()})
+        threshold = max(min_pages, len(pages) * min_ratio)
+        repeated = {line for line, count in line_pages.items() if count >= threshold}
+        if not repeated:
+            continue
+        for doc in pages:
+            doc.page_content = "\n".join(
+                line for line in doc.page_content.splitlines() if line.strip() not in repeated
+            )
+    return documents
+
+
+class ChunkDeduplicator:
+    """SimHash index of indexed chunks used to drop exact and near-duplicates at ingest time
+
+    Near-duplicates are fingerprints within max_distance bits. The 64-bit
+    fingerprint is cut into max_distance + 1 bands, so any match shares at
+    least one band exactly and only those buckets are compared.
+    """
+
+    def __init__(self, max_distance: int = 6, shingle_size: int = 3):
+        self.max_distance = max_distance
+        self.shingle_size = shingle_size
+        self._band_count = max_distance + 1
+        self._band_bits = -(-64 // self._band_count)
+
+        self._fingerprints = {}
+        self._sources = {}
+        self._exact = defaultdict(set)
+        self._bands = defaultdict(set)
+        self._lock = threading.Lock()
+
+        self.suppressed = 0
+
+    def __len__(self):
+        return len(self._fingerprints)
+
+    def _band_keys(self, fingerprint: int):
+        mask = (1 << self._band_bits) - 1
+        return [(band, fingerprint >> (band * self._band_bits) & mask) for band in range(self._band_count)]
+
+    def _fingerprint(self, doc: Document):
+        """Exact hash plus SimHash; short texts (e.g. single table rows) get no SimHash and only match exactly"""
+        normalized = normalize_text(doc.page_content)
+        content_hash = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+        if normalized.count(" ") + 1 < MIN_NEAR_DUPLICATE_WORDS:
+            return content_hash, None
+        return content_hash, simhash(normalized, self.shingle_size)
+
+    def _match(self, content_hash: str, fingerprint: Optional[int]) -> Optional[str]:
+        exact = self._exact.get(content_hash)
+        if exact:
+            return next(iter(exact))
+        if fingerprint is None:
+            return None
+        for band_key in self._band_keys(fingerprint):
+            for key in self._bands.get(band_key, ()):
+                if bin(self._fingerprints[key][1] ^ fingerprint).count("1") <= self.max_distance:
+                    return key
+        return None
+
+    def _add(self, key: str, source: str, content_hash: str, fingerprint: Optional[int]):
+        self._fingerprints[key] = (content_hash, fingerprint)
+        self._sources[key] = source
+        self._exact[content_hash].add(key)
+        if fingerprint is None:
+            return
+        for band_key in self._band_keys(fingerprint):
+            self._bands[band_key].add(key)
+
+    def add_documents(self, documents: Iterable[Document]) -> int:
+        """Register chunks that are already indexed, returns the number added"""
+        added = 0
+        with self._lock:
+            for doc in documents:
+                key = document_key(doc)
+                if key in self._fingerprints:
+                    continue
+                self._add(key, str(doc.metadata.get("source", "")), *self._fingerprint(doc))
+                added += 1
+        return added
+
+    def remove_documents(self, documents: Iterable[Document]) -> int:
+        """Forget chunks deleted from the index, returns the number removed"""
+        removed = 0
+        with self._lock:
+            for doc in documents:
+                key = document_key(doc)
+                entry = self._fingerprints.pop(key, None)
+                if entry is None:
+                    continue
+                content_hash, fingerprint = entry
+                self._sources.pop(key, None)
+                self._exact[content_hash].discard(key)
+                if not self._exact[content_hash]:
+                    del self._exact[content_hash]
+                if fingerprint is None:
+                    removed += 1
+                    continue
+                for band_key in self._band_keys(fingerprint):
+                    self._bands[band_key].discard(key)
+                    if not self._bands[band_key]:
+                        del self._bands[band_key]
+                removed += 1
+        return removed
+
+    def clear(self):
+        """Forget every fingerprint"""
+        with self._lock:
+            self._fingerprints.clear()
+            self._sources.clear()
+            self._exact.clear()
+            self._bands.clear()
+
+    def filter_documents(self, documents: List[Document]) -> List[Document]:
+        """Keep the first copy of each chunk, checked against this batch and everything indexed
+
+        Sources of dropped copies are listed in the kept chunk's duplicate_sources
+        metadata when the kept chunk is in this batch (indexed chunks are not rewritten).
+        Kept chunks are only registered via add_documents once they are inserted.
+        """
+        batch = ChunkDeduplicator(self.max_distance, self.shingle_size)
+        kept = {}
+        unique = []
+        suppressed = 0
+
+        with self._lock:
+            for doc in documents:
+                if not doc.page_content.strip():
+                    continue
+                content_hash, fingerprint = self._fingerprint(doc)
+                source = str(doc.metadata.get("source", ""))
+
+                if self._match(content_hash, fingerprint) is not None:
+                    suppressed += 1
+                    continue
+
+                match = batch._match(content_hash, fingerprint)
+                if match is not None:
+                    suppressed += 1
+                    original = kept[match]
+                    sources = [s for s in original.metadata.get("duplicate_sources", "").split("; ") if s]
+                    if source and source != original.metadata.get("source") and source not in sources \
+                            and len(sources) < MAX_DUPLICATE_SOURCES:
+                        sources.append(source)
+                        original.metadata["duplicate_sources"] = "; ".join(sources)
+                    continue
+
+                key = document_key(doc)
+                batch._add(key, source, content_hash, fingerprint)
+                kept[key] = doc
+                unique.append(doc)
+
+            self.suppressed += suppressed
+
+        if suppressed:
+            print(f"[DEDUP] Dropped {suppressed} duplicate chunks, kept {len(unique)}")
+        return unique
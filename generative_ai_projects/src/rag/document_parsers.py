@@ -0,0 +1,367 @@
+"""
+Document Parsers Module - File to Document parsing
+
+Parsers are module-level functions so they can run in worker processes.
+"""
+
+from itertools import groupby
+from typing import Iterable, Iterator, List, Tuple
+
+import openpyxl
+import pandas as pd
+import pypdf
+from langchain_core.documents import Document
+
+
+def get_file_extension(filename: str) -> str:
+    return filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+
+
+def pdf_page_count(file_path: str) -> int:
+    return len(pypdf.PdfReader(file_path).pages)
+
+
+def extract_pdf_pages(file_path: str, start: int = 0, end: int = None) -> List[Tuple[int, str]]:
+    """Extract (page index, text) for pages [start, end) of a PDF"""
+    reader = pypdf.PdfReader(file_path)
+    end = len(reader.pages) if end is None else min(end, len(reader.pages))
+    return [(idx, reader.pages[idx].extract_text() or "") for idx in range(start, end)]
+
+
+def build_pdf_documents(pages: List[Tuple[int, str]], filename: str) -> List[Document]:
+    """Turn extracted PDF pages into Documents, rejecting image-only PDFs"""
+    if not pages:
+        print(f"[ERROR] PDF contains no pages: {filename}")
+        return []
+
+    total_text_length = sum(len(text.strip()) for _, text in pages)
+    avg_text_per_page = total_text_length / len(pages)
+
+    print(f"[PDF_PROCESSOR] Pages: {len(pages)}, Avg text/page: {avg_text_per_page:.2f} chars")
+
+    if avg_text_per_page < 50:
+        print("[ERROR] Image-based PDF detected (avg < 50 chars/page)")
+        print("[INFO] Solution: Convert to text-based PDF using OCR tools")
+        return []
+
+    processed_documents = []
+
+    for idx, text in sorted(pages):
+        content = text.strip()
+
+        if len(content) < 10:
+            continue
+
+        new_metadata = {
+            "title": filename,
+            "source": f"{filename} (Page {idx + 1})",
+            "file_type": "pdf",
+            "row_number": 0,
+            "sheet_name": "",
+            "section_number": idx + 1,
+            "page_number": idx + 1
+        }
+
+        processed_doc = Document(page_content=content, metadata=new_metadata)
+        processed_documents.append(processed_doc)
+
+    if not processed_documents:
+        print(f"[ERROR] No readable text found in {filename}")
+        return []
+
+    print(f"[PDF_PROCESSOR] Successfully processed {len(processed_documents)} pages")
+    return processed_documents
+
+
+def parse_pdf(file_path: str, filename: str) -> List[Document]:
+    """Process PDF with image detection"""
+    try:
+        print(f"[PDF_PROCESSOR] Loading PDF: {filename}")
+        return build_pdf_documents(extract_pdf_pages(file_path), filename)
+    except Exception as e:
+        print(f"[ERROR] Error processing PDF: {str(e)}")
+        return []
+
+
+class TabularGrouping:
+    """How CSV/Excel rows become documents: one per row ("row"), every N rows ("rows") or by a key column ("key")"""
+
+    def __init__(self, mode: str = "row", group_size: int = 25, key_column: str = "", max_chars: int = 2000):
+        self.mode = mode
+        self.group_size = max(1, group_size)
+        self.key_column = key_column
+        self.max_chars = max_chars
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode in ("rows", "key")
+
+
+def render_rows(df: pd.DataFrame, prefix: str = "") -> pd.Series:
+    """Render every row as "col: value" lines, skipping empty cells, one column at a time"""
+    text = pd.Series(prefix, index=df.index, dtype=object)
+    for col in df.columns:
+        values = df[col]
+        text = text + (f"{col}: " + values.astype(str) + "\n").where(values.notna(), "")
+    return text.str.rstrip("\n")
+
+
+def render_table_lines(df: pd.DataFrame) -> pd.Series:
+    """Render every row as "row | v1 | v2" with 1-based row numbers, empty cells left blank"""
+    text = (df.index.to_series() + 1).astype(str)
+    for col in df.columns:
+        values = df[col]
+        text = text + " | " + values.astype(str).where(values.notna(), "")
+    return text
+
+
+def _split_groups(lines: pd.Series, grouping: TabularGrouping, header_size: int) -> Iterator[list]:
+    """Cut rendered rows into groups of at most group_size rows and about max_chars characters"""
+    group, size = [], header_size
+    for idx, line in lines.items():
+        if group and (len(group) >= grouping.group_size or size + len(line) + 1 > grouping.max_chars):
+            yield group
+            group, size = [], header_size
+        group.append((idx, line))
+        size += len(line) + 1
+    if group:
+        yield group
+
+
+def _grouped_documents(df: pd.DataFrame, filename: str, file_type: str, grouping: TabularGrouping,
+                       sheet_name: str = "", hold_last: bool = False):
+    """Render row groups as compact tables with the row range in metadata
+
+    With hold_last the group still open at the end of df (the last row's key, or
+    the last fixed-size group) is not rendered; its rows are returned so the
+    caller can prepend them to the next chunk read from the same table.
+    """
+    header = "row | " + " | ".join(str(col) for col in df.columns)
+    sheet_prefix = f"Sheet: {sheet_name}\n" if sheet_name else ""
+    location = f"Sheet: {sheet_name}, " if sheet_name else ""
+
+    if grouping.mode == "key" and grouping.key_column in df.columns:
+        keys = df[grouping.key_column].astype(str).where(df[grouping.key_column].notna(), "(blank)")
+        frames = [(key, frame) for key, frame in df.groupby(keys, sort=False)]
+        open_key = keys.iloc[-1] if len(keys) else None
+    else:
+        frames = [(None, df)]
+        open_key = None
+
+    carried = None
+    for key, frame in frames:
+        key_prefix = f"{grouping.key_column}: {key}\n" if key is not None else ""
+        prefix = f"{sheet_prefix}{key_prefix}{header}\n"
+        groups = list(_split_groups(render_table_lines(frame), grouping, len(prefix)))
+        if hold_last and key == open_key and groups:
+            # Only the last partial group is carried, so a key spanning the whole file never piles up
+            carried = df.loc[[idx for idx, _ in groups.pop()]]
+        for group in groups:
+            row_start, row_end = group[0][0] + 1, group[-1][0] + 1
+            label = f"{grouping.key_column}: {key}, " if key is not None else ""
+            yield Document(page_content=prefix + "\n".join(line for _, line in group), metadata={
+                "title": filename,
+                "source": f"{filename} ({location}{label}Rows {row_start}-{row_end})",
+                "file_type": file_type,
+                "row_number": row_start,
+                "sheet_name": sheet_name,
+                "section_number": 0,
+                "row_start": row_start,
+                "row_end": row_end
+            })
+    return carried
+
+
+def _iter_grouped_chunks(chunks: Iterable[pd.DataFrame], filename: str, file_type: str, grouping: TabularGrouping,
+                         sheet_name: str = "") -> Iterator[Document]:
+    """Group the chunks of one table, carrying the open group over so it is not split at a chunk boundary"""
+    carried = None
+    checked_key = grouping.mode != "key"
+    for chunk in chunks:
+        if not checked_key:
+            checked_key = True
+            if grouping.key_column not in chunk.columns:
+                location = f" (sheet {sheet_name})" if sheet_name else ""
+                print(f"[WARNING] Key column '{grouping.key_column}' not found in {filename}{location}, "
+                      f"grouping every {grouping.group_size} rows instead")
+        df = chunk if carried is None else pd.concat([carried, chunk])
+        carried = yield from _grouped_documents(df, filename, file_type, grouping, sheet_name, hold_last=True)
+    if carried is not None and len(carried):
+        yield from _grouped_documents(carried, filename, file_type, grouping, sheet_name)
+
+
+def iter_csv_documents(file_path: str, filename: str, chunk_rows: int = 5000,
+                       grouping: TabularGrouping = None) -> Iterator[Document]:
+    """Stream a CSV as one Document per row (or per row group), reading chunk_rows rows at a time"""
+    print(f"[CSV_PROCESSOR] Loading CSV: {filename}")
+    counts = {"rows": 0}
+
+    def chunks():
+        for chunk in pd.read_csv(file_path, chunksize=chunk_rows):
+            counts["rows"] += len(chunk)
+            yield chunk
+
+    if grouping is not None and grouping.enabled:
+        yield from _iter_grouped_chunks(chunks(), filename, "csv", grouping)
+    else:
+        for chunk in chunks():
+            for idx, content in render_rows(chunk).items():
+                yield Document(page_content=content, metadata={
+                    "title": filename,
+                    "source": f"{filename} (Row {idx + 1})",
+                    "file_type": "csv",
+                    "row_number": idx + 1,
+                    "sheet_name": "",
+                    "section_number": 0,
+                    "row_start": idx + 1,
+                    "row_end": idx + 1
+                })
+    print(f"[CSV_PROCESSOR] Successfully processed {counts['rows']} rows")
+
+
+def _iter_xlsx_frames(file_path: str, chunk_rows: int) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """Read sheets with openpyxl in read-only mode, chunk_rows rows per DataFrame"""
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            rows = sheet.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                continue
+            columns = [str(col) if col is not None else f"Unnamed: {i}" for i, col in enumerate(header)]
+            width = len(columns)
+
+            buffer, index = [], []
+            for row_idx, row in enumerate(rows):
+                if all(value is None for value in row):
+                    continue
+                buffer.append(tuple(row[:width]) + (None,) * (width - len(row)))
+                index.append(row_idx)
+                if len(buffer) >= chunk_rows:
+                    yield sheet.title, pd.DataFrame(buffer, columns=columns, index=index)
+                    buffer, index = [], []
+            if buffer:
+                yield sheet.title, pd.DataFrame(buffer, columns=columns, index=index)
+    finally:
+        workbook.close()
+
+
+def _iter_xls_frames(file_path: str, chunk_rows: int) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """Legacy .xls has no streaming reader, so open it once and slice each sheet"""
+    with pd.ExcelFile(file_path) as excel_file:
+        for sheet_name in excel_file.sheet_names:
+            df = excel_file.parse(sheet_name)
+            for start in range(0, len(df), chunk_rows):
+                yield sheet_name, df.iloc[start:start + chunk_rows]
+
+
+def iter_excel_documents(file_path: str, filename: str, chunk_rows: int = 5000,
+                         grouping: TabularGrouping = None) -> Iterator[Document]:
+    """Stream every sheet of a workbook as one Document per row (or per row group)"""
+    print(f"[EXCEL_PROCESSOR] Loading Excel: {filename}")
+    frames = _iter_xls_frames if get_file_extension(filename) == "xls" else _iter_xlsx_frames
+    counts = {"rows": 0, "sheets": 0}
+
+    def chunks(sheet_frames):
+        for _, chunk in sheet_frames:
+            counts["rows"] += len(chunk)
+            yield chunk
+
+    for sheet_name, sheet_frames in groupby(frames(file_path, chunk_rows), key=lambda frame: frame[0]):
+        print(f"[EXCEL_PROCESSOR] Processing sheet: {sheet_name}")
+        counts["sheets"] += 1
+        if grouping is not None and grouping.enabled:
+            yield from _iter_grouped_chunks(chunks(sheet_frames), filename, "excel", grouping, sheet_name=sheet_name)
+            continue
+        for chunk in chunks(sheet_frames):
+            for idx, content in render_rows(chunk, prefix=f"Sheet: {sheet_name}\n").items():
+                yield Document(page_content=content, metadata={
+                    "title": filename,
+                    "source": f"{filename} (Sheet: {sheet_name}, Row {idx + 1})",
+                    "file_type": "excel",
+                    "sheet_name": sheet_name,
+                    "row_number": idx + 1,
+                    "section_number": 0,
+                    "row_start": idx + 1,
+                    "row_end": idx + 1
+                })
+    print(f"[EXCEL_PROCESSOR] Successfully processed {counts['rows']} rows across {counts['sheets']} sheets")
+
+
+def parse_csv(file_path: str, filename: str, grouping: TabularGrouping = None) -> List[Document]:
+    try:
+        return list(iter_csv_documents(file_path, filename, grouping=grouping))
+    except Exception as e:
+        print(f"[ERROR] Error processing CSV: {str(e)}")
+        return []
+
+
+def parse_excel(file_path: str, filename: str, grouping: TabularGrouping = None) -> List[Document]:
+    try:
+        return list(iter_excel_documents(file_path, filename, grouping=grouping))
+    except Exception as e:
+        print(f"[ERROR] Error processing Excel: {str(e)}")
+        return []
+
+
+def parse_text(file_path: str, filename: str) -> List[Document]:
+    try:
+        print(f"[TXT_PROCESSOR] Loading text file: {filename}")
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+    except UnicodeDecodeError:
+        try:
+            with open(file_path, 'r', encoding='latin-1') as f:
+                content = f.read()
+        except Exception as e:
+            print(f"[ERROR] Error processing text file: {str(e)}")
+            return []
+
+    paragraphs = content.split('\n\n')
+    processed_documents = []
+    for idx, paragraph in enumerate(paragraphs):
+        if paragraph.strip():
+            new_metadata = {
+                "title": filename,
+                "source": f"{filename} (Section {idx + 1})",
+                "file_type": "txt",
+                "section_number": idx + 1,
+                "row_number": 0,
+                "sheet_name": ""
+            }
+            processed_doc = Document(page_content=paragraph.strip(), metadata=new_metadata)
+            processed_documents.append(processed_doc)
+    print(f"[TXT_PROCESSOR] Successfully processed {len(processed_documents)} paragraphs")
+    return processed_documents
+
+
+PARSERS = {
+    'pdf': parse_pdf,
+    'csv': parse_csv,
+    'xlsx': parse_excel,
+    'xls': parse_excel,
+    'txt': parse_text,
+}
+
+
+STREAMING_PARSERS = {
+    'csv': iter_csv_documents,
+    'xlsx': iter_excel_documents,
+    'xls': iter_excel_documents,
+}
+
+
+def parse_file(file_path: str, filename: str) -> List[Document]:
+    """Parse any supported file, returns [] for unsupported formats"""
+    parser = PARSERS.get(get_file_extension(filename))
+    return parser(file_path, filename) if parser else []
+
+
+def is_streamable(filename: str) -> bool:
+    return get_file_extension(filename) in STREAMING_PARSERS
+
+
+def iter_file_documents(file_path: str, filename: str, chunk_rows: int = 5000,
+                        grouping: TabularGrouping = None) -> Iterator[Document]:
+    """Lazily yield a tabular file's rows; errors surface while iterating"""
+    return STREAMING_PARSERS[get_file_extension(filename)](file_path, filename, chunk_rows, grouping)
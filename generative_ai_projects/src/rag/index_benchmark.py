@@ -0,0 +1,203 @@
+"""
+Index Benchmark Module - Sweep Milvus index/search params against a brute-force baseline
+
+Run from the project root:
+    python -m src.rag.index_benchmark --queries 200 --k 5 --target-recall 0.95
+
+The live collection is only read. Its vectors are copied into a scratch
+collection that is re-indexed for every candidate and dropped at the end.
+"""
+
+import argparse
+import json
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from pymilvus import Collection, CollectionSchema, DataType, FieldSchema, utility
+
+from config.constant_config import Config
+from src.rag.vector_store import MilvusStore
+
+
+# nlist None is sized from the collection (about 4 * sqrt(n), at most 1024)
+SWEEP = [
+    ("FLAT", {}, "", [None]),
+    ("IVF_FLAT", {"nlist": None}, "nprobe", [1, 8, 16, 32, 64]),
+    ("IVF_SQ8", {"nlist": None}, "nprobe", [1, 8, 16, 32, 64]),
+    ("HNSW", {"M": 8, "efConstruction": 64}, "ef", [16, 32, 64, 128, 256]),
+    ("HNSW", {"M": 16, "efConstruction": 200}, "ef", [16, 32, 64, 128, 256]),
+]
+
+
+def load_vectors(collection: Collection, vector_field: str, max_vectors: int) -> np.ndarray:
+    """Read up to max_vectors stored embeddings"""
+    vectors = []
+    iterator = collection.query_iterator(batch_size=1000, output_fields=[vector_field])
+    try:
+        while len(vectors) < max_vectors:
+            batch = iterator.next()
+            if not batch:
+                break
+            vectors.extend(row[vector_field] for row in batch)
+    finally:
+        iterator.close()
+    return np.asarray(vectors[:max_vectors], dtype=np.float32)
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int, metric_type: str) -> np.ndarray:
+    """Brute-force top-k row ids per query"""
+    if metric_type == "COSINE":
+        vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+    if metric_type in ("IP", "COSINE"):
+        scores = -(queries @ vectors.T)
+    else:
+        scores = (queries ** 2).sum(axis=1, keepdims=True) - 2 * queries @ vectors.T + (vectors ** 2).sum(axis=1)
+    top = np.argpartition(scores, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(top, np.argsort(np.take_along_axis(scores, top, axis=1), axis=1), axis=1)
+
+
+def build_scratch_collection(name: str, vectors: np.ndarray) -> Collection:
+    """Collection holding only row ids and vectors"""
+    if utility.has_collection(name):
+        utility.drop_collection(name)
+    schema = CollectionSchema([
+        FieldSchema("id", DataType.INT64, is_primary=True, auto_id=False),
+        FieldSchema("vector", DataType.FLOAT_VECTOR, dim=vectors.shape[1]),
+    ])
+    collection = Collection(name, schema)
+    for start in range(0, len(vectors), 5000):
+        end = min(start + 5000, len(vectors))
+        collection.insert([list(range(start, end)), vectors[start:end].tolist()])
+    collection.flush()
+    return collection
+
+
+def measure(collection: Collection, queries: np.ndarray, k: int, metric_type: str, search_params: dict,
+            expected: np.ndarray) -> Dict[str, float]:
+    """Run every query one at a time and compare the hits with the exact result"""
+    latencies = []
+    recalls = []
+    for query, truth in zip(queries, expected):
+        started = time.perf_counter()
+        results = collection.search(
+            data=[query.tolist()],
+            anns_field="vector",
+            param={"metric_type": metric_type, "params": search_params},
+            limit=k,
+        )
+        latencies.append((time.perf_counter() - started) * 1000)
+        hits = {hit.id for hit in results[0]}
+        recalls.append(len(hits & set(truth.tolist())) / k)
+    return {
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 2),
+        "recall": round(float(np.mean(recalls)), 4),
+    }
+
+
+def run_benchmark(num_queries: int = 200, k: int = 5, max_vectors: int = 200000, noise: float = 0.01,
+                  target_recall: float = 0.95, seed: int = 0) -> List[dict]:
+    """Sweep SWEEP over a copy of the live collection and return one row per index/search setting"""
+    store = MilvusStore(
+        host=Config.MILVUS_HOST,
+        port=Config.MILVUS_PORT,
+        database=Config.MILVUS_DATABASE,
+        collection_name=Config.MILVUS_COLLECTION_NAME,
+        embedding_function=None,
+    )
+    if not store.connect() or not store.has_collection():
+        raise RuntimeError(f"Collection '{Config.MILVUS_COLLECTION_NAME}' not found")
+
+    source = Collection(store.resolve_collection())
+    metric_type = Config.MILVUS_METRIC_TYPE
+    for index in source.indexes:
+        if index.field_name == store.vector_field:
+            metric_type = index.params.get("metric_type", metric_type)
+
+    vectors = load_vectors(source, store.vector_field, max_vectors)
+    if len(vectors) < k:
+        raise RuntimeError(f"Only {len(vectors)} vectors stored, need at least k={k}")
+    print(f"[INDEX_BENCHMARK] {len(vectors)} vectors of dim {vectors.shape[1]}, metric={metric_type}")
+
+    # Queries are stored vectors with a little noise, so they resemble real traffic but are not exact copies
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(len(vectors), size=min(num_queries, len(vectors)), replace=False)
+    scale = noise * float(np.linalg.norm(vectors, axis=1).mean()) / np.sqrt(vectors.shape[1])
+    queries = vectors[picks] + rng.normal(0, scale, size=(len(picks), vectors.shape[1])).astype(np.float32)
+    expected = exact_top_k(vectors, queries, k, metric_type)
+
+    scratch_name = f"{Config.MILVUS_COLLECTION_NAME}_index_bench"
+    collection = build_scratch_collection(scratch_name, vectors)
+    results = []
+    try:
+        nlist = min(1024, max(16, int(4 * np.sqrt(len(vectors)))))
+        for index_type, build_params, search_key, search_values in SWEEP:
+            build_params = {key: nlist if value is None else value for key, value in build_params.items()}
+            collection.release()
+            if collection.has_index():
+                collection.drop_index()
+            started = time.perf_counter()
+            collection.create_index("vector", {"index_type": index_type, "metric_type": metric_type,
+                                               "params": build_params})
+            utility.wait_for_index_building_complete(scratch_name)
+            build_seconds = round(time.perf_counter() - started, 2)
+            collection.load()
+
+            for value in search_values:
+                if search_key == "ef":
+                    search_params = {"ef": max(value, k)}
+                elif search_key == "nprobe":
+                    search_params = {"nprobe": min(value, nlist)}
+                else:
+                    search_params = {}
+                row = {
+                    "index_type": index_type,
+                    "index_params": build_params,
+                    "search_params": search_params,
+                    "build_seconds": build_seconds,
+                    **measure(collection, queries, k, metric_type, search_params, expected),
+                }
+                results.append(row)
+                print(f"[INDEX_BENCHMARK] {index_type} {build_params} {search_params}: "
+                      f"recall@{k}={row['recall']} p50={row['p50_ms']}ms p95={row['p95_ms']}ms")
+    finally:
+        collection.release()
+        utility.drop_collection(scratch_name)
+
+    best = recommend(results, target_recall)
+    if best:
+        print(f"[INDEX_BENCHMARK] Fastest setting with recall >= {target_recall}:")
+        print(f'MILVUS_INDEX_TYPE="{best["index_type"]}"')
+        print(f"MILVUS_INDEX_PARAMS='{json.dumps(best['index_params'])}'")
+        print(f"MILVUS_SEARCH_PARAMS='{json.dumps(best['search_params'])}'")
+    else:
+        print(f"[INDEX_BENCHMARK] No setting reached recall {target_recall}")
+    return results
+
+
+def recommend(results: List[dict], target_recall: float) -> Optional[dict]:
+    """Lowest p95 latency among settings that meet the recall target"""
+    eligible = [row for row in results if row["recall"] >= target_recall]
+    return min(eligible, key=lambda row: (row["p95_ms"], row["p50_ms"])) if eligible else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep Milvus index and search params on the current collection")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--max-vectors", type=int, default=200000)
+    parser.add_argument("--noise", type=float, default=0.01, help="relative noise added to sampled query vectors")
+    parser.add_argument("--target-recall", type=float, default=0.95)
+    parser.add_argument("--output", help="write all results to this JSON file")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.queries, args.k, args.max_vectors, args.noise, args.target_recall)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
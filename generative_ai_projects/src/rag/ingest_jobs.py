@@ -0,0 +1,144 @@
+"""
+Ingest Jobs Module - In-process background queue for knowledge base uploads
+"""
+
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+
+INGEST_STAGES = ("uploaded", "parsed", "chunked", "embedded", "indexed")
+
+
+class IngestQueueFullError(RuntimeError):
+    """Raised when too many ingest jobs are already waiting"""
+
+
+class IngestJobQueue:
+    """Bounded worker pool that runs ingest jobs and records per-stage progress and timings
+
+    The handler is called as handler(payload, progress) and should call
+    progress(stage) as each stage completes. It returns a result dict whose
+    "success" flag decides whether the job succeeded.
+    """
+
+    def __init__(self, handler: Callable[[dict, Callable[[str], None]], dict], max_workers: int = 2,
+                 max_pending: int = 100, max_retained: int = 1000):
+        self.handler = handler
+        self.max_pending = max_pending
+        self.max_retained = max_retained
+
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="ingest")
+        self._jobs = OrderedDict()
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def submit(self, payload: dict, filename: str = None) -> str:
+        """Queue a job and return its id immediately"""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise IngestQueueFullError(f"Ingest queue is full ({self.max_pending} jobs pending)")
+
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "filename": filename,
+                "status": "queued",
+                "stage": None,
+                "stages": [],
+                "created_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "result": None,
+                "error": None,
+            }
+            self._pending += 1
+            self._prune()
+
+        self._executor.submit(self._run, job_id, payload)
+        print(f"[INGEST_JOBS] Queued job {job_id} ({filename})")
+        return job_id
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond the retention cap"""
+        finished = [job_id for job_id, job in self._jobs.items() if job["finished_at"] is not None]
+        for job_id in finished[:max(0, len(self._jobs) - self.max_retained)]:
+            del self._jobs[job_id]
+
+    def _progress(self, job_id: str, stage: str):
+        now = time.time()
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            previous = job["stages"][-1]["completed_at"] if job["stages"] else job["started_at"]
+            job["stages"].append({
+                "stage": stage,
+                "completed_at": now,
+                "duration_seconds": round(now - previous, 3),
+            })
+            job["stage"] = stage
+
+    def _finish(self, job_id: str, status: str, result: dict = None, error: str = None):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            self._pending -= 1
+            if job is None:
+                return
+            job["status"] = status
+            job["result"] = result
+            job["error"] = error
+            job["finished_at"] = time.time()
+
+    def _run(self, job_id: str, payload: dict):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job["status"] = "running"
+                job["started_at"] = time.time()
+
+        try:
+            result = self.handler(payload, lambda stage: self._progress(job_id, stage))
+        except Exception as e:
+            print(f"[INGEST_JOBS] Job {job_id} failed: {str(e)}")
+            print(traceback.format_exc())
+            self._finish(job_id, "failed", error=str(e))
+            return
+
+        if isinstance(result, dict) and result.get("success"):
+            self._finish(job_id, "succeeded", result=result)
+        else:
+            message = result.get("message") if isinstance(result, dict) else "File processing failed"
+            self._finish(job_id, "failed", result=result if isinstance(result, dict) else None, error=message)
+        print(f"[INGEST_JOBS] Job {job_id} finished")
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """Snapshot of a job's status, stages and timings, or None if unknown"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            snapshot = dict(job)
+            snapshot["stages"] = [dict(stage) for stage in job["stages"]]
+
+        end = snapshot["finished_at"] or time.time()
+        started = snapshot["started_at"]
+        snapshot["queue_seconds"] = round((started or end) - snapshot["created_at"], 3)
+        snapshot["run_seconds"] = round(end - started, 3) if started else None
+        return snapshot
+
+    def get_stats(self) -> dict:
+        """Get queue depth and job status counts"""
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+            return {"pending": self._pending, "max_pending": self.max_pending, "jobs": counts}
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting jobs and optionally wait for running ones"""
+        self._executor.shutdown(wait=wait)
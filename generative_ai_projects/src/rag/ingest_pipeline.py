@@ -0,0 +1,134 @@
+"""
+Ingest Pipeline Module - Parallel file parsing that streams results to the caller
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from src.rag.document_parsers import (
+    TabularGrouping,
+    build_pdf_documents,
+    extract_pdf_pages,
+    get_file_extension,
+    is_streamable,
+    iter_file_documents,
+    parse_file,
+    pdf_page_count,
+)
+
+
+def iter_batches(items: Iterable, batch_size: int) -> Iterator[list]:
+    """Group any iterable into lists of at most batch_size items"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _parse_task(task: tuple):
+    """Worker entry point: parse a whole file or extract a page range of a PDF"""
+    kind, file_path, filename, start, end = task
+    if kind == "pdf_pages":
+        return extract_pdf_pages(file_path, start, end)
+    return parse_file(file_path, filename)
+
+
+def _plan_tasks(key: str, file_path: str, filename: str, pages_per_task: int) -> List[tuple]:
+    """Split large PDFs into page-range tasks, everything else is one task"""
+    if get_file_extension(filename) == "pdf" and pages_per_task > 0:
+        try:
+            page_count = pdf_page_count(file_path)
+        except Exception as e:
+            print(f"[INGEST_PIPELINE] Could not read page count of {filename}: {e}")
+            page_count = 0
+        if page_count > pages_per_task:
+            return [
+                (key, ("pdf_pages", file_path, filename, start, start + pages_per_task))
+                for start in range(0, page_count, pages_per_task)
+            ]
+    return [(key, ("file", file_path, filename, None, None))]
+
+
+def iter_parsed_files(files: List[Tuple[str, str]], max_workers: int = 1, pages_per_task: int = 50,
+                      chunk_rows: int = 5000, grouping: TabularGrouping = None
+                      ) -> Iterator[Tuple[str, Iterable[Document], Optional[str]]]:
+    """Parse (key, file_path) pairs, yielding (key, documents, error) as each file completes
+
+    With max_workers > 1 files and PDF page ranges are parsed in a process pool
+    while the caller chunks and embeds earlier results; at most 2 * max_workers
+    tasks are in flight so parsed documents never pile up in memory.
+    CSV/Excel files are not sent to the pool: their documents come back as a
+    lazy generator read chunk_rows rows at a time, so memory stays flat.
+    """
+    streamed = [(key, file_path) for key, file_path in files if is_streamable(file_path)]
+    pooled = [(key, file_path) for key, file_path in files if not is_streamable(file_path)]
+
+    if max_workers <= 1:
+        for key, file_path in streamed:
+            yield key, iter_file_documents(file_path, os.path.basename(file_path), chunk_rows, grouping), None
+        for key, file_path in pooled:
+            try:
+                yield key, parse_file(file_path, os.path.basename(file_path)), None
+            except Exception as e:
+                yield key, [], str(e)
+        return
+
+    tasks = []
+    for key, file_path in pooled:
+        filename = os.path.basename(file_path)
+        tasks.extend(_plan_tasks(key, file_path, filename, pages_per_task))
+
+    remaining_parts = {}
+    for key, task in tasks:
+        remaining_parts[key] = remaining_parts.get(key, 0) + 1
+    partial_pages = {}
+    errors = {}
+    filenames = {key: task[2] for key, task in tasks}
+
+    # Spawn, not fork: the API process runs ingest and client threads whose locks a forked child could inherit held
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        pending = {}
+        task_iter = iter(tasks)
+
+        def fill():
+            for key, task in task_iter:
+                pending[executor.submit(_parse_task, task)] = (key, task)
+                if len(pending) >= max_workers * 2:
+                    break
+
+        fill()
+        # Tabular files stream in this process while the pool parses the rest
+        for key, file_path in streamed:
+            yield key, iter_file_documents(file_path, os.path.basename(file_path), chunk_rows, grouping), None
+            fill()
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                key, task = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    errors[key] = str(e)
+                    result = []
+
+                remaining_parts[key] -= 1
+                if task[0] == "pdf_pages":
+                    partial_pages.setdefault(key, []).extend(result)
+                    if remaining_parts[key]:
+                        continue
+                    pages = partial_pages.pop(key)
+                    result = [] if key in errors else build_pdf_documents(pages, filenames[key])
+                elif remaining_parts[key]:
+                    continue
+
+                yield key, result, errors.pop(key, None)
+            fill()
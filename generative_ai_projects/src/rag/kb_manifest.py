@@ -0,0 +1,79 @@
+"""
+Knowledge Base Manifest Module - File hash to chunk primary key bookkeeping
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+
+def hash_file(file_path: str, block_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's contents, read in blocks"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class KnowledgeBaseManifest:
+    """JSON manifest mapping each knowledge base file to its content hash and Milvus chunk ids"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._files = {}
+        self._lock = threading.Lock()
+        self.exists = False
+        self.load()
+
+    def load(self):
+        """Read the manifest from disk, starting empty if it is missing or unreadable"""
+        with self._lock:
+            self._files = {}
+            self.exists = os.path.exists(self.path)
+            if not self.exists:
+                return
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._files = json.load(f).get("files", {})
+            except (OSError, ValueError) as e:
+                print(f"[WARNING] Could not read knowledge base manifest, starting empty: {e}")
+                self._files = {}
+
+    def save(self):
+        """Write the manifest atomically so a crash never leaves it half written"""
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"files": self._files}, f, indent=2, sort_keys=True)
+            os.replace(temp_path, self.path)
+            self.exists = True
+
+    def files(self) -> Dict[str, dict]:
+        """Snapshot of every tracked file entry"""
+        with self._lock:
+            return {path: dict(entry) for path, entry in self._files.items()}
+
+    def get(self, relative_path: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._files.get(relative_path)
+            return dict(entry) if entry else None
+
+    def set(self, relative_path: str, file_hash: str, pks: List[int]):
+        """Record the hash and chunk ids of a file"""
+        with self._lock:
+            self._files[relative_path] = {"hash": file_hash, "pks": list(pks)}
+
+    def remove(self, relative_path: str):
+        with self._lock:
+            self._files.pop(relative_path, None)
+
+    def clear(self):
+        """Forget every tracked file"""
+        with self._lock:
+            self._files = {}
@@ -0,0 +1,474 @@
+"""
+Local Vector Store Module - In-process NumPy backend persisted to disk
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from src.rag.vector_store import VectorStore, normalize_chunk_metadata, sort_versions
+
+
+SEARCH_BLOCK_ROWS = 65536
+COMPACT_MIN_DELETED_ROWS = 1000
+
+
+class LocalVectorStore(VectorStore):
+    """Drop-in replacement for MilvusStore that keeps everything in one directory
+
+    Each collection is a folder holding a float32 memmap of L2-normalised
+    embeddings (vectors.f32), an append-only documents.jsonl with one line per
+    row plus delete markers, and meta.json with the dimension and the next
+    primary key, so keys are never reused after a delete. Search is an
+    exact inner product (cosine) top-k computed in row blocks. The alias file
+    <collection_name>.alias names the versioned folder queries read from.
+    """
+
+    def __init__(self, root_dir: str, collection_name: str, embedding_function):
+        self.root_dir = root_dir
+        self.collection_name = collection_name
+        self.embedding_function = embedding_function
+
+        self.primary_field = "pk"
+        self.collection_version = 0
+
+        self._lock = threading.RLock()
+        self._reset()
+
+        print(f"[LOCAL_STORE] Initialized with dir={root_dir}, collection={collection_name}")
+
+    def _reset(self):
+        self._loaded = None
+        self._dim = None
+        self._vectors = None
+        self._count = 0
+        self._pks = np.zeros(0, dtype=np.int64)
+        self._alive = np.zeros(0, dtype=bool)
+        self._rows = {}
+        self._documents = []
+        self._next_pk = 1
+
+    def _dir(self, name: str) -> str:
+        return os.path.join(self.root_dir, name)
+
+    def _alias_path(self) -> str:
+        return os.path.join(self.root_dir, f"{self.collection_name}.alias")
+
+    def _write_alias(self, target: str):
+        """Atomically point the alias file at a versioned folder"""
+        tmp_path = f"{self._alias_path()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"target": target}, f)
+        os.replace(tmp_path, self._alias_path())
+
+    def _write_meta(self, path: str):
+        """Atomically record the dimension and next primary key of a collection folder"""
+        tmp_path = os.path.join(path, "meta.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dim": int(self._dim), "next_pk": int(self._next_pk)}, f)
+        os.replace(tmp_path, os.path.join(path, "meta.json"))
+
+    def _version_prefix(self) -> str:
+        return f"{self.collection_name}_v"
+
+    def connect(self, silent=False):
+        """Create the storage directory"""
+        try:
+            os.makedirs(self.root_dir, exist_ok=True)
+            return True
+        except Exception as e:
+            if not silent:
+                print(f"[ERROR] Could not create local vector store directory: {str(e)}")
+            return False
+
+    def list_versions(self) -> List[str]:
+        """Versioned collections behind the alias, oldest first"""
+        if not os.path.isdir(self.root_dir):
+            return []
+        return sort_versions(
+            self.collection_name,
+            (name for name in os.listdir(self.root_dir) if os.path.isdir(self._dir(name))),
+        )
+
+    def resolve_collection(self) -> Optional[str]:
+        """Folder the alias points at, an unaliased folder with the collection name, or None"""
+        if os.path.isdir(self._dir(self.collection_name)):
+            return self.collection_name
+        try:
+            with open(self._alias_path(), "r", encoding="utf-8") as f:
+                target = json.load(f)["target"]
+        except (OSError, ValueError, KeyError):
+            return None
+        return target if os.path.isdir(self._dir(target)) else None
+
+    def has_collection(self) -> bool:
+        """Check the collection folder (or the alias target) exists"""
+        return self.resolve_collection() is not None
+
+    def _load(self, name: str):
+        """Read a collection folder into memory"""
+        path = self._dir(name)
+        self._reset()
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self._dim = meta.get("dim")
+
+        pks, documents, deleted = [], [], set()
+        documents_path = os.path.join(path, "documents.jsonl")
+        if os.path.exists(documents_path):
+            with open(documents_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    if "delete" in record:
+                        deleted.update(record["delete"])
+                    else:
+                        pks.append(record["pk"])
+                        documents.append((record["text"], record["metadata"]))
+
+        vectors_path = os.path.join(path, "vectors.f32")
+        if self._dim and os.path.exists(vectors_path):
+            capacity = os.path.getsize(vectors_path) // (4 * self._dim)
+            count = min(len(pks), capacity)
+            if capacity:
+                self._vectors = np.memmap(vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self._dim))
+        else:
+            count = 0
+
+        self._count = count
+        self._documents = documents[:count]
+        self._pks = np.asarray(pks[:count], dtype=np.int64)
+        self._alive = np.asarray([pk not in deleted for pk in pks[:count]], dtype=bool)
+        self._rows = {pk: row for row, pk in enumerate(pks[:count])}
+        # Folders written before next_pk was recorded fall back to the highest key ever inserted
+        self._next_pk = max(meta.get("next_pk", 1), max(pks, default=0) + 1, max(deleted, default=0) + 1)
+        self._loaded = name
+
+    def _compact_if_needed(self):
+        """Compact once most rows are deleted, called by writers holding the lock"""
+        deleted = int((~self._alive[:self._count]).sum())
+        if deleted > max(COMPACT_MIN_DELETED_ROWS, self._count // 2):
+            self._compact()
+
+    def _compact(self):
+        """Rewrite the collection without deleted rows into a new version folder and repoint the alias at it
+
+        Vectors and documents are written to a temporary folder that is renamed
+        into place before the alias moves, so a crash never leaves the two files
+        out of step. Primary keys and next_pk are kept. The previous folder stays
+        for readers that still have it mapped; only versions older than it are
+        removed, so newer shadow folders being filled are never touched.
+        Unaliased folders (legacy collections and shadow stores still being
+        filled) are not compacted.
+        """
+        old_name = self._loaded
+        if old_name == self.collection_name:
+            return
+        keep = np.flatnonzero(self._alive)
+        vectors = np.array(self._vectors[keep])
+        documents = [self._documents[row] for row in keep]
+        pks = self._pks[keep]
+
+        new_name = f"{self._version_prefix()}{int(time.time() * 1000)}"
+        tmp_path = os.path.join(self.root_dir, f".{new_name}.tmp")
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        self._write_meta(tmp_path)
+        vectors.tofile(os.path.join(tmp_path, "vectors.f32"))
+        with open(os.path.join(tmp_path, "documents.jsonl"), "w", encoding="utf-8") as f:
+            for pk, (text, metadata) in zip(pks, documents):
+                f.write(json.dumps({"pk": int(pk), "text": text, "metadata": metadata}) + "\n")
+        os.rename(tmp_path, self._dir(new_name))
+
+        self._write_alias(new_name)
+
+        self._vectors = None
+        print(f"[LOCAL_STORE] Compacted '{old_name}' from {self._count} to {len(keep)} rows into '{new_name}'")
+        self._load(new_name)
+
+        versions = self.list_versions()
+        for name in versions[:versions.index(old_name)] if old_name in versions else []:
+            shutil.rmtree(self._dir(name), ignore_errors=True)
+            print(f"[LOCAL_STORE] Dropped old collection version '{name}'")
+
+    def _ensure_loaded(self) -> bool:
+        """Load whatever the collection name resolves to, reloading after the alias moved"""
+        target = self.resolve_collection()
+        if target is None:
+            self._reset()
+            return False
+        if self._loaded != target:
+            self._load(target)
+        return True
+
+    def load_collection(self, silent=False):
+        """Load existing collection"""
+        with self._lock:
+            try:
+                if not self._ensure_loaded():
+                    if not silent:
+                        print(f"[LOCAL_STORE] No existing collection '{self.collection_name}' found")
+                    return False
+                self.bump_version()
+                if not silent:
+                    print(f"[LOCAL_STORE] Loaded collection with {self.count_documents()} documents")
+                return True
+            except Exception as e:
+                if not silent:
+                    print(f"[WARNING] Collection exists but load had an issue: {e}")
+                return False
+
+    def create_collection(self, documents: List[Document]):
+        """Create new collection from documents"""
+        shadow_store = self.create_shadow_store()
+        shadow_store.insert_documents(documents)
+        self.promote(shadow_store.collection_name)
+        return self.count_documents()
+
+    def drop_collection(self):
+        """Drop collection (and the alias pointing at it)"""
+        with self._lock:
+            target = self.resolve_collection()
+            if target is None:
+                return False
+            self._reset()
+            if os.path.exists(self._alias_path()):
+                os.remove(self._alias_path())
+            shutil.rmtree(self._dir(target), ignore_errors=True)
+            self.bump_version()
+            print(f"[LOCAL_STORE] Collection '{target}' dropped")
+            return True
+
+    def create_shadow_store(self) -> "LocalVectorStore":
+        """A store bound to a new versioned folder that can be filled without affecting queries"""
+        shadow_name = f"{self._version_prefix()}{int(time.time() * 1000)}"
+        print(f"[LOCAL_STORE] Building shadow collection '{shadow_name}'")
+        return LocalVectorStore(self.root_dir, shadow_name, self.embedding_function)
+
+    def promote(self, shadow_name: str):
+        """Atomically repoint the alias file to the shadow folder and load it"""
+        with self._lock:
+            current = self.resolve_collection()
+            if current == self.collection_name:
+                # Keep the unaliased folder as the oldest version so it can still be rolled back to
+                legacy_name = f"{self._version_prefix()}0"
+                print(f"[LOCAL_STORE] Migrating unaliased collection '{self.collection_name}' to '{legacy_name}'")
+                os.rename(self._dir(self.collection_name), self._dir(legacy_name))
+                current = legacy_name
+
+            self._write_alias(shadow_name)
+
+            self._ensure_loaded()
+            self.bump_version()
+            print(f"[LOCAL_STORE] Alias '{self.collection_name}' now points at '{shadow_name}' (was {current})")
+
+    def collect_garbage(self, keep: int = 1) -> List[str]:
+        """Delete old versions no longer behind the alias, keeping the newest `keep` for rollback"""
+        current = self.resolve_collection()
+        stale = [name for name in self.list_versions() if name != current]
+        to_drop = stale[:-keep] if keep > 0 else stale
+        for name in to_drop:
+            shutil.rmtree(self._dir(name), ignore_errors=True)
+            print(f"[LOCAL_STORE] Dropped old collection version '{name}'")
+        return to_drop
+
+    def _grow(self, rows: int):
+        """Make room for rows more vectors, doubling the memmap file"""
+        path = os.path.join(self._dir(self._loaded), "vectors.f32")
+        capacity = self._vectors.shape[0] if self._vectors is not None else 0
+        if self._count + rows <= capacity:
+            return
+        new_capacity = max(1024, capacity * 2, self._count + rows)
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        with open(path, "ab") as f:
+            f.truncate(new_capacity * self._dim * 4)
+        self._vectors = np.memmap(path, dtype=np.float32, mode="r+", shape=(new_capacity, self._dim))
+
+    def add_documents(self, documents: List[Document], verify: bool = True, ready_timeout: float = 0.0):
+        """Add documents to existing collection"""
+        try:
+            added_ids = self.insert_documents(documents)
+            return not verify or len(added_ids) == len(documents)
+        except Exception as e:
+            print(f"[ERROR] Error adding documents: {str(e)}")
+            return False
+
+    def insert_documents(self, documents: List[Document]) -> List[int]:
+        """Embed and insert documents, creating the collection on first insert, returns their primary keys"""
+        if not documents:
+            return []
+        normalize_chunk_metadata(documents)
+        embeddings = self.embedding_function.embed_documents([doc.page_content for doc in documents])
+
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+        with self._lock:
+            if not self._ensure_loaded():
+                path = self._dir(self.collection_name)
+                os.makedirs(path, exist_ok=True)
+                self._dim = int(vectors.shape[1])
+                self._write_meta(path)
+                self._load(self.collection_name)
+            if vectors.shape[1] != self._dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match collection dimension {self._dim}")
+
+            self._grow(len(documents))
+            start = self._count
+            self._vectors[start:start + len(documents)] = vectors
+            self._vectors.flush()
+
+            pks = list(range(self._next_pk, self._next_pk + len(documents)))
+            with open(os.path.join(self._dir(self._loaded), "documents.jsonl"), "a", encoding="utf-8") as f:
+                for pk, doc in zip(pks, documents):
+                    f.write(json.dumps({"pk": pk, "text": doc.page_content, "metadata": doc.metadata}, default=str) + "\n")
+
+            for offset, (pk, doc) in enumerate(zip(pks, documents)):
+                self._rows[pk] = start + offset
+                self._documents.append((doc.page_content, dict(doc.metadata)))
+            self._pks = np.concatenate([self._pks, np.asarray(pks, dtype=np.int64)])
+            self._alive = np.concatenate([self._alive, np.ones(len(pks), dtype=bool)])
+            self._count += len(documents)
+            self._next_pk += len(documents)
+            self._write_meta(self._dir(self._loaded))
+        self.bump_version()
+        return pks
+
+    def wait_until_searchable(self, pks: List[int], timeout: float) -> Optional[bool]:
+        """Inserts are searchable as soon as insert_documents returns"""
+        return True
+
+    def _document(self, row: int) -> Document:
+        text, metadata = self._documents[row]
+        metadata = dict(metadata)
+        metadata[self.primary_field] = int(self._pks[row])
+        return Document(page_content=text, metadata=metadata)
+
+    def find_pks(self, field: str, value) -> List[int]:
+        """Primary keys of the chunks whose metadata field equals value"""
+        with self._lock:
+            if not self._ensure_loaded():
+                return []
+            return [
+                int(self._pks[row]) for row, (_, metadata) in enumerate(self._documents)
+                if self._alive[row] and metadata.get(field) == value
+            ]
+
+    def get_documents_by_pks(self, pks: List[int]) -> List[Document]:
+        """Fetch stored chunks by primary key"""
+        with self._lock:
+            if not pks or not self._ensure_loaded():
+                return []
+            rows = [self._rows.get(int(pk)) for pk in pks]
+            return [self._document(row) for row in rows if row is not None and self._alive[row]]
+
+    def delete_by_pks(self, pks: List[int]) -> int:
+        """Delete chunks by primary key, returns the number deleted"""
+        with self._lock:
+            if not pks or not self._ensure_loaded():
+                return 0
+            rows = [self._rows.get(int(pk)) for pk in pks]
+            rows = [row for row in rows if row is not None and self._alive[row]]
+            if not rows:
+                return 0
+            with open(os.path.join(self._dir(self._loaded), "documents.jsonl"), "a", encoding="utf-8") as f:
+                f.write(json.dumps({"delete": [int(self._pks[row]) for row in rows]}) + "\n")
+            self._alive[rows] = False
+            self._compact_if_needed()
+        self.bump_version()
+        return len(rows)
+
+    def get_vectorstore(self):
+        """The store itself once a collection is loaded (the query path only checks it is set)"""
+        return self if self.is_ready() else None
+
+    def is_ready(self) -> bool:
+        """Check the collection is loaded"""
+        with self._lock:
+            try:
+                return self._ensure_loaded()
+            except Exception as e:
+                print(f"[WARNING] Local collection could not be loaded: {e}")
+                return False
+
+    def search_batch(self, embeddings: List[List[float]], k: int = 3) -> List[List[Tuple[Document, List[float]]]]:
+        """Exact cosine top-k for several queries with one matrix multiply per block of rows"""
+        queries = np.asarray(embeddings, dtype=np.float32)
+        queries /= np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+
+        with self._lock:
+            if not self._ensure_loaded() or not self._count:
+                return [[] for _ in range(len(queries))]
+            count = self._count
+            scores = np.empty((len(queries), count), dtype=np.float32)
+            for start in range(0, count, SEARCH_BLOCK_ROWS):
+                end = min(start + SEARCH_BLOCK_ROWS, count)
+                scores[:, start:end] = queries @ self._vectors[start:end].T
+            scores[:, ~self._alive[:count]] = -np.inf
+
+            k = min(k, int(self._alive[:count].sum()))
+            if k <= 0:
+                return [[] for _ in range(len(queries))]
+
+            results = []
+            for row_scores in scores:
+                top = np.argpartition(-row_scores, k - 1)[:k]
+                top = top[np.argsort(-row_scores[top])]
+                results.append([(self._document(row), self._vectors[row].tolist()) for row in top])
+            return results
+
+    def search_by_vector(self, embedding: List[float], k: int = 3) -> List[Document]:
+        """Search the collection for the k nearest chunks"""
+        return [doc for doc, _ in self.search_batch([embedding], k)[0]]
+
+    def search_with_vectors(self, embedding: List[float], k: int = 3) -> List[Tuple[Document, List[float]]]:
+        """Search and also return each hit's stored (normalised) embedding"""
+        return self.search_batch([embedding], k)[0]
+
+    def get_vectors_by_pks(self, pks: List[int]) -> Dict[int, List[float]]:
+        """Stored (normalised) embeddings by primary key"""
+        with self._lock:
+            if not pks or not self._ensure_loaded():
+                return {}
+            rows = {int(pk): self._rows.get(int(pk)) for pk in pks}
+            return {pk: self._vectors[row].tolist() for pk, row in rows.items() if row is not None and self._alive[row]}
+
+    def iter_documents(self, batch_size: int = 1000) -> Iterator[Document]:
+        """Yield every stored chunk as a Document (used to warm in-memory indexes)"""
+        with self._lock:
+            if not self._ensure_loaded():
+                return
+            pks = self._pks[:self._count][self._alive[:self._count]].tolist()
+        # Rows are read under the lock a batch at a time and looked up by primary key, which survives compaction
+        for start in range(0, len(pks), batch_size):
+            with self._lock:
+                rows = [self._rows.get(pk) for pk in pks[start:start + batch_size]]
+                batch = [self._document(row) for row in rows if row is not None and self._alive[row]]
+            yield from batch
+
+    def count_documents(self) -> int:
+        """Number of stored chunks"""
+        with self._lock:
+            if not self._ensure_loaded():
+                return 0
+            return int(self._alive[:self._count].sum())
+
+    def get_collection_stats(self):
+        """Get collection statistics"""
+        if not self.has_collection():
+            return None
+        return {
+            "num_entities": self.count_documents(),
+            "collection_name": self.collection_name,
+            "database": "local"
+        }
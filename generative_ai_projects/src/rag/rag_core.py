@@ -2,22 +2,32 @@
 Facilities RAG System - Main Orchestrator
 """
 
+import asyncio
 import os
-from typing import List
+import shutil
+import tempfile
+import threading
+from typing import Callable, Iterable, List
 import streamlit as st
-from pymilvus import connections, utility, Collection
-from langchain_community.vectorstores import Milvus
 from langchain_core.documents import Document
-from langchain_community.document_loaders import PyPDFLoader
 import pathlib
-import pandas as pd
-import time
 
 from src.llm.clients import setup_llm_clients
 from src.rag.chunker import DocumentChunker
 from src.rag.embeddings import EmbeddingManager
-from src.rag.vector_store import MilvusStore
+from src.rag.vector_store import MilvusStore, VectorStore
+from src.rag.local_vector_store import LocalVectorStore
 from src.rag.retriever import KnowledgeRetriever
+from src.rag.semantic_cache import SemanticResponseCache
+from src.rag.conversation_memory import ConversationMemoryStore
+from src.rag.sparse_index import BM25Index, document_key
+from src.rag.dedup import ChunkDeduplicator, remove_repeated_lines
+from src.rag.kb_manifest import KnowledgeBaseManifest, hash_file
+from src.rag.document_parsers import (
+    TabularGrouping, is_streamable, iter_file_documents, parse_csv, parse_excel, parse_pdf, parse_text,
+)
+from src.rag.ingest_pipeline import iter_batches, iter_parsed_files
+from src.utils.single_flight import AsyncSingleFlight, SingleFlight
 import dotenv
 from config.constant_config import Config
 from src.database.s3_config import S3Uploader
@@ -36,12 +46,42 @@ class FacilitiesRAGSystem:
         self.embedding_function = None
         self.vectorstore = None
         self.llm = None
-        self.chat_history = []
+        self.memory = ConversationMemoryStore(
+            max_turns=Config.CHAT_MEMORY_MAX_TURNS,
+            idle_ttl_seconds=Config.CHAT_MEMORY_IDLE_TTL_SECONDS,
+            max_conversations=Config.CHAT_MEMORY_MAX_CONVERSATIONS,
+            max_total_messages=Config.CHAT_MEMORY_MAX_TOTAL_MESSAGES,
+        )
         
-        self.chunker = DocumentChunker(chunk_size=500, chunk_overlap=50)
+        self.chunker = DocumentChunker(
+            chunk_size=Config.CHUNK_SIZE,
+            chunk_overlap=Config.CHUNK_OVERLAP,
+            mode=Config.CHUNKING_MODE,
+            encoding_name=Config.TOKEN_ENCODING
+        )
         self.embedding_manager = EmbeddingManager()
         self.vector_store = None
         self.retriever = None
+        self.sparse_index = BM25Index() if Config.RETRIEVAL_MODE == "hybrid" else None
+        self.chunk_dedup = self._create_deduplicator()
+        self.kb_manifest = KnowledgeBaseManifest(Config.KB_MANIFEST_PATH)
+        self._sync_lock = threading.Lock()
+        self._flights = SingleFlight()
+        self._async_flights = AsyncSingleFlight()
+        self.tabular_grouping = TabularGrouping(
+            mode=Config.TABULAR_GROUPING,
+            group_size=Config.TABULAR_GROUP_SIZE,
+            key_column=Config.TABULAR_GROUP_KEY,
+            max_chars=Config.TABULAR_GROUP_MAX_CHARS
+        )
+        
+        self.response_cache = None
+        if Config.SEMANTIC_CACHE_ENABLED:
+            self.response_cache = SemanticResponseCache(
+                similarity_threshold=Config.SEMANTIC_CACHE_THRESHOLD,
+                ttl_seconds=Config.SEMANTIC_CACHE_TTL_SECONDS,
+                max_entries=Config.SEMANTIC_CACHE_MAX_ENTRIES,
+            )
         
         self.supported_formats = {
             'pdf': self._process_pdf_file,
@@ -53,25 +93,18 @@ class FacilitiesRAGSystem:
         print(f"[RAG_CORE] Supported formats: {list(self.supported_formats.keys())}")
 
     def initialize_clients(self, silent=False):
-        """Initializes LLM/Embedding clients and Milvus connection."""
+        """Initializes LLM/Embedding clients and the vector store connection."""
         print("[RAG_CORE] initialize_clients() called")
         
         if self.llm and self.embedding_function:
+            if self.vectorstore is not None and self._ensure_vector_store().is_ready():
+                return True
+            
             print("[RAG_CORE] Clients already initialized, checking collection...")
-            if utility.has_collection(self.collection_name):
-                connection_args = {
-                    "host": Config.MILVUS_HOST,
-                    "port": Config.MILVUS_PORT,
-                }
-                if Config.MILVUS_DATABASE:
-                    connection_args["db_name"] = Config.MILVUS_DATABASE
-                
-                self.vectorstore = Milvus(
-                    embedding_function=self.embedding_function,
-                    collection_name=self.collection_name,
-                    connection_args=connection_args,
-                    auto_id=True
-                )
+            vector_store = self._ensure_vector_store()
+            if vector_store.load_collection(silent=True):
+                self.vectorstore = vector_store.get_vectorstore()
+                self._on_collection_changed()
                 print("[RAG_CORE] Vectorstore connected to existing collection")
             return True
 
@@ -82,23 +115,18 @@ class FacilitiesRAGSystem:
             print("[ERROR] Failed to initialize LLM or embedding function")
             return False
 
-        print("[RAG_CORE] Creating MilvusStore connection...")
-        self.vector_store = MilvusStore(
-            host=Config.MILVUS_HOST,
-            port=Config.MILVUS_PORT,
-            database=Config.MILVUS_DATABASE,
-            collection_name=self.collection_name,
-            embedding_function=self.embedding_function,
-
-        )
+        print(f"[RAG_CORE] Creating {Config.VECTOR_STORE_BACKEND} vector store connection...")
+        self.vector_store = self._create_vector_store()
         
         if not self.vector_store.connect(silent=silent):
-            print("[ERROR] MilvusStore connection failed")
+            print("[ERROR] Vector store connection failed")
             return False
         
+        self.retriever = self._create_retriever()
+        
         if self.vector_store.load_collection(silent=silent):
             self.vectorstore = self.vector_store.get_vectorstore()
-            self.retriever = KnowledgeRetriever(self.vector_store, k=3)
+            self._load_chunk_indexes()
             print("[RAG_CORE] Collection loaded successfully, retriever initialized")
             return True
         else:
@@ -127,40 +155,15 @@ class FacilitiesRAGSystem:
                 print("[ERROR] Failed to initialize LLM or embedding function")
                 return False
         
-        try:
-            print("[RAG_CORE] Connecting to Milvus...")
-            connections.connect(
-                alias="default",
-                host=Config.MILVUS_HOST,
-                port=Config.MILVUS_PORT,
-            )
-        except Exception as e:
-            print(f"[ERROR] Error connecting to Milvus: {str(e)}")
+        vector_store = self._ensure_vector_store()
+        if not vector_store.connect():
+            print("[ERROR] Error connecting to the vector store")
             return False
         
-        if utility.has_collection(self.collection_name):
-            print(f"[RAG_CORE] Dropping existing collection '{self.collection_name}'...")
-            utility.drop_collection(self.collection_name)
+        with self._sync_lock:
+            summary = self._build_shadow_collection(vector_store)
         
-        all_documents = []
-        if not os.path.isdir(self.knowledge_base_dir):
-            print(f"[ERROR] Knowledge base directory not found at {self.knowledge_base_dir}")
-            return False
-
-        print(f"[RAG_CORE] Scanning directory for files...")
-        for root, _, files in os.walk(self.knowledge_base_dir):
-            for file_name in files:
-                file_path = os.path.join(root, file_name)
-                file_ext = self._get_file_extension(file_name)
-                if file_ext in self.supported_formats:
-                    print(f"[RAG_CORE] Processing file: {file_name}")
-                    processor = self.supported_formats[file_ext]
-                    processed_docs = processor(file_path, file_name)
-                    if processed_docs:
-                        all_documents.extend(processed_docs)
-                        print(f"[RAG_CORE] Added {len(processed_docs)} documents from {file_name}")
-        
-        if not all_documents:
+        if not summary["success"]:
             print("[ERROR] No documents were processed from the directory")
             return {
                 "success": False,
@@ -169,41 +172,252 @@ class FacilitiesRAGSystem:
                 "s3_url": None,
 
             }
+        
+        print(f"=== [SUCCESS] Knowledge base rebuilt with {summary['chunks_inserted']} chunks ===")
+        return True
 
-        print(f"[RAG_CORE] Total documents collected: {len(all_documents)}")
-        print("[RAG_CORE] Chunking documents...")
-        splits = self.chunker.chunk_documents(all_documents)
-        print(f"[RAG_CORE] Generated {len(splits)} chunks")
+    def sync_knowledge_base_from_directory(self):
+        """Admin function: Re-embed only the files that were added, changed or removed since the last sync"""
+        print(f"=== [RAG_CORE] Starting incremental knowledge base sync from directory: {self.knowledge_base_dir} ===")
+        
+        if not self.knowledge_base_dir or not os.path.isdir(self.knowledge_base_dir):
+            print("[INFO] No knowledge base directory configured or found")
+            return {
+                "success": False,
+                "message": "No knowledge base directory configured. Use API upload instead.",
+            }
+        
+        if not self.embedding_function or not self.llm:
+            if not self.initialize_clients(silent=True) or not self.embedding_function:
+                return {
+                    "success": False,
+                    "message": "System not initialized. Please initialize clients first.",
+                }
+        
+        vector_store = self._ensure_vector_store()
+        if not vector_store.connect(silent=True):
+            return {
+                "success": False,
+                "message": "Could not connect to the vector store.",
+            }
+        
+        with self._sync_lock:
+            if not vector_store.has_collection():
+                return self._build_shadow_collection(vector_store)
+            
+            summary = self._sync_directory(vector_store, self.kb_manifest, self.sparse_index)
+            if summary["chunks_inserted"] or summary["chunks_deleted"]:
+                self.vectorstore = vector_store.get_vectorstore()
+                self._on_collection_changed()
+            return summary
 
-        connection_args = {
-            "host": Config.MILVUS_HOST,
-            "port": Config.MILVUS_PORT,
-        }
-        if Config.MILVUS_DATABASE:
-            connection_args["db_name"] = Config.MILVUS_DATABASE
+    def _build_shadow_collection(self, vector_store: VectorStore):
+        """Build a fresh versioned collection off to the side and swap the alias to it once it is loaded"""
+        shadow_store = vector_store.create_shadow_store()
+        manifest_path = f"{self.kb_manifest.path}.building"
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+        shadow_manifest = KnowledgeBaseManifest(manifest_path)
+        shadow_sparse = BM25Index() if self.sparse_index is not None else None
+        shadow_dedup = self._create_deduplicator()
+        
+        summary = self._sync_directory(shadow_store, shadow_manifest, shadow_sparse, shadow_dedup)
+        if summary["failed"] or not summary["chunks_inserted"]:
+            print(f"[ERROR] Shadow build failed, keeping the current collection: {summary['message']}")
+            shadow_store.drop_collection()
+            os.remove(manifest_path)
+            summary["success"] = False
+            return summary
+        
+        vector_store.promote(shadow_store.collection_name)
+        os.replace(manifest_path, self.kb_manifest.path)
+        self.kb_manifest.load()
+        if shadow_sparse is not None:
+            self.sparse_index = shadow_sparse
+            if self.retriever:
+                self.retriever.sparse_index = shadow_sparse
+        self.chunk_dedup = shadow_dedup
+        self.vectorstore = vector_store.get_vectorstore()
+        self._on_collection_changed()
+        
+        vector_store.collect_garbage(keep=Config.MILVUS_KEEP_OLD_VERSIONS)
+        summary["collection"] = shadow_store.collection_name
+        return summary
 
-        print("[RAG_CORE] Creating Milvus collection from documents...")
-        self.vectorstore = Milvus.from_documents(
-            documents=splits,
-            embedding=self.embedding_function,
-            collection_name=self.collection_name,
-            connection_args=connection_args,
-        )
+    def _scan_knowledge_base_dir(self):
+        """Hash every supported file under the knowledge base directory, keyed by relative path"""
+        current_files = {}
+        for root, _, files in os.walk(self.knowledge_base_dir):
+            for file_name in files:
+                if self._get_file_extension(file_name) not in self.supported_formats:
+                    continue
+                file_path = os.path.join(root, file_name)
+                relative_path = os.path.relpath(file_path, self.knowledge_base_dir).replace(os.sep, "/")
+                current_files[relative_path] = (file_path, hash_file(file_path))
+        return current_files
+
+    def _replace_chunks(self, vector_store: VectorStore, sparse_index, old_pks: List[int],
+                        documents: Iterable[Document], dedup: ChunkDeduplicator = None,
+                        verify: bool = True) -> List[int]:
+        """Insert the new chunks before deleting the old ones so the file never drops out of search
+
+        Documents are chunked, embedded and inserted in batches, so a streamed
+        file is never held in memory as a whole. With verify, a batch whose chunks
+        are not all acknowledged fails the file. The BM25 and dedup indexes are
+        left as they were if any batch fails.
+        """
+        track_chunks = sparse_index is not None or dedup is not None
+        old_documents = vector_store.get_documents_by_pks(old_pks) if track_chunks and old_pks else []
+        # The old chunks must not suppress their own replacements as duplicates; restored on failure
+        if dedup is not None:
+            dedup.remove_documents(old_documents)
         
+        new_pks = []
+        inserted = []
         try:
-            collection = Collection(self.collection_name)
-            collection.load()
-            num_entities = collection.num_entities
-            print(f"=== [SUCCESS] Knowledge base rebuilt with {num_entities} chunks ===")
-        except Exception as e:
-            print(f"[WARNING] Collection created but verification failed: {str(e)}")
+            for batch in iter_batches(documents, Config.INGEST_DOCUMENT_BATCH_SIZE):
+                splits = self._chunk_documents(batch, dedup)
+                if not splits:
+                    continue
+                pks = vector_store.insert_documents(splits)
+                if not pks:
+                    raise RuntimeError("Insert returned no primary keys")
+                if verify and len(pks) != len(splits):
+                    raise RuntimeError(f"Insert acknowledged {len(pks)} of {len(splits)} chunks")
+                if len(pks) == len(splits):
+                    # Lets retrieval fetch a keyword hit's stored vector by primary key, as for loaded chunks
+                    for doc, pk in zip(splits, pks):
+                        doc.metadata["pk"] = pk
+                new_pks.extend(pks)
+                if track_chunks:
+                    inserted.extend(splits)
+                if sparse_index is not None:
+                    sparse_index.add_documents(splits)
+                if dedup is not None:
+                    dedup.add_documents(splits)
+        except Exception:
+            vector_store.delete_by_pks(new_pks)
+            old_keys = {document_key(doc) for doc in old_documents}
+            if sparse_index is not None:
+                sparse_index.remove_documents([doc for doc in inserted if document_key(doc) not in old_keys])
+            if dedup is not None:
+                dedup.remove_documents(inserted)
+                dedup.add_documents(old_documents)
+            raise
         
-        return True
+        vector_store.delete_by_pks(old_pks)
+        if sparse_index is not None and old_documents:
+            new_keys = {document_key(doc) for doc in inserted}
+            sparse_index.remove_documents([doc for doc in old_documents if document_key(doc) not in new_keys])
+        return new_pks
+
+    def _sync_directory(self, vector_store: VectorStore, manifest: KnowledgeBaseManifest, sparse_index,
+                        dedup: ChunkDeduplicator = None):
+        """Diff the directory against the manifest and apply only the changed files"""
+        manifest.load()
+        
+        collection_exists = vector_store.has_collection()
+        if not collection_exists and manifest.files():
+            print("[SYNC] Collection is missing, discarding stale manifest")
+            manifest.clear()
+        # A collection built before the manifest existed: adopt chunks by file title instead of duplicating them
+        adopt_existing = collection_exists and not manifest.exists
+        
+        current_files = self._scan_knowledge_base_dir()
+        tracked_files = manifest.files()
+        
+        added = sorted(path for path in current_files if path not in tracked_files)
+        updated = sorted(
+            path for path in current_files
+            if path in tracked_files and tracked_files[path]["hash"] != current_files[path][1]
+        )
+        removed = sorted(path for path in tracked_files if path not in current_files)
+        unchanged = len(current_files) - len(added) - len(updated)
+        print(f"[SYNC] added={len(added)}, updated={len(updated)}, removed={len(removed)}, unchanged={unchanged}")
+        
+        chunks_inserted = 0
+        chunks_deleted = 0
+        failed = []
+        
+        for relative_path in removed:
+            try:
+                old_pks = tracked_files[relative_path]["pks"]
+                self._replace_chunks(vector_store, sparse_index, old_pks, [], dedup)
+                chunks_deleted += len(old_pks)
+                manifest.remove(relative_path)
+                manifest.save()
+                print(f"[SYNC] Removed {len(old_pks)} chunks of {relative_path}")
+            except Exception as e:
+                print(f"[ERROR] Failed to remove {relative_path}: {str(e)}")
+                failed.append(relative_path)
+        
+        # Worker processes parse ahead while this thread chunks, embeds and inserts finished files
+        parsed_files = iter_parsed_files(
+            [(relative_path, current_files[relative_path][0]) for relative_path in added + updated],
+            max_workers=Config.INGEST_PARSE_WORKERS,
+            pages_per_task=Config.INGEST_PDF_PAGES_PER_TASK,
+            chunk_rows=Config.INGEST_TABLE_CHUNK_ROWS,
+            grouping=self.tabular_grouping,
+        )
+        for relative_path, documents, parse_error in parsed_files:
+            file_path, file_hash = current_files[relative_path]
+            try:
+                if parse_error:
+                    raise RuntimeError(f"Parsing failed: {parse_error}")
+                
+                if relative_path in tracked_files:
+                    old_pks = tracked_files[relative_path]["pks"]
+                elif adopt_existing:
+                    old_pks = vector_store.find_pks("title", os.path.basename(file_path))
+                else:
+                    old_pks = []
+                
+                new_pks = self._replace_chunks(vector_store, sparse_index, old_pks, documents, dedup)
+                chunks_inserted += len(new_pks)
+                chunks_deleted += len(old_pks)
+                manifest.set(relative_path, file_hash, new_pks)
+                manifest.save()
+                print(f"[SYNC] {relative_path}: {len(old_pks)} chunks replaced with {len(new_pks)}")
+            except Exception as e:
+                print(f"[ERROR] Failed to sync {relative_path}: {str(e)}")
+                failed.append(relative_path)
+        
+        if not manifest.exists:
+            manifest.save()
+        
+        message = (
+            f"Sync complete: {len(added)} added, {len(updated)} updated, {len(removed)} removed, "
+            f"{unchanged} unchanged ({chunks_inserted} chunks inserted, {chunks_deleted} deleted)"
+        )
+        if failed:
+            message += f", {len(failed)} failed"
+        print(f"=== [SYNC] {message} ===")
+        
+        return {
+            "success": not failed,
+            "message": message,
+            "added": added,
+            "updated": updated,
+            "removed": removed,
+            "unchanged": unchanged,
+            "failed": failed,
+            "chunks_inserted": chunks_inserted,
+            "chunks_deleted": chunks_deleted,
+        }
 
-    def process_file(self, uploaded_file):
-        """ADMIN ACTION: Add new document to existing knowledge base"""
+    def process_file(self, uploaded_file, ingest_mode: str = None, progress: Callable[[str], None] = None):
+        """ADMIN ACTION: Add new document to existing knowledge base
+
+        ingest_mode "verified" checks every chunk was acknowledged and briefly waits
+        until it is searchable; "fire_and_forget" returns right after the insert.
+        progress is called with each completed stage: uploaded, parsed, chunked,
+        embedded and indexed.
+        """
+        ingest_mode = ingest_mode or Config.INGEST_MODE
+        progress = progress or (lambda stage: None)
         print(f"\n=== [PROCESS_FILE] Starting file processing: {uploaded_file.name} ===")
-        temp_file_path = os.path.join(".", uploaded_file.name)
+        temp_dir = tempfile.mkdtemp(prefix="ingest_")
+        temp_file_path = os.path.join(temp_dir, os.path.basename(uploaded_file.name))
         s3_url = None 
         
         try:
@@ -216,21 +430,21 @@ class FacilitiesRAGSystem:
 
                 }
             
-            if utility.has_collection(self.collection_name):
+            # Only an upload into an empty knowledge base may create the collection; if one exists
+            # but cannot be loaded, fail rather than replace it with a collection holding this file
+            vector_store = self._ensure_vector_store()
+            collection_exists = vector_store.has_collection()
+            if collection_exists:
+                if not vector_store.load_collection(silent=True):
+                    print("[ERROR] Existing collection could not be loaded, upload aborted")
+                    return {
+                        "success": False,
+                        "message": "The knowledge base collection exists but could not be loaded. Please try again.",
+                        "s3_url": None,
+
+                    }
                 print("[PROCESS_FILE] Connecting to existing collection...")
-                connection_args = {
-                    "host": Config.MILVUS_HOST,
-                    "port": Config.MILVUS_PORT,
-                }
-                if Config.MILVUS_DATABASE:
-                    connection_args["db_name"] = Config.MILVUS_DATABASE
-                
-                self.vectorstore = Milvus(
-                    embedding_function=self.embedding_function,
-                    collection_name=self.collection_name,
-                    connection_args=connection_args,
-                    auto_id=True
-                )
+                self.vectorstore = vector_store.get_vectorstore()
             
             file_ext = self._get_file_extension(uploaded_file.name)
             if file_ext not in self.supported_formats:
@@ -285,142 +499,376 @@ class FacilitiesRAGSystem:
                     "s3_url": None,
 
                 }
+            progress("uploaded")
             
-            processor = self.supported_formats[file_ext]
-            processed_documents = processor(temp_file_path, uploaded_file.name)
+            if is_streamable(uploaded_file.name):
+                # Tables are read, chunked, embedded and inserted a batch at a time instead of loaded whole
+                documents = iter_file_documents(temp_file_path, uploaded_file.name,
+                                                Config.INGEST_TABLE_CHUNK_ROWS, self.tabular_grouping)
+            else:
+                documents = self.supported_formats[file_ext](temp_file_path, uploaded_file.name)
+                if not documents:
+                    print("[ERROR] No content extracted from file")
+                    return {
+                        "success": False,
+                        "message": "No content extracted from file.",
+                        "s3_url": None,
 
-            if not processed_documents:
-                print("[ERROR] No content extracted from file")
-                return {
-                    "success": False,
-                    "message": "No content extracted from file.",
-                    "s3_url": None,
+                    }
+                progress("parsed")
+            
+            parsed = {"documents": 0, "with_content": 0}
 
-                }
-    
-            for doc in processed_documents:
-                doc.metadata["s3_url"] = s3_url
-                doc.metadata["s3_object_key"] = s3_object_name
+            def tagged(documents):
+                for doc in documents:
+                    doc.metadata["s3_url"] = s3_url
+                    doc.metadata["s3_object_key"] = s3_object_name
+                    parsed["documents"] += 1
+                    parsed["with_content"] += bool(doc.page_content.strip())
+                    yield doc
             
-            splits = self.chunker.chunk_documents(processed_documents)
+            # Writes are serialised with other uploads and directory rebuilds/syncs, so two first uploads
+            # cannot each promote a collection and an upload never lands in indexes a rebuild swaps out
+            with self._sync_lock:
+                if not collection_exists and vector_store.has_collection():
+                    if not vector_store.load_collection(silent=True):
+                        raise RuntimeError("The knowledge base collection created meanwhile could not be loaded")
+                    collection_exists = True
+                    self.vectorstore = vector_store.get_vectorstore()
+                
+                if not collection_exists:
+                    print("Creating new vector store collection...")
+                    for index in (self.sparse_index, self.chunk_dedup):
+                        if index is not None:
+                            index.clear()
+                # A new knowledge base is filled as a shadow collection and only promoted once every batch is in
+                target_store = vector_store if collection_exists else vector_store.create_shadow_store()
+                try:
+                    added_ids = self._replace_chunks(target_store, self.sparse_index, [], tagged(documents),
+                                                     self.chunk_dedup, verify=ingest_mode != "fire_and_forget")
+                except Exception:
+                    if not collection_exists:
+                        target_store.drop_collection()
+                    raise
             
-            if not splits:
-                return False
-                    
-            for chunk in splits:
-                chunk.metadata["s3_url"] = s3_url
-                chunk.metadata["s3_object_key"] = s3_object_name
+                if not added_ids:
+                    if not collection_exists:
+                        target_store.drop_collection()
+                    if not parsed["documents"]:
+                        print("[ERROR] No content extracted from file")
+                        return {
+                            "success": False,
+                            "message": "No content extracted from file.",
+                            "s3_url": None,
+
+                        }
+                    if self.chunk_dedup is not None and parsed["with_content"]:
+                        print("[PROCESS_FILE] Every chunk is already indexed, nothing to insert")
+                        return {
+                            "success": True,
+                            "message": "Every chunk of this file is already in the knowledge base.",
+                            "s3_url": s3_url,
+                            "num_documents": 0,
+
+                        }
+                    return False
             
-            if self.vectorstore is None:
-                print("Creating new Milvus collection...")
-                connection_args = {
-                    "host": Config.MILVUS_HOST,
-                    "port": Config.MILVUS_PORT,
-                }
-                if Config.MILVUS_DATABASE:
-                    connection_args["db_name"] = Config.MILVUS_DATABASE
+                if is_streamable(uploaded_file.name):
+                    progress("parsed")
+                progress("chunked")
+                progress("embedded")
+            
+                if not collection_exists:
+                    vector_store.promote(target_store.collection_name)
+                    progress("indexed")
                 
-                self.vectorstore = Milvus.from_documents(
-                    documents=splits,
-                    embedding=self.embedding_function,
-                    collection_name=self.collection_name,
-                    connection_args=connection_args,
-                )
+                    self.vectorstore = vector_store.get_vectorstore()
+                    self._on_collection_changed()
                 
-                collection = Collection(self.collection_name)
-                collection.load()
-                num_entities = collection.num_entities
+                    num_entities = vector_store.count_documents()
                 
-                print(f"=== [SUCCESS] New collection created with {num_entities} chunks ===")
-                return {
-                    "success": True,
-                    "message": f"New collection created with {num_entities} chunks.",
-                    "s3_url": s3_url,
+                    print(f"=== [SUCCESS] New collection created with {num_entities} chunks ===")
+                    return {
+                        "success": True,
+                        "message": f"New collection created with {num_entities} chunks.",
+                        "s3_url": s3_url,
 
-                }
-            
-            collection = Collection(self.collection_name)
-            collection.load()
-            count_before = collection.num_entities
+                    }
             
-            added_ids = self.vectorstore.add_documents(documents=splits)
+                self._on_collection_changed()
             
-            if not added_ids:
+            if ingest_mode == "fire_and_forget":
+                progress("indexed")
+                print(f"===== Document uploaded, {len(added_ids)} chunks inserted without verification =====")
                 return {
-                    "success": False,
-                    "message": "Upload failed: No IDs returned.",
+                    "success": True,
+                    "message": f"Inserted {len(added_ids)} chunks (unverified).",
                     "s3_url": s3_url,
-                    "num_documents": len(splits),
+                    "num_documents": len(added_ids),
 
                 }
-                        
-            try:
-                collection.flush()
-                print("Data persisted to database")
-            except Exception as flush_error:
-                print(f"Flush warning: {flush_error}")
-            
-            time.sleep(2)
             
-            collection.load()
-            count_after = collection.num_entities            
-            actual_added = count_after - count_before
+            searchable = vector_store.wait_until_searchable(added_ids, Config.INGEST_READY_TIMEOUT_SECONDS)
+            if searchable:
+                print("New documents are searchable")
+            elif searchable is None:
+                print("[PROCESS_FILE] Searchability not checked (INGEST_READY_TIMEOUT_SECONDS is 0)")
+            progress("indexed")
             
-            if actual_added > 0:                
-                test_query = splits[0].page_content[:50]
-                retriever = self.vectorstore.as_retriever(search_kwargs={"k": 1})
-                test_results = retriever.invoke(test_query)
-                
-                if test_results:
-                    print("New documents are searchable")
-                
-                print("===== Document successfully processed and uploaded =====")
-                print(f"s3_url: {s3_url}")
-                return {
-                    "success": True,
-                    "message": f"Added {actual_added} new chunks (Total: {count_before} : {count_after})",
-                    "s3_url": s3_url,
-                    "num_documents": actual_added,
-
-                }
-            else:
-                return {
-                    "success": False,
-                    "message": "Upload verification failed: Document count unchanged.",
-                    "s3_url": s3_url,
-                    "num_documents": 0,
+            print("===== Document successfully processed and uploaded =====")
+            print(f"s3_url: {s3_url}")
+            return {
+                "success": True,
+                "message": f"Added {len(added_ids)} new chunks" + (" (indexing still in progress)" if searchable is False else ""),
+                "s3_url": s3_url,
+                "num_documents": len(added_ids),
 
-                }
+            }
             
         except Exception as e:
             import traceback
             print(traceback.format_exc())
             return False
         finally:
-            if os.path.exists(temp_file_path):
-                os.remove(temp_file_path)
+            shutil.rmtree(temp_dir, ignore_errors=True)
     
-    def retrieve_relevant_info(self, query: str, k: int = 3):
-        """Retrieve relevant information from all documents"""
-        if self.retriever:
-            return self.retriever.retrieve(query, k=k)
-        
+    def _create_vector_store(self) -> VectorStore:
+        """Build the configured backend: a Milvus server or the local NumPy store"""
+        if Config.VECTOR_STORE_BACKEND == "local":
+            return LocalVectorStore(
+                root_dir=Config.LOCAL_VECTOR_STORE_DIR,
+                collection_name=self.collection_name or "knowledge_base",
+                embedding_function=self.embedding_function,
+            )
+        return MilvusStore(
+            host=Config.MILVUS_HOST,
+            port=Config.MILVUS_PORT,
+            database=Config.MILVUS_DATABASE,
+            collection_name=self.collection_name,
+            embedding_function=self.embedding_function,
+            index_type=Config.MILVUS_INDEX_TYPE,
+            index_params=Config.MILVUS_INDEX_PARAMS,
+            search_params=Config.MILVUS_SEARCH_PARAMS,
+            metric_type=Config.MILVUS_METRIC_TYPE,
+        )
+
+    def _ensure_vector_store(self):
+        """Create the long-lived vector store/retriever pair used by the query path"""
+        if self.vector_store is None:
+            self.vector_store = self._create_vector_store()
+        if self.retriever is None:
+            self.retriever = self._create_retriever()
+        return self.vector_store
+
+    def _create_retriever(self):
+        return KnowledgeRetriever(
+            self.vector_store,
+            k=3,
+            sparse_index=self.sparse_index,
+            mode=Config.RETRIEVAL_MODE,
+            candidates=Config.HYBRID_CANDIDATES,
+            rrf_k=Config.HYBRID_RRF_K,
+            fetch_k=Config.RETRIEVAL_FETCH_K,
+            max_chunks=Config.CONTEXT_MAX_CHUNKS,
+            mmr_lambda=Config.MMR_LAMBDA,
+            token_budget=Config.CONTEXT_TOKEN_BUDGET,
+        )
+
+    def _create_deduplicator(self):
+        if not Config.DEDUP_ENABLED:
+            return None
+        return ChunkDeduplicator(max_distance=Config.DEDUP_MAX_DISTANCE, shingle_size=Config.DEDUP_SHINGLE_SIZE)
+
+    def _chunk_documents(self, documents: List[Document], dedup: ChunkDeduplicator = None) -> List[Document]:
+        """Strip repeated PDF headers/footers, chunk, then drop chunks that duplicate indexed or earlier ones"""
+        if dedup is None:
+            return self.chunker.chunk_documents(documents)
+        documents = remove_repeated_lines(documents, min_ratio=Config.DEDUP_REPEATED_LINE_RATIO)
+        return dedup.filter_documents(self.chunker.chunk_documents(documents))
+
+    def _load_chunk_indexes(self):
+        """Build the BM25 and dedup indexes from the chunks already in the vector store in one pass"""
+        indexes = [index for index in (self.sparse_index, self.chunk_dedup) if index is not None]
+        if not indexes:
+            return
         try:
-            if self.vectorstore and utility.has_collection(self.collection_name):
-                collection = Collection(self.collection_name)
-                collection.load()
-            
-            retriever = self.vectorstore.as_retriever(search_kwargs={"k": k})
-            relevant_docs = retriever.invoke(query)
-            return relevant_docs
+            for index in indexes:
+                index.clear()
+            for batch in iter_batches(self.vector_store.iter_documents(), Config.INGEST_DOCUMENT_BATCH_SIZE):
+                for index in indexes:
+                    index.add_documents(batch)
+            print(f"[RAG_CORE] Chunk indexes loaded with {len(indexes[0])} chunks")
         except Exception as e:
-            print(f"Error retrieving documents: {str(e)}")
+            print(f"[WARNING] Could not load chunk indexes, falling back to dense retrieval without dedup: {str(e)}")
+            for index in indexes:
+                index.clear()
+
+    def _on_collection_changed(self):
+        """Refresh the search handle and drop cached answers after ingestion"""
+        if self.vector_store:
+            self.vector_store.bump_version()
+        self.invalidate_response_cache()
+
+    def _knowledge_base_ready(self) -> bool:
+        """Check the collection is searchable using the cached search handle"""
+        if self.vectorstore is None or not self.embedding_function:
+            return False
+        return self._ensure_vector_store().is_ready()
+
+    def invalidate_response_cache(self):
+        """Drop cached answers after the collection changed"""
+        if self.response_cache:
+            self.response_cache.invalidate()
+
+    def get_response_cache_stats(self):
+        """Get semantic cache hit/miss counters"""
+        if not self.response_cache:
+            return {"enabled": False}
+        return {"enabled": True, **self.response_cache.get_stats()}
+
+    def _embed_query(self, query: str):
+        """Embed the query once so cache lookup and retrieval can share it"""
+        try:
+            return self.embedding_function.embed_query(query)
+        except Exception as e:
+            print(f"[WARNING] Query embedding failed, falling back to text retrieval: {str(e)}")
+            return None
+
+    def retrieve_relevant_info(self, query: str, k: int = None, query_embedding: List[float] = None):
+        """Retrieve relevant information from all documents
+
+        Without an explicit k, candidates are reranked and packed into the
+        configured prompt token budget.
+        """
+        if not self.embedding_function:
             return []
+        
+        self._ensure_vector_store()
+        if k is not None:
+            return self.retriever.retrieve(query, k=k, query_embedding=query_embedding)
+        return self.retriever.retrieve_packed(query, query_embedding=query_embedding)
+
+    def clear_conversation(self, conversation_id: str = None):
+        """Forget the chat memory of one conversation (or all of them)"""
+        self.memory.clear(conversation_id)
+
+    def _build_prompt(self, query: str, relevant_docs: List[Document], conversation_id: str = None) -> str:
+        """Build the RAG prompt from retrieved context and the conversation's recent turns"""
+        context = "\n\n".join([doc.page_content for doc in relevant_docs])
+
+        history_context = ""
+        history = self.memory.get_history(conversation_id)
+        if history:
+            history_context = "Previous conversation:\n"
+            for msg in history:
+                history_context += f"{msg['role']}: {msg['content']}\n"
+
+        return f"""You are a professional and specialized Facilities Management Assistant. Your ONLY function is to answer questions related to the building's facilities, amenities, policies, and procedures, based STRICTLY on the context provided.
+
+            If the user's question is NOT related to facilities management, you MUST politely refuse to answer.
+
+            {history_context}
+
+            Context from facilities documents:
+            {context}
+
+            Current Question: {query}
+
+            Based on these strict instructions, please provide your response."""
+
+    @staticmethod
+    def _extract_token_usage(response):
+        """Read token usage from an LLM response message"""
+        if hasattr(response, 'response_metadata'):
+            usage = response.response_metadata.get('token_usage', {})
+            if usage:
+                return {
+                    "prompt_tokens": usage.get('prompt_tokens', 0),
+                    "completion_tokens": usage.get('completion_tokens', 0),
+                    "total_tokens": usage.get('total_tokens', 0)
+                }
+        return None
+
+    def _use_response_cache(self, conversation_id: str = None) -> bool:
+        """Cached answers are keyed on the query alone, so only turns without conversation history use the cache"""
+        return bool(self.response_cache) and not self.memory.get_history(conversation_id)
+
+    def _cached_response(self, query: str, query_embedding, conversation_id: str = None):
+        """Return a semantic cache hit formatted as a response, or None"""
+        if not self._use_response_cache(conversation_id):
+            return None
+
+        cached = self.response_cache.lookup(query_embedding)
+        if not cached:
+            return None
+
+        print(f"[RAG_CORE] Semantic cache hit (similarity={cached['similarity']}) for: {cached['matched_query']}")
+        self.memory.add_turn(conversation_id, query, cached["answer"])
+        return {
+            "answer": cached["answer"],
+            "sources": cached["sources"],
+            "token_usage": None,
+            "cached": True,
+            "error": False,
+        }
+
+    def _flight_key(self, query: str, conversation_id: str = None):
+        """Requests coalesce only when they would build the same prompt against the same knowledge base"""
+        history = self.memory.get_history(conversation_id)
+        history_key = hash(tuple((msg["role"], msg["content"]) for msg in history)) if history else None
+        version = self.vector_store.collection_version if self.vector_store else 0
+        return " ".join(query.lower().split()).rstrip("?!. "), version, history_key
+
+    def get_single_flight_stats(self):
+        """Number of requests that shared an identical in-flight answer"""
+        return {"coalesced": self._flights.coalesced + self._async_flights.coalesced}
+
+    def _answer(self, query: str, query_embedding, conversation_id: str = None):
+        """Retrieve and call the LLM, returns (relevant_docs, response) with response None when nothing matched"""
+        relevant_docs = self.retrieve_relevant_info(query, query_embedding=query_embedding)
+        if not relevant_docs:
+            return relevant_docs, None
+        prompt = self._build_prompt(query, relevant_docs, conversation_id)
+        return relevant_docs, self.llm.invoke(prompt)
+
+    async def _aanswer(self, query: str, query_embedding, conversation_id: str = None):
+        """Async variant of _answer"""
+        relevant_docs = await asyncio.to_thread(self.retrieve_relevant_info, query, None, query_embedding)
+        if not relevant_docs:
+            return relevant_docs, None
+        prompt = self._build_prompt(query, relevant_docs, conversation_id)
+        return relevant_docs, await self.llm.ainvoke(prompt)
+
+    def _finalize_response(self, query: str, query_embedding, relevant_docs: List[Document], response,
+                           conversation_id: str = None, shared: bool = False):
+        """Record history, populate the cache and build the response dict
 
-    def generate_response_stream(self, query: str):
+        A shared (coalesced) result reports no token usage and skips the cache,
+        the caller that ran the pipeline already accounted for both.
+        """
+        answer = response.content
+        token_usage = None if shared else self._extract_token_usage(response)
+        cacheable = not shared and self._use_response_cache(conversation_id)
+
+        self.memory.add_turn(conversation_id, query, answer)
+
+        if cacheable:
+            self.response_cache.store(query, query_embedding, answer, relevant_docs)
+
+        return {
+            "answer": answer,
+            "sources": relevant_docs,
+            "token_usage": token_usage,
+            "cached": False,
+            "coalesced": shared,
+            "error": False,
+
+        }
+
+    def generate_response_stream(self, query: str, conversation_id: str = None):
         """Generate a streaming response using RAG"""
         try:
-            if not self.vectorstore or not utility.has_collection(self.collection_name):
+            if not self._knowledge_base_ready():
                 def error_stream():
                     yield "The knowledge base has not been initialized. Please contact an administrator."
                 return {
@@ -440,25 +888,7 @@ class FacilitiesRAGSystem:
                     "error": True
                 }
             
-            context = "\n\n".join([doc.page_content for doc in relevant_docs])
-            history_context = ""
-            if self.chat_history:
-                history_context = "Previous conversation:\n"
-                for msg in self.chat_history[-4:]:
-                    history_context += f"{msg['role']}: {msg['content']}\n"
-            
-            prompt = f"""You are a professional and specialized Facilities Management Assistant. Your ONLY function is to answer questions related to the building's facilities, amenities, policies, and procedures, based STRICTLY on the context provided.
-
-            If the user's question is NOT related to facilities management, you MUST politely refuse to answer.
-
-            {history_context}
-
-            Context from facilities documents:
-            {context}
-
-            Current Question: {query}
-
-            Based on these strict instructions, please provide your response."""
+            prompt = self._build_prompt(query, relevant_docs, conversation_id)
             
             def stream_generator():
                 stream = self.llm.stream(prompt)
@@ -480,65 +910,74 @@ class FacilitiesRAGSystem:
                 "error": True
             }
 
-    def generate_response(self, query: str):
+    def generate_response(self, query: str, conversation_id: str = None):
         """Generate response using RAG"""
         try:
-            if not self.vectorstore or not utility.has_collection(self.collection_name):
+            if not self._knowledge_base_ready():
                 return {"answer": "The knowledge base has not been initialized. Please contact an administrator.", "sources": [], "error": True}
 
-            relevant_docs = self.retrieve_relevant_info(query)
+            query_embedding = self._embed_query(query) if self.response_cache else None
 
-            if not relevant_docs:
+            cached_response = self._cached_response(query, query_embedding, conversation_id)
+            if cached_response:
+                return cached_response
+
+            (relevant_docs, response), shared = self._flights.do(
+                self._flight_key(query, conversation_id),
+                lambda: self._answer(query, query_embedding, conversation_id)
+            )
+
+            if response is None:
                 return {
                     "answer": "I could not find relevant information in the facilities knowledge base to answer your question.",
                     "sources": [],
                     "error": True
                 }
 
-            context = "\n\n".join([doc.page_content for doc in relevant_docs])
-
-            history_context = ""
-            if self.chat_history:
-                history_context = "Previous conversation:\n"
-                for msg in self.chat_history[-4:]:
-                    history_context += f"{msg['role']}: {msg['content']}\n"
-
-            prompt = f"""You are a professional and specialized Facilities Management Assistant. Your ONLY function is to answer questions related to the building's facilities, amenities, policies, and procedures, based STRICTLY on the context provided.
-
-            If the user's question is NOT related to facilities management, you MUST politely refuse to answer.
-
-            {history_context}
+            return self._finalize_response(query, query_embedding, relevant_docs, response, conversation_id, shared)
+        except Exception as e:
+            print(f"[ERROR] Error generating response: {str(e)}")
+            return {
+                "answer": f"Sorry, I encountered an error: {str(e)}",
+                "sources": [],
+                "token_usage": None,
+                "error": True,
+                
+            }
 
-            Context from facilities documents:
-            {context}
+    async def _aembed_query(self, query: str):
+        """Async variant of _embed_query"""
+        try:
+            return await self.embedding_function.aembed_query(query)
+        except Exception as e:
+            print(f"[WARNING] Query embedding failed, falling back to text retrieval: {str(e)}")
+            return None
 
-            Current Question: {query}
+    async def agenerate_response(self, query: str, conversation_id: str = None):
+        """Generate response using RAG without blocking the event loop"""
+        try:
+            if not await asyncio.to_thread(self._knowledge_base_ready):
+                return {"answer": "The knowledge base has not been initialized. Please contact an administrator.", "sources": [], "error": True}
 
-            Based on these strict instructions, please provide your response."""
+            query_embedding = await self._aembed_query(query) if self.response_cache else None
 
-            response = self.llm.invoke(prompt)
-            answer = response.content
-
-            token_usage = None
-            if hasattr(response, 'response_metadata'):
-                usage = response.response_metadata.get('token_usage', {})
-                if usage:
-                    token_usage = {
-                        "prompt_tokens": usage.get('prompt_tokens', 0),
-                        "completion_tokens": usage.get('completion_tokens', 0),
-                        "total_tokens": usage.get('total_tokens', 0)
-                    }
+            cached_response = self._cached_response(query, query_embedding, conversation_id)
+            if cached_response:
+                return cached_response
 
-            self.chat_history.append({"role": "user", "content": query})
-            self.chat_history.append({"role": "assistant", "content": answer})
+            (relevant_docs, response), shared = await self._async_flights.do(
+                self._flight_key(query, conversation_id),
+                lambda: self._aanswer(query, query_embedding, conversation_id)
+            )
 
-            return {
-                "answer": answer,
-                "sources": relevant_docs,
-                "token_usage": token_usage,
-                "error": False,
+            if response is None:
+                return {
+                    "answer": "I could not find relevant information in the facilities knowledge base to answer your question.",
+                    "sources": [],
+                    "error": True
+                }
 
-            }
+            return self._finalize_response(query, query_embedding, relevant_docs, response, conversation_id, shared)
         except Exception as e:
             print(f"[ERROR] Error generating response: {str(e)}")
             return {
@@ -546,144 +985,96 @@ class FacilitiesRAGSystem:
                 "sources": [],
                 "token_usage": None,
                 "error": True,
-                
+
             }
 
+    async def agenerate_response_stream(self, query: str, conversation_id: str = None):
+        """Stream a RAG response as events: sources first, then tokens, then usage"""
+        try:
+            if not await asyncio.to_thread(self._knowledge_base_ready):
+                yield {"type": "error", "content": "The knowledge base has not been initialized. Please contact an administrator."}
+                return
+
+            query_embedding = await self._aembed_query(query) if self.response_cache else None
+
+            cached_response = self._cached_response(query, query_embedding, conversation_id)
+            if cached_response:
+                yield {"type": "sources", "sources": cached_response["sources"]}
+                yield {"type": "token", "content": cached_response["answer"]}
+                yield {"type": "usage", "token_usage": None, "cached": True}
+                return
+
+            cacheable = self._use_response_cache(conversation_id)
+            answer_parts = []
+            relevant_docs = []
+            shared = False
+            usage_event = None
+            events = self._async_flights.stream(
+                self._flight_key(query, conversation_id),
+                lambda: self._astream_answer(query, query_embedding, conversation_id)
+            )
+            async for event, shared in events:
+                if event["type"] == "sources":
+                    relevant_docs = event["sources"]
+                elif event["type"] == "token":
+                    answer_parts.append(event["content"])
+                elif event["type"] == "usage":
+                    # Only the request that ran the LLM reports its usage
+                    usage_event = {**event, "token_usage": None if shared else event["token_usage"], "coalesced": shared}
+                    continue
+                yield event
+                if event["type"] == "error":
+                    return
+
+            # Record the turn before the final event, clients may stop reading as soon as usage arrives
+            answer = "".join(answer_parts)
+            self.memory.add_turn(conversation_id, query, answer)
+
+            if cacheable and not shared:
+                self.response_cache.store(query, query_embedding, answer, relevant_docs)
+
+            if usage_event is not None:
+                yield usage_event
+        except Exception as e:
+            print(f"[ERROR] Error streaming response: {str(e)}")
+            yield {"type": "error", "content": f"Sorry, I encountered an error: {str(e)}"}
+
+    async def _astream_answer(self, query: str, query_embedding, conversation_id: str = None):
+        """Retrieve and stream the LLM answer as sources, token and usage events"""
+        relevant_docs = await asyncio.to_thread(self.retrieve_relevant_info, query, None, query_embedding)
+
+        if not relevant_docs:
+            yield {"type": "error", "content": "I could not find relevant information in the facilities knowledge base to answer your question."}
+            return
+
+        yield {"type": "sources", "sources": relevant_docs}
+
+        prompt = self._build_prompt(query, relevant_docs, conversation_id)
+        token_usage = None
+        async for chunk in self.llm.astream(prompt):
+            if chunk.content:
+                yield {"type": "token", "content": chunk.content}
+            if chunk.usage_metadata:
+                token_usage = {
+                    "prompt_tokens": chunk.usage_metadata.get("input_tokens", 0),
+                    "completion_tokens": chunk.usage_metadata.get("output_tokens", 0),
+                    "total_tokens": chunk.usage_metadata.get("total_tokens", 0)
+                }
+
+        yield {"type": "usage", "token_usage": token_usage, "cached": False}
+
     def _get_file_extension(self, filename: str) -> str:
         return filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
     
     def _process_pdf_file(self, temp_file_path: str, filename: str) -> List[Document]:
         """Process PDF with image detection"""
-        try:
-            print(f"[PDF_PROCESSOR] Loading PDF: {filename}")
-            loader = PyPDFLoader(temp_file_path)
-            documents = loader.load()
-            
-            if not documents:
-                print(f"[ERROR] PDF contains no pages: {filename}")
-                return []
-            
-            total_text_length = sum(len(doc.page_content.strip()) for doc in documents)
-            avg_text_per_page = total_text_length / len(documents) if documents else 0
-            
-            print(f"[PDF_PROCESSOR] Pages: {len(documents)}, Avg text/page: {avg_text_per_page:.2f} chars")
-            
-            if avg_text_per_page < 50:
-                print("[ERROR] Image-based PDF detected (avg < 50 chars/page)")
-                print("[INFO] Solution: Convert to text-based PDF using OCR tools")
-                return []
-            
-            processed_documents = []
-            
-            for idx, doc in enumerate(documents):
-                content = doc.page_content.strip()
-                
-                if len(content) < 10:
-                    continue
-                
-                new_metadata = {
-                    "title": filename, 
-                    "source": f"{filename} (Page {doc.metadata.get('page', idx) + 1})", 
-                    "file_type": "pdf",
-                    "row_number": 0,
-                    "sheet_name": "",
-                    "section_number": idx + 1,
-                    "page_number": doc.metadata.get('page', idx) + 1
-                }
-                
-                processed_doc = Document(page_content=content, metadata=new_metadata)
-                processed_documents.append(processed_doc)
-            
-            if not processed_documents:
-                print(f"[ERROR] No readable text found in {filename}")
-                return []
-            
-            print(f"[PDF_PROCESSOR] Successfully processed {len(processed_documents)} pages")
-            return processed_documents
-            
-        except Exception as e:
-            print(f"[ERROR] Error processing PDF: {str(e)}")
-            return []
+        return parse_pdf(temp_file_path, filename)
 
     def _process_csv_file(self, temp_file_path: str, filename: str) -> List[Document]:
-        try:
-            print(f"[CSV_PROCESSOR] Loading CSV: {filename}")
-            df = pd.read_csv(temp_file_path)
-            processed_documents = []
-            for idx, row in df.iterrows():
-                content_parts = [f"{col}: {value}" for col, value in row.items() if pd.notna(value)]
-                content = "\n".join(content_parts)
-                new_metadata = {
-                    "title": filename, 
-                    "source": f"{filename} (Row {idx + 1})", 
-                    "file_type": "csv", 
-                    "row_number": idx + 1,
-                    "sheet_name": "",
-                    "section_number": 0
-                }
-                processed_doc = Document(page_content=content, metadata=new_metadata)
-                processed_documents.append(processed_doc)
-            print(f"[CSV_PROCESSOR] Successfully processed {len(processed_documents)} rows")
-            return processed_documents
-        except Exception as e:
-            print(f"[ERROR] Error processing CSV: {str(e)}")
-            return []
+        return parse_csv(temp_file_path, filename, self.tabular_grouping)
     
     def _process_excel_file(self, temp_file_path: str, filename: str) -> List[Document]:
-        try:
-            print(f"[EXCEL_PROCESSOR] Loading Excel: {filename}")
-            excel_file = pd.ExcelFile(temp_file_path)
-            processed_documents = []
-            for sheet_name in excel_file.sheet_names:
-                print(f"[EXCEL_PROCESSOR] Processing sheet: {sheet_name}")
-                df = pd.read_excel(temp_file_path, sheet_name=sheet_name)
-                for idx, row in df.iterrows():
-                    content_parts = [f"Sheet: {sheet_name}"] + [f"{col}: {value}" for col, value in row.items() if pd.notna(value)]
-                    content = "\n".join(content_parts)
-                    
-                    new_metadata = {
-                        "title": filename, 
-                        "source": f"{filename} (Sheet: {sheet_name}, Row {idx + 1})", 
-                        "file_type": "excel", 
-                        "sheet_name": sheet_name, 
-                        "row_number": idx + 1,
-                        "section_number": 0
-                    }
-                    processed_doc = Document(page_content=content, metadata=new_metadata)
-                    processed_documents.append(processed_doc)
-            print(f"[EXCEL_PROCESSOR] Successfully processed {len(processed_documents)} rows across {len(excel_file.sheet_names)} sheets")
-            return processed_documents
-        except Exception as e:
-            print(f"[ERROR] Error processing Excel: {str(e)}")
-            return []
+        return parse_excel(temp_file_path, filename, self.tabular_grouping)
     
     def _process_text_file(self, temp_file_path: str, filename: str) -> List[Document]:
-        try:
-            print(f"[TXT_PROCESSOR] Loading text file: {filename}")
-            with open(temp_file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-        except UnicodeDecodeError:
-            try:
-                with open(temp_file_path, 'r', encoding='latin-1') as f:
-                    content = f.read()
-            except Exception as e:
-                print(f"[ERROR] Error processing text file: {str(e)}")
-                return []
-        
-        paragraphs = content.split('\n\n')
-        processed_documents = []
-        for idx, paragraph in enumerate(paragraphs):
-            if paragraph.strip():
-                new_metadata = {
-                    "title": filename, 
-                    "source": f"{filename} (Section {idx + 1})", 
-                    "file_type": "txt", 
-                    "section_number": idx + 1,
-                    "row_number": 0,
-                    "sheet_name": ""
-                }
-                processed_doc = Document(page_content=paragraph.strip(), metadata=new_metadata)
-                processed_documents.append(processed_doc)
-        print(f"[TXT_PROCESSOR] Successfully processed {len(processed_documents)} paragraphs")
-        return processed_documents
-    
+        return parse_text(temp_file_path, filename)
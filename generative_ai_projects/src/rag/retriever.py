@@ -2,36 +2,99 @@
 Retriever Module - Document Retrieval
 """
 
-from typing import List
+from typing import List, Tuple
 from langchain_core.documents import Document
 import streamlit as st
 
+from src.rag.sparse_index import reciprocal_rank_fusion, document_key
+from src.rag.context_packer import mmr_select, pack_context
+from src.utils.token_counter import count_tokens
+
 
 class KnowledgeRetriever:
     """Handles document retrieval"""
-    
-    def __init__(self, vector_store, k: int = 3):
+
+    def __init__(self, vector_store, k: int = 3, sparse_index=None, mode: str = "dense",
+                 candidates: int = 20, rrf_k: int = 60, fetch_k: int = 12, max_chunks: int = 6,
+                 mmr_lambda: float = 0.7, token_budget: int = 1500):
         self.vector_store = vector_store
         self.k = k
-    
-    def retrieve(self, query: str, k: int = None) -> List[Document]:
+        self.sparse_index = sparse_index
+        self.mode = mode
+        self.candidates = candidates
+        self.rrf_k = rrf_k
+        self.fetch_k = fetch_k
+        self.max_chunks = max_chunks
+        self.mmr_lambda = mmr_lambda
+        self.token_budget = token_budget
+
+    def _use_hybrid(self) -> bool:
+        return self.mode == "hybrid" and self.sparse_index is not None and len(self.sparse_index) > 0
+
+    def retrieve(self, query: str, k: int = None, query_embedding: List[float] = None) -> List[Document]:
         """Retrieve relevant documents"""
         try:
-            vectorstore = self.vector_store.get_vectorstore()
-            
-            if not vectorstore or not self.vector_store.has_collection():
-                return []
-            
             num_docs = k if k is not None else self.k
-            
-            retriever = vectorstore.as_retriever(search_kwargs={"k": num_docs})
-            relevant_docs = retriever.invoke(query)
-            
-            return relevant_docs
+
+            if query_embedding is None:
+                query_embedding = self.vector_store.embedding_function.embed_query(query)
+
+            if not self._use_hybrid():
+                return self.vector_store.search_by_vector(query_embedding, k=num_docs)
+
+            num_candidates = max(num_docs, self.candidates)
+            dense_docs = self.vector_store.search_by_vector(query_embedding, k=num_candidates)
+            sparse_docs = [doc for doc, _ in self.sparse_index.search(query, k=num_candidates)]
+
+            return reciprocal_rank_fusion([dense_docs, sparse_docs], k=num_docs, rrf_k=self.rrf_k)
         except Exception as e:
             st.error(f"Error retrieving documents: {str(e)}")
             return []
-    
+
+    def retrieve_candidates(self, query: str, fetch_k: int, query_embedding: List[float]) -> List[Tuple[Document, List[float]]]:
+        """Over-fetch candidates together with their embeddings"""
+        dense = self.vector_store.search_with_vectors(query_embedding, k=fetch_k)
+        if not self._use_hybrid():
+            return dense
+
+        sparse_docs = [doc for doc, _ in self.sparse_index.search(query, k=fetch_k)]
+        fused = reciprocal_rank_fusion([[doc for doc, _ in dense], sparse_docs], k=fetch_k, rrf_k=self.rrf_k)
+
+        vectors = {document_key(doc): vector for doc, vector in dense}
+        missing = [doc for doc in fused if document_key(doc) not in vectors]
+        if missing:
+            # Keyword-only hits carry their primary key, so their stored vectors are fetched rather than re-embedded
+            stored = self.vector_store.get_vectors_by_pks(
+                [doc.metadata["pk"] for doc in missing if doc.metadata.get("pk") is not None]
+            )
+            unresolved = []
+            for doc in missing:
+                vector = stored.get(doc.metadata.get("pk"))
+                if vector is None:
+                    unresolved.append(doc)
+                else:
+                    vectors[document_key(doc)] = vector
+            if unresolved:
+                # Chunks indexed without a primary key are embedded, normally as embedding cache hits
+                texts = [doc.page_content for doc in unresolved]
+                for doc, vector in zip(unresolved, self.vector_store.embedding_function.embed_documents(texts)):
+                    vectors[document_key(doc)] = vector
+
+        return [(doc, vectors[document_key(doc)]) for doc in fused]
+
+    def retrieve_packed(self, query: str, query_embedding: List[float] = None) -> List[Document]:
+        """Over-fetch, rerank with MMR and pack the best chunks into the prompt token budget"""
+        try:
+            if query_embedding is None:
+                query_embedding = self.vector_store.embedding_function.embed_query(query)
+
+            candidates = self.retrieve_candidates(query, max(self.fetch_k, self.max_chunks), query_embedding)
+            ranked = mmr_select(query_embedding, candidates, k=self.max_chunks, lambda_mult=self.mmr_lambda)
+            return pack_context(ranked, self.token_budget, count_tokens)
+        except Exception as e:
+            st.error(f"Error retrieving documents: {str(e)}")
+            return []
+
     def get_context_string(self, documents: List[Document]) -> str:
         """Convert documents to context string"""
         return "\n\n".join([doc.page_content for doc in documents])
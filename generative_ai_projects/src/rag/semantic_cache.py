@@ -0,0 +1,127 @@
+"""
+Semantic Cache Module - Reuse answers for paraphrased questions
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+
+
+class SemanticResponseCache:
+    """In-memory answer cache matched on query-embedding cosine similarity"""
+
+    def __init__(self, similarity_threshold: float = 0.92, ttl_seconds: int = 3600, max_entries: int = 500):
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self._entries = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+        print(f"[SEMANTIC_CACHE] Initialized with threshold={similarity_threshold}, ttl={ttl_seconds}s, max_entries={max_entries}")
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> Optional[np.ndarray]:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if not norm:
+            return None
+        return vector / norm
+
+    def _purge_expired(self, now: float):
+        expired = [key for key, entry in self._entries.items() if now - entry["created_at"] > self.ttl_seconds]
+        for key in expired:
+            del self._entries[key]
+        self.expirations += len(expired)
+
+    def lookup(self, query_embedding: List[float]) -> Optional[dict]:
+        """Return the cached answer for the most similar previous query, if close enough"""
+        vector = self._normalize(query_embedding) if query_embedding is not None else None
+
+        with self._lock:
+            if vector is None:
+                self.misses += 1
+                return None
+
+            self._purge_expired(time.time())
+
+            if not self._entries:
+                self.misses += 1
+                return None
+
+            keys = list(self._entries.keys())
+            matrix = np.stack([self._entries[key]["embedding"] for key in keys])
+            similarities = matrix @ vector
+            best = int(np.argmax(similarities))
+            best_similarity = float(similarities[best])
+
+            if best_similarity < self.similarity_threshold:
+                self.misses += 1
+                return None
+
+            key = keys[best]
+            self._entries.move_to_end(key)
+            entry = self._entries[key]
+            self.hits += 1
+
+            return {
+                "answer": entry["answer"],
+                "sources": list(entry["sources"]),
+                "matched_query": entry["query"],
+                "similarity": round(best_similarity, 4),
+            }
+
+    def store(self, query: str, query_embedding: List[float], answer: str, sources: list):
+        """Cache a generated answer under its query embedding"""
+        vector = self._normalize(query_embedding) if query_embedding is not None else None
+        if vector is None:
+            return
+
+        with self._lock:
+            self._entries[self._next_id] = {
+                "query": query,
+                "embedding": vector,
+                "answer": answer,
+                "sources": list(sources),
+                "created_at": time.time(),
+            }
+            self._next_id += 1
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self):
+        """Drop every cached answer (knowledge base changed)"""
+        with self._lock:
+            if self._entries:
+                print(f"[SEMANTIC_CACHE] Invalidating {len(self._entries)} cached answers")
+            self._entries.clear()
+            self.invalidations += 1
+
+    def get_stats(self) -> dict:
+        """Get hit/miss counters for threshold tuning"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "similarity_threshold": self.similarity_threshold,
+                "ttl_seconds": self.ttl_seconds,
+            }
@@ -0,0 +1,136 @@
+"""
+Sparse Index Module - Incremental BM25 keyword index over chunks
+"""
+
+import hashlib
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Iterable, List, Tuple
+
+from langchain_core.documents import Document
+
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_./][a-z0-9]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens; codes like HR-12 are kept whole and also split into parts"""
+    tokens = []
+    for match in TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(match)
+        if not match.isalnum():
+            tokens.extend(part for part in re.split(r"[-_./]", match) if part)
+    return tokens
+
+
+def document_key(doc: Document) -> str:
+    """Stable key shared by dense and sparse results for the same chunk"""
+    source = str(doc.metadata.get("source", ""))
+    return hashlib.sha1(f"{source}\x00{doc.page_content}".encode("utf-8")).hexdigest()
+
+
+class BM25Index:
+    """In-memory BM25 inverted index maintained incrementally as chunks are ingested"""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+
+        self._postings = defaultdict(dict)
+        self._doc_lengths = {}
+        self._documents = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._documents)
+
+    def add_documents(self, documents: Iterable[Document]) -> int:
+        """Index chunks that are not indexed yet, returns the number added"""
+        added = 0
+        with self._lock:
+            for doc in documents:
+                key = document_key(doc)
+                if key in self._documents:
+                    continue
+
+                term_counts = Counter(tokenize(doc.page_content))
+                for term, count in term_counts.items():
+                    self._postings[term][key] = count
+
+                length = sum(term_counts.values())
+                self._doc_lengths[key] = length
+                self._total_length += length
+                self._documents[key] = doc
+                added += 1
+        return added
+
+    def remove_documents(self, documents: Iterable[Document]) -> int:
+        """Drop chunks from the index, returns the number removed"""
+        removed = 0
+        with self._lock:
+            for doc in documents:
+                key = document_key(doc)
+                if key not in self._documents:
+                    continue
+
+                for term in set(tokenize(self._documents.pop(key).page_content)):
+                    postings = self._postings.get(term)
+                    if postings is not None:
+                        postings.pop(key, None)
+                        if not postings:
+                            del self._postings[term]
+
+                self._total_length -= self._doc_lengths.pop(key)
+                removed += 1
+        return removed
+
+    def clear(self):
+        """Remove every indexed chunk"""
+        with self._lock:
+            self._postings.clear()
+            self._doc_lengths.clear()
+            self._documents.clear()
+            self._total_length = 0
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[Document, float]]:
+        """Return the top-k chunks by BM25 score"""
+        query_terms = set(tokenize(query))
+
+        with self._lock:
+            num_docs = len(self._documents)
+            if not num_docs or not query_terms:
+                return []
+
+            avg_length = self._total_length / num_docs
+            scores = defaultdict(float)
+
+            for term in query_terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+
+                idf = math.log(1 + (num_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for key, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[key] / avg_length)
+                    scores[key] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+            return [(self._documents[key], score) for key, score in ranked]
+
+
+def reciprocal_rank_fusion(result_lists: List[List[Document]], k: int, rrf_k: int = 60) -> List[Document]:
+    """Fuse ranked result lists with reciprocal rank fusion, keeping the first copy of each chunk"""
+    scores = defaultdict(float)
+    documents = {}
+
+    for results in result_lists:
+        for rank, doc in enumerate(results):
+            key = document_key(doc)
+            scores[key] += 1.0 / (rrf_k + rank + 1)
+            documents.setdefault(key, doc)
+
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+    return [documents[key] for key, _ in ranked]
@@ -2,16 +2,173 @@
 Vector Store Module - Milvus Operations
 """
 
-from typing import List
+import json
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, Optional, Tuple
 from langchain_core.documents import Document
 from langchain_community.vectorstores import Milvus
 from pymilvus import connections, utility, Collection, db
+from pymilvus.client.types import LoadState
 
 
-class MilvusStore:
+DEFAULT_INDEX_PARAMS = {
+    "IVF_FLAT": {"nlist": 1024},
+    "IVF_SQ8": {"nlist": 1024},
+    "IVF_PQ": {"nlist": 1024, "m": 8},
+    "HNSW": {"M": 16, "efConstruction": 200},
+    "FLAT": {},
+    "AUTOINDEX": {},
+}
+
+
+DEFAULT_SEARCH_PARAMS = {
+    "IVF_FLAT": {"nprobe": 10},
+    "IVF_SQ8": {"nprobe": 10},
+    "IVF_PQ": {"nprobe": 10},
+    "HNSW": {"ef": 10},
+    "FLAT": {},
+    "AUTOINDEX": {},
+}
+
+
+CHUNK_METADATA_DEFAULTS = {
+    "title": "",
+    "source": "",
+    "file_type": "",
+    "page_number": 0,
+    "row_number": 0,
+    "row_start": 0,
+    "row_end": 0,
+    "sheet_name": "",
+    "section_number": 0,
+    "s3_url": "",
+    "s3_object_key": "",
+    "duplicate_sources": "",
+}
+
+
+def normalize_chunk_metadata(documents: List[Document]):
+    """Give every chunk the same metadata fields, the first insert fixes the collection schema"""
+    for doc in documents:
+        for field, default in CHUNK_METADATA_DEFAULTS.items():
+            doc.metadata.setdefault(field, default)
+
+
+def sort_versions(collection_name: str, names) -> List[str]:
+    """The `<collection_name>_v<number>` names among names, oldest version first"""
+    pattern = re.compile(rf"{re.escape(collection_name)}_v(\d+)")
+    versions = [(int(match.group(1)), name) for name in names if (match := pattern.fullmatch(name))]
+    return [name for _, name in sorted(versions)]
+
+
+class VectorStore(ABC):
+    """Backend interface the RAG pipeline uses to store, version and search chunks
+
+    A store is bound to a collection_name that queries read from; rebuilds fill a
+    shadow store and promote() repoints the name at it.
+    """
+
+    collection_name: str
+    embedding_function = None
+    collection_version = 0
+
+    def bump_version(self):
+        """Mark the collection as changed so cached search state is rebuilt on next use"""
+        self.collection_version += 1
+
+    @abstractmethod
+    def connect(self, silent=False) -> bool:
+        """Open the backend connection"""
+
+    @abstractmethod
+    def has_collection(self) -> bool:
+        """Check the collection (or the alias) exists"""
+
+    @abstractmethod
+    def load_collection(self, silent=False) -> bool:
+        """Load an existing collection for search, False when there is none"""
+
+    @abstractmethod
+    def drop_collection(self) -> bool:
+        """Drop the collection and its alias"""
+
+    @abstractmethod
+    def create_shadow_store(self) -> "VectorStore":
+        """A store bound to a new versioned collection that can be filled without affecting queries"""
+
+    @abstractmethod
+    def promote(self, shadow_name: str):
+        """Point collection_name at the shadow collection"""
+
+    @abstractmethod
+    def collect_garbage(self, keep: int = 1) -> List[str]:
+        """Drop old versions, keeping the newest `keep` for rollback"""
+
+    @abstractmethod
+    def insert_documents(self, documents: List[Document]) -> List[int]:
+        """Embed and insert documents, returns their primary keys"""
+
+    @abstractmethod
+    def wait_until_searchable(self, pks: List[int], timeout: float) -> Optional[bool]:
+        """Wait at most timeout seconds until inserted chunks are visible to queries
+
+        None means nothing was checked (no keys or no timeout), not that the chunks are visible.
+        """
+
+    @abstractmethod
+    def find_pks(self, field: str, value) -> List[int]:
+        """Primary keys of the chunks whose metadata field equals value"""
+
+    @abstractmethod
+    def get_documents_by_pks(self, pks: List[int]) -> List[Document]:
+        """Fetch stored chunks by primary key"""
+
+    @abstractmethod
+    def delete_by_pks(self, pks: List[int]) -> int:
+        """Delete chunks by primary key"""
+
+    @abstractmethod
+    def get_vectorstore(self):
+        """Handle for the loaded collection, None when nothing is loaded"""
+
+    @abstractmethod
+    def is_ready(self) -> bool:
+        """Check the collection is searchable"""
+
+    @abstractmethod
+    def search_by_vector(self, embedding: List[float], k: int = 3) -> List[Document]:
+        """Top-k chunks for a query embedding"""
+
+    @abstractmethod
+    def search_with_vectors(self, embedding: List[float], k: int = 3) -> List[Tuple[Document, List[float]]]:
+        """Top-k chunks with their stored embeddings"""
+
+    @abstractmethod
+    def get_vectors_by_pks(self, pks: List[int]) -> Dict[int, List[float]]:
+        """Stored embeddings by primary key"""
+
+    @abstractmethod
+    def iter_documents(self, batch_size: int = 1000) -> Iterator[Document]:
+        """Yield every stored chunk"""
+
+    @abstractmethod
+    def count_documents(self) -> int:
+        """Number of stored chunks"""
+
+    @abstractmethod
+    def get_collection_stats(self) -> Optional[dict]:
+        """Collection statistics, None when there is no collection"""
+
+
+class MilvusStore(VectorStore):
     """Milvus vector store operations"""
     
-    def __init__(self, host: str, port: str, database: str, collection_name: str, embedding_function):
+    def __init__(self, host: str, port: str, database: str, collection_name: str, embedding_function,
+                 index_type: str = None, index_params: dict = None, search_params: dict = None,
+                 metric_type: str = "L2"):
         self.host = host
         self.port = port
         self.database = database
@@ -19,6 +176,23 @@ class MilvusStore:
         self.embedding_function = embedding_function
         self.vectorstore = None
         
+        # Index settings apply when a collection is created; search params override the per-index defaults
+        self.index_type = (index_type or "").upper() or None
+        self.index_params = index_params
+        self.search_params = search_params or {}
+        self.metric_type = metric_type
+        
+        self.text_field = "text"
+        self.vector_field = "vector"
+        self.primary_field = "pk"
+        
+        self.collection_version = 0
+        self._search_collection = None
+        self._search_params = None
+        self._output_fields = None
+        self._handle_version = -1
+        self._insert_lock = threading.Lock()
+        
         self.connection_args = {
             "host": host,
             "port": port,
@@ -29,6 +203,33 @@ class MilvusStore:
         
         print(f"[MILVUS_STORE] Initialized with host={host}:{port}, db={database}, collection={collection_name}")
     
+    def _index_spec(self) -> Optional[dict]:
+        """Index definition for new collections, None leaves the choice to langchain"""
+        if not self.index_type:
+            return None
+        params = self.index_params if self.index_params is not None else DEFAULT_INDEX_PARAMS.get(self.index_type, {})
+        return {"index_type": self.index_type, "metric_type": self.metric_type, "params": dict(params)}
+    
+    def _search_params_for(self, index_type: str) -> dict:
+        """Default search params of an index type with configured values for the keys it understands"""
+        params = dict(DEFAULT_SEARCH_PARAMS.get(index_type, {}))
+        params.update({key: value for key, value in self.search_params.items() if key in params})
+        return params
+    
+    def _langchain_store(self) -> Milvus:
+        index_spec = self._index_spec()
+        search_spec = None
+        if index_spec:
+            search_spec = {"metric_type": self.metric_type, "params": self._search_params_for(self.index_type)}
+        return Milvus(
+            embedding_function=self.embedding_function,
+            collection_name=self.collection_name,
+            connection_args=self.connection_args,
+            index_params=index_spec,
+            search_params=search_spec,
+            auto_id=True
+        )
+    
     def connect(self, silent=False):
         """Connect to Milvus with database selection"""
         try:
@@ -84,16 +285,12 @@ class MilvusStore:
             if not silent:
                 print(f"[MILVUS_STORE] Loading existing collection: {self.collection_name}")
             
-            self.vectorstore = Milvus(
-                embedding_function=self.embedding_function,
-                collection_name=self.collection_name,
-                connection_args=self.connection_args,
-                auto_id=True
-            )
+            self.vectorstore = self._langchain_store()
             
             collection = Collection(self.collection_name)
             collection.load()
             num_entities = collection.num_entities
+            self.bump_version()
             
             if not silent:
                 print(f"[MILVUS_STORE] Loaded collection with {num_entities} documents")
@@ -105,21 +302,19 @@ class MilvusStore:
                 print(f"[WARNING] Collection exists but load had an issue: {e}")
             return False
     
-    def create_collection(self, documents: List[Document]):
-        """Create new collection from documents"""
+    def create_collection(self, documents: List[Document], index_type: str = None, index_params: dict = None):
+        """Create new collection from documents, optionally with a different index than configured"""
         try:
             print(f"[MILVUS_STORE] Creating new collection '{self.collection_name}'...")
             
-            self.vectorstore = Milvus.from_documents(
-                documents=documents,
-                embedding=self.embedding_function,
-                collection_name=self.collection_name,
-                connection_args=self.connection_args,
-            )
+            shadow_store = self.create_shadow_store()
+            if index_type:
+                shadow_store.index_type = index_type.upper()
+                shadow_store.index_params = index_params
+            shadow_store.insert_documents(documents)
+            self.promote(shadow_store.collection_name)
             
-            collection = Collection(self.collection_name)
-            collection.load()
-            num_entities = collection.num_entities
+            num_entities = Collection(self.collection_name).num_entities
             
             print(f"[MILVUS_STORE] Collection created with {num_entities} entities")
             return num_entities
@@ -129,64 +324,315 @@ class MilvusStore:
             raise
     
     def drop_collection(self):
-        """Drop collection"""
+        """Drop collection (and the alias pointing at it)"""
         try:
             if self.has_collection():
-                utility.drop_collection(self.collection_name)
-                print(f"[MILVUS_STORE] Collection '{self.collection_name}' dropped")
+                target = self.resolve_collection()
+                if target and target != self.collection_name:
+                    utility.drop_alias(self.collection_name)
+                utility.drop_collection(target or self.collection_name)
+                self.vectorstore = None
+                self.bump_version()
+                print(f"[MILVUS_STORE] Collection '{target or self.collection_name}' dropped")
                 return True
             return False
         except Exception as e:
             print(f"[ERROR] Error dropping collection: {str(e)}")
             return False
     
-    def add_documents(self, documents: List[Document]):
-        """Add documents to existing collection"""
-        import time
+    def _version_prefix(self) -> str:
+        return f"{self.collection_name}_v"
+    
+    def list_versions(self) -> List[str]:
+        """Physical versioned collections behind the alias, oldest first"""
+        return sort_versions(self.collection_name, utility.list_collections())
+    
+    def resolve_collection(self) -> Optional[str]:
+        """Physical collection the alias points at, the legacy unaliased collection, or None"""
+        if self.collection_name in utility.list_collections():
+            return self.collection_name
+        for name in reversed(self.list_versions()):
+            if self.collection_name in utility.list_aliases(name):
+                return name
+        return None
+    
+    def create_shadow_store(self) -> "MilvusStore":
+        """A store bound to a new versioned collection that can be filled without affecting queries"""
+        shadow_name = f"{self._version_prefix()}{int(time.time() * 1000)}"
+        print(f"[MILVUS_STORE] Building shadow collection '{shadow_name}'")
+        return MilvusStore(
+            host=self.host,
+            port=self.port,
+            database=self.database,
+            collection_name=shadow_name,
+            embedding_function=self.embedding_function,
+            index_type=self.index_type,
+            index_params=self.index_params,
+            search_params=self.search_params,
+            metric_type=self.metric_type,
+        )
+    
+    def promote(self, shadow_name: str):
+        """Make sure the shadow collection is indexed and loaded, then atomically repoint the alias to it"""
+        collection = Collection(shadow_name)
+        collection.flush()
+        utility.wait_for_index_building_complete(shadow_name)
+        collection.load()
+        utility.wait_for_loading_complete(shadow_name)
+        
+        current = self.resolve_collection()
+        if current == self.collection_name:
+            # One-time migration: a plain collection holds the alias name, so it is renamed to the
+            # oldest version slot and stays available for rollback until garbage collection
+            legacy_name = f"{self._version_prefix()}0"
+            print(f"[MILVUS_STORE] Migrating legacy collection '{self.collection_name}' to '{legacy_name}'")
+            utility.rename_collection(self.collection_name, legacy_name)
+            try:
+                utility.create_alias(shadow_name, self.collection_name)
+            except Exception:
+                utility.rename_collection(legacy_name, self.collection_name)
+                raise
+            current = legacy_name
+        elif current is None:
+            utility.create_alias(shadow_name, self.collection_name)
+        else:
+            utility.alter_alias(shadow_name, self.collection_name)
+        
+        self.vectorstore = self._langchain_store()
+        self.bump_version()
+        print(f"[MILVUS_STORE] Alias '{self.collection_name}' now points at '{shadow_name}' (was {current})")
+    
+    def collect_garbage(self, keep: int = 1) -> List[str]:
+        """Drop old versions no longer behind the alias, keeping the newest `keep` for rollback"""
+        current = self.resolve_collection()
+        stale = [name for name in self.list_versions() if name != current]
+        to_drop = stale[:-keep] if keep > 0 else stale
         
+        for name in to_drop:
+            try:
+                utility.drop_collection(name)
+                print(f"[MILVUS_STORE] Dropped old collection version '{name}'")
+            except Exception as e:
+                print(f"[WARNING] Could not drop old collection version '{name}': {e}")
+        return to_drop
+    
+    def add_documents(self, documents: List[Document], verify: bool = True, ready_timeout: float = 0.0):
+        """Add documents to existing collection
+
+        Verification checks the insert acknowledged a primary key per document and,
+        with ready_timeout > 0, waits at most that long for them to become searchable.
+        """
         try:
-            collection = Collection(self.collection_name)
-            collection.load()
-            count_before = collection.num_entities
+            added_ids = self.insert_documents(documents)
             
-            print(f"[MILVUS_STORE] Current document count: {count_before}")
-            
-            added_ids = self.vectorstore.add_documents(documents=documents)
+            if not verify:
+                print(f"[MILVUS_STORE] Inserted {len(added_ids)} chunks (unverified)")
+                return True
             
-            if not added_ids:
-                print("[ERROR] Upload failed: No IDs returned")
+            if len(added_ids) != len(documents):
+                print(f"[ERROR] Upload verification failed: IDs returned: {len(added_ids)}, Expected: {len(documents)}")
                 return False
             
-            print(f"[MILVUS_STORE] Received {len(added_ids)} IDs from upload")
+            if self.wait_until_searchable(added_ids, ready_timeout) is False:
+                print("[WARNING] Chunks inserted but not searchable yet")
             
-            try:
-                collection.flush()
-            except Exception as flush_error:
-                print(f"[WARNING] Flush warning: {flush_error}")
-            
-            time.sleep(2)
-            
-            collection.load()
-            count_after = collection.num_entities
-            
-            actual_added = count_after - count_before
-            
-            if actual_added > 0:
-                print(f"[SUCCESS] Added {actual_added} new chunks (Total: {count_before} → {count_after})")
-                return True
-            else:
-                print(f"[ERROR] Upload verification failed: Document count unchanged ({count_before})")
-                print(f"[ERROR] IDs returned: {len(added_ids)}, Expected: {len(documents)}, Actual: {actual_added}")
-                return False
+            print(f"[SUCCESS] Added {len(added_ids)} new chunks")
+            return True
                 
         except Exception as e:
             print(f"[ERROR] Error adding documents: {str(e)}")
             return False
     
+    def wait_until_searchable(self, pks: List[int], timeout: float) -> Optional[bool]:
+        """Wait at most timeout seconds until the newest inserted chunk is visible to queries, None when not checked"""
+        if not pks or not timeout or timeout <= 0:
+            return None
+        try:
+            rows = Collection(self.collection_name).query(
+                expr=f"{self.primary_field} in [{int(pks[-1])}]",
+                output_fields=[self.primary_field],
+                consistency_level="Strong",
+                timeout=timeout,
+            )
+            return bool(rows)
+        except Exception as e:
+            print(f"[WARNING] Readiness wait did not complete within {timeout}s: {e}")
+            return False
+    
+    def insert_documents(self, documents: List[Document]) -> List[int]:
+        """Embed and insert documents, creating the collection on first insert, returns their primary keys"""
+        normalize_chunk_metadata(documents)
+        
+        with self._insert_lock:
+            if self.vectorstore is None:
+                self.vectorstore = self._langchain_store()
+            
+            pks = self.vectorstore.add_documents(documents=documents)
+        self.bump_version()
+        return list(pks or [])
+    
+    def query_pks(self, expr: str) -> List[int]:
+        """Primary keys of the chunks matching a boolean expression"""
+        if not self.has_collection():
+            return []
+        collection = Collection(self.collection_name)
+        return [row[self.primary_field] for row in collection.query(expr=expr, output_fields=[self.primary_field])]
+    
+    def find_pks(self, field: str, value) -> List[int]:
+        """Primary keys of the chunks whose metadata field equals value"""
+        return self.query_pks(f"{field} == {json.dumps(value)}")
+    
+    def get_documents_by_pks(self, pks: List[int]) -> List[Document]:
+        """Fetch stored chunks by primary key"""
+        if not pks or not self.has_collection():
+            return []
+        collection = Collection(self.collection_name)
+        output_fields = [field.name for field in collection.schema.fields if field.name != self.vector_field]
+        
+        documents = []
+        for start in range(0, len(pks), 1000):
+            batch = [int(pk) for pk in pks[start:start + 1000]]
+            for row in collection.query(expr=f"{self.primary_field} in {batch}", output_fields=output_fields):
+                metadata = {field: row.get(field) for field in output_fields}
+                documents.append(Document(page_content=metadata.pop(self.text_field, ""), metadata=metadata))
+        return documents
+    
+    def delete_by_pks(self, pks: List[int]) -> int:
+        """Delete chunks by primary key, returns the number of delete requests issued"""
+        if not pks or not self.has_collection():
+            return 0
+        collection = Collection(self.collection_name)
+        deleted = 0
+        for start in range(0, len(pks), 1000):
+            batch = [int(pk) for pk in pks[start:start + 1000]]
+            collection.delete(expr=f"{self.primary_field} in {batch}")
+            deleted += len(batch)
+        self.bump_version()
+        return deleted
+    
     def get_vectorstore(self):
         """Get vectorstore instance"""
         return self.vectorstore
     
+    def _refresh_search_handle(self):
+        """Resolve collection existence, load state, search params and output fields once per version"""
+        version = self.collection_version
+        self._search_collection = None
+        
+        load_state = utility.load_state(self.collection_name)
+        if load_state == LoadState.NotExist:
+            self._handle_version = version
+            return None
+        
+        collection = Collection(self.collection_name)
+        if load_state == LoadState.NotLoad:
+            collection.load()
+        
+        index_type, metric_type = "AUTOINDEX", "L2"
+        for index in collection.indexes:
+            if index.field_name == self.vector_field:
+                index_type = index.params.get("index_type", index_type)
+                metric_type = index.params.get("metric_type", metric_type)
+        
+        self._search_params = {
+            "metric_type": metric_type,
+            "params": self._search_params_for(index_type),
+        }
+        self._output_fields = [field.name for field in collection.schema.fields if field.name != self.vector_field]
+        self._search_collection = collection
+        self._handle_version = version
+        
+        print(f"[MILVUS_STORE] Search handle ready (version={version}, index={index_type}, metric={metric_type}, params={self._search_params['params']})")
+        return collection
+    
+    def _get_search_collection(self):
+        if self._handle_version != self.collection_version:
+            return self._refresh_search_handle()
+        return self._search_collection
+    
+    def is_ready(self) -> bool:
+        """Check the collection is searchable without a per-call round trip"""
+        try:
+            return self._get_search_collection() is not None
+        except Exception as e:
+            print(f"[WARNING] Search handle refresh failed: {e}")
+            self._handle_version = -1
+            return False
+    
+    def search_by_vector(self, embedding: List[float], k: int = 3) -> List[Document]:
+        """Search the collection directly with pre-built search params"""
+        return [doc for doc, _ in self._search(embedding, k, include_vectors=False)]
+    
+    def search_with_vectors(self, embedding: List[float], k: int = 3) -> List[Tuple[Document, List[float]]]:
+        """Search and also return each hit's stored embedding (for reranking)"""
+        return self._search(embedding, k, include_vectors=True)
+    
+    def get_vectors_by_pks(self, pks: List[int]) -> Dict[int, List[float]]:
+        """Stored embeddings by primary key, read from the collection queries use"""
+        collection = self._get_search_collection()
+        if not pks or collection is None:
+            return {}
+        batch = [int(pk) for pk in pks]
+        rows = collection.query(expr=f"{self.primary_field} in {batch}",
+                                output_fields=[self.primary_field, self.vector_field])
+        return {row[self.primary_field]: list(row[self.vector_field]) for row in rows}
+    
+    def _search(self, embedding: List[float], k: int, include_vectors: bool):
+        for attempt in range(2):
+            collection = self._get_search_collection()
+            if collection is None:
+                return []
+            
+            param = {"metric_type": self._search_params["metric_type"], "params": dict(self._search_params["params"])}
+            if "ef" in param["params"]:
+                param["params"]["ef"] = max(param["params"]["ef"], k)
+            
+            try:
+                results = collection.search(
+                    data=[embedding],
+                    anns_field=self.vector_field,
+                    param=param,
+                    limit=k,
+                    output_fields=self._output_fields + ([self.vector_field] if include_vectors else []),
+                )
+                break
+            except Exception as e:
+                if attempt == 1:
+                    raise
+                print(f"[WARNING] Search failed, refreshing search handle: {e}")
+                self._handle_version = -1
+        
+        documents = []
+        for hit in results[0]:
+            metadata = {field: hit.entity.get(field) for field in self._output_fields}
+            vector = list(hit.entity.get(self.vector_field)) if include_vectors else None
+            documents.append((Document(page_content=metadata.pop(self.text_field, ""), metadata=metadata), vector))
+        return documents
+    
+    def iter_documents(self, batch_size: int = 1000):
+        """Yield every stored chunk as a Document (used to warm in-memory indexes)"""
+        collection = self._get_search_collection()
+        if collection is None:
+            return
+        
+        iterator = collection.query_iterator(batch_size=batch_size, output_fields=self._output_fields)
+        try:
+            while True:
+                batch = iterator.next()
+                if not batch:
+                    break
+                for row in batch:
+                    metadata = {field: row.get(field) for field in self._output_fields}
+                    yield Document(page_content=metadata.pop(self.text_field, ""), metadata=metadata)
+        finally:
+            iterator.close()
+    
+    def count_documents(self) -> int:
+        """Number of stored chunks"""
+        if not self.has_collection():
+            return 0
+        return Collection(self.collection_name).num_entities
+    
     def get_collection_stats(self):
         """Get collection statistics"""
         try:
@@ -0,0 +1,129 @@
+"""
+Single Flight Module - Coalesce identical concurrent calls into one execution
+"""
+
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Awaitable, Callable, Hashable, Tuple
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Thread variant: callers with the same key while one call is running wait for and share its result"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Run fn once per in-flight key, returns (result, shared)
+
+        shared is False only for the caller that ran fn; errors are raised to every caller.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result, False
+
+
+class _Broadcast:
+    """Events of one running stream, replayed to late subscribers"""
+
+    def __init__(self):
+        self.task = None  # the pump task, referenced here so it is not garbage collected mid-stream
+        self.events = []
+        self.finished = False
+        self.error = None
+        self.changed = asyncio.Event()
+
+
+class AsyncSingleFlight:
+    """Asyncio variant for coroutines and async streams
+
+    The shared work runs in its own task, so a caller that disconnects does not
+    cancel it for the others.
+    """
+
+    def __init__(self):
+        self._tasks = {}
+        self._streams = {}
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Await fn once per in-flight key, returns (result, shared)"""
+        task = self._tasks.get(key)
+        shared = task is not None
+        if shared:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        return await asyncio.shield(task), shared
+
+    async def stream(self, key: Hashable, fn: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Tuple[Any, bool]]:
+        """Iterate fn() once per in-flight key, yielding (event, shared) to every subscriber from the start"""
+        broadcast = self._streams.get(key)
+        shared = broadcast is not None
+        if shared:
+            self.coalesced += 1
+        else:
+            broadcast = self._streams[key] = _Broadcast()
+
+            async def pump():
+                try:
+                    async for event in fn():
+                        broadcast.events.append(event)
+                        broadcast.changed.set()
+                except Exception as e:
+                    broadcast.error = e
+                finally:
+                    broadcast.finished = True
+                    self._streams.pop(key, None)
+                    broadcast.changed.set()
+
+            broadcast.task = asyncio.ensure_future(pump())
+
+        position = 0
+        while True:
+            while position < len(broadcast.events):
+                yield broadcast.events[position], shared
+                position += 1
+            if broadcast.finished:
+                break
+            broadcast.changed.clear()
+            if position < len(broadcast.events) or broadcast.finished:
+                continue
+            await broadcast.changed.wait()
+        if broadcast.error is not None:
+            raise broadcast.error
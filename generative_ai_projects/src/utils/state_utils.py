@@ -1,5 +1,6 @@
 # src/utils/state_utils.py
 
+import uuid
 import streamlit as st
 
 def initialize_session_state():
@@ -12,4 +13,6 @@ def initialize_session_state():
         st.session_state.system_initialized = False
     if 'processed_file_id' not in st.session_state:
         st.session_state.processed_file_id = None
+    if 'memory_conversation_id' not in st.session_state:
+        st.session_state.memory_conversation_id = str(uuid.uuid4())
         
\ No newline at end of file
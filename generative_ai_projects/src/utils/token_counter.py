@@ -0,0 +1,57 @@
+import logging
+from functools import lru_cache
+from typing import Iterable, List
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENCODING = "cl100k_base"
+CACHE_MAX_CHARS = 20000
+
+_encoders = {}
+
+
+def get_encoder(encoding_name: str = DEFAULT_ENCODING):
+    """Get the cached tiktoken encoder, or None when it cannot be loaded (e.g. offline)"""
+    if encoding_name not in _encoders:
+        try:
+            import tiktoken
+            _encoders[encoding_name] = tiktoken.get_encoding(encoding_name)
+        except Exception as e:
+            logger.warning(f"tiktoken unavailable, using character estimate for token counts: {e}")
+            _encoders[encoding_name] = None
+    return _encoders[encoding_name]
+
+
+def _estimate_tokens(text: str) -> int:
+    return (len(text) + 3) // 4
+
+
+def _encode_length(text: str, encoding_name: str) -> int:
+    encoder = get_encoder(encoding_name)
+    if encoder is None:
+        return _estimate_tokens(text)
+    return len(encoder.encode_ordinary(text))
+
+
+@lru_cache(maxsize=16384)
+def _cached_length(text: str, encoding_name: str) -> int:
+    return _encode_length(text, encoding_name)
+
+
+def count_tokens(text: str, encoding_name: str = DEFAULT_ENCODING) -> int:
+    """Count tokens with tiktoken, falling back to ~4 characters per token
+
+    Short texts are memoized, so the splitter and context packer never tokenize the same piece twice.
+    """
+    if len(text) > CACHE_MAX_CHARS:
+        return _encode_length(text, encoding_name)
+    return _cached_length(text, encoding_name)
+
+
+def count_tokens_batch(texts: Iterable[str], encoding_name: str = DEFAULT_ENCODING) -> List[int]:
+    """Count tokens for many texts in one tiktoken call"""
+    texts = list(texts)
+    encoder = get_encoder(encoding_name)
+    if encoder is None:
+        return [_estimate_tokens(text) for text in texts]
+    return [len(tokens) for tokens in encoder.encode_ordinary_batch(texts)]
@@ -0,0 +1,23 @@
+"""
+Tests for the config env parsing helpers
+"""
+
+from config.constant_config import _env, _env_bool, _env_float, _env_int
+
+
+def test_empty_env_values_fall_back_to_defaults(monkeypatch):
+    monkeypatch.setenv("TEST_CONFIG_VALUE", "")
+
+    assert _env("TEST_CONFIG_VALUE", "dense") == "dense"
+    assert _env_int("TEST_CONFIG_VALUE", 500) == 500
+    assert _env_float("TEST_CONFIG_VALUE", 0.92) == 0.92
+    assert _env_bool("TEST_CONFIG_VALUE", True) is True
+
+
+def test_set_env_values_are_parsed(monkeypatch):
+    monkeypatch.setenv("TEST_CONFIG_VALUE", "7")
+    monkeypatch.setenv("TEST_CONFIG_FLAG", "FALSE")
+
+    assert _env_int("TEST_CONFIG_VALUE", 500) == 7
+    assert _env_float("TEST_CONFIG_VALUE", 0.92) == 7.0
+    assert _env_bool("TEST_CONFIG_FLAG", True) is False
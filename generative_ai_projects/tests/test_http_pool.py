@@ -0,0 +1,62 @@
+"""
+Tests for the shared LLM HTTP pool, without sending any requests
+"""
+
+import asyncio
+
+import litellm
+import pytest
+from litellm.llms.custom_httpx.http_handler import AsyncHTTPHandler, HTTPHandler
+
+from src.llm.http_pool import HttpClientRegistry
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr(litellm, "client_session", None)
+    monkeypatch.setattr(litellm, "aclient_session", None)
+    registry = HttpClientRegistry()
+    yield registry
+    registry.close()
+
+
+def test_async_client_per_event_loop(registry):
+    async def installed_client():
+        registry.install()
+        assert litellm.aclient_session is registry.async_client
+        return registry.async_client
+
+    first = asyncio.run(installed_client())
+    second = asyncio.run(installed_client())
+
+    assert first is not second
+    assert litellm.client_session is registry.client
+
+
+def test_closed_clients_are_rebuilt_and_reinstalled(registry):
+    async def run():
+        registry.install()
+        closed = registry.async_client
+        await registry.aclose()
+        rebuilt = registry.async_client
+        return closed, rebuilt
+
+    closed, rebuilt = asyncio.run(run())
+
+    assert closed.is_closed and not rebuilt.is_closed
+    assert litellm.aclient_session is rebuilt
+    client = registry.client
+    assert litellm.client_session is client and not client.is_closed
+
+
+def test_gemini_gets_pooled_handlers(registry):
+    sync_handler = registry.provider_client("gemini/gemini-2.5-flash")
+
+    async def async_handler():
+        return registry.provider_client("gemini/gemini-2.5-flash", is_async=True), registry.async_client
+
+    handler, client = asyncio.run(async_handler())
+
+    assert isinstance(sync_handler, HTTPHandler) and sync_handler.client is registry.client
+    assert isinstance(handler, AsyncHTTPHandler) and handler.client is client
+    assert registry.provider_client("azure/gpt-4o") is None
@@ -0,0 +1,103 @@
+"""
+Tests for the in-process ingest job queue
+"""
+
+import threading
+import time
+
+import pytest
+
+from src.rag.ingest_jobs import INGEST_STAGES, IngestJobQueue, IngestQueueFullError
+
+
+def wait_for(queue: IngestJobQueue, job_id: str, timeout: float = 5.0) -> dict:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job["finished_at"] is not None:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish within {timeout}s")
+
+
+def test_submit_runs_job_and_records_stage_timings():
+    def handler(payload, progress):
+        for stage in INGEST_STAGES:
+            progress(stage)
+        return {"success": True, "num_documents": payload["chunks"]}
+
+    queue = IngestJobQueue(handler, max_workers=1)
+    try:
+        job_id = queue.submit({"chunks": 3}, filename="rooms.csv")
+        job = wait_for(queue, job_id)
+    finally:
+        queue.shutdown()
+
+    assert job["status"] == "succeeded"
+    assert job["filename"] == "rooms.csv"
+    assert job["result"] == {"success": True, "num_documents": 3}
+    assert job["stage"] == "indexed"
+    assert [stage["stage"] for stage in job["stages"]] == list(INGEST_STAGES)
+    assert all(stage["duration_seconds"] >= 0 for stage in job["stages"])
+    assert job["queue_seconds"] >= 0 and job["run_seconds"] >= 0
+    assert queue.get_stats()["pending"] == 0
+
+
+def test_failed_result_and_exception_mark_job_failed():
+    def handler(payload, progress):
+        progress("uploaded")
+        if payload["raise"]:
+            raise ValueError("parser crashed")
+        return {"success": False, "message": "No content extracted from file."}
+
+    queue = IngestJobQueue(handler, max_workers=1)
+    try:
+        rejected = wait_for(queue, queue.submit({"raise": False}))
+        crashed = wait_for(queue, queue.submit({"raise": True}))
+    finally:
+        queue.shutdown()
+
+    assert rejected["status"] == "failed"
+    assert rejected["error"] == "No content extracted from file."
+    assert crashed["status"] == "failed"
+    assert crashed["error"] == "parser crashed"
+    assert crashed["stage"] == "uploaded"
+
+
+def test_submit_rejects_when_queue_is_full():
+    release = threading.Event()
+
+    def handler(payload, progress):
+        release.wait(5)
+        return {"success": True}
+
+    queue = IngestJobQueue(handler, max_workers=1, max_pending=2)
+    try:
+        first = queue.submit({})
+        second = queue.submit({})
+        with pytest.raises(IngestQueueFullError):
+            queue.submit({})
+        assert queue.get_stats()["pending"] == 2
+
+        release.set()
+        wait_for(queue, first)
+        wait_for(queue, second)
+        queue.submit({})
+    finally:
+        release.set()
+        queue.shutdown()
+
+
+def test_unknown_job_and_retention_cap():
+    queue = IngestJobQueue(lambda payload, progress: {"success": True}, max_workers=1, max_retained=2)
+    try:
+        job_ids = []
+        for _ in range(3):
+            job_ids.append(queue.submit({}))
+            wait_for(queue, job_ids[-1])
+    finally:
+        queue.shutdown()
+
+    assert queue.get("missing") is None
+    assert queue.get(job_ids[0]) is None
+    assert queue.get(job_ids[2])["status"] == "succeeded"
@@ -0,0 +1,93 @@
+"""
+Tests for the local NumPy vector store using a fake embedder instead of a provider
+"""
+
+import pytest
+from langchain_core.documents import Document
+
+import src.rag.local_vector_store as local_store_module
+from src.rag.local_vector_store import LocalVectorStore
+
+
+class FakeEmbeddings:
+    """Maps each known text to a fixed direction so nearest neighbours are predictable"""
+
+    VECTORS = {
+        "boiler room": [1.0, 0.0, 0.0],
+        "roof access": [0.0, 1.0, 0.0],
+        "fire exit": [0.0, 0.0, 1.0],
+    }
+
+    def embed_documents(self, texts):
+        return [self.VECTORS.get(text, [1.0, 1.0, 1.0]) for text in texts]
+
+
+def documents(*texts):
+    return [Document(page_content=text, metadata={"source": f"{text}.txt"}) for text in texts]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return LocalVectorStore(str(tmp_path), "kb", FakeEmbeddings())
+
+
+def test_insert_search_and_delete_round_trip(store):
+    pks = store.insert_documents(documents("boiler room", "roof access", "fire exit"))
+
+    assert pks == [1, 2, 3]
+    assert store.count_documents() == 3
+    hits = store.search_by_vector([0.0, 0.9, 0.1], k=1)
+    assert [doc.page_content for doc in hits] == ["roof access"]
+    assert hits[0].metadata["pk"] == 2
+    assert store.find_pks("source", "fire exit.txt") == [3]
+
+    assert store.delete_by_pks([2, 99]) == 1
+    assert store.count_documents() == 2
+    assert store.get_documents_by_pks([2]) == []
+    assert list(store.get_vectors_by_pks([1, 2])) == [1]
+    assert "roof access" not in [doc.page_content for doc in store.search_by_vector([0.0, 1.0, 0.0], k=3)]
+
+
+def test_data_survives_reopening(store, tmp_path):
+    store.insert_documents(documents("boiler room", "roof access"))
+    store.delete_by_pks([2])
+
+    reopened = LocalVectorStore(str(tmp_path), "kb", FakeEmbeddings())
+
+    assert reopened.count_documents() == 1
+    assert reopened.insert_documents(documents("fire exit")) == [3]
+
+
+def test_shadow_store_is_invisible_until_promoted(store):
+    store.insert_documents(documents("boiler room"))
+
+    shadow = store.create_shadow_store()
+    shadow.insert_documents(documents("roof access", "fire exit"))
+
+    assert store.count_documents() == 1
+
+    store.promote(shadow.collection_name)
+
+    assert store.resolve_collection() == shadow.collection_name
+    assert store.count_documents() == 2
+    # The unaliased collection is kept as the oldest version for rollback
+    assert store.list_versions() == ["kb_v0", shadow.collection_name]
+    assert store.collect_garbage(keep=0) == ["kb_v0"]
+
+
+def test_compaction_keeps_primary_keys_unique(store, monkeypatch):
+    monkeypatch.setattr(local_store_module, "COMPACT_MIN_DELETED_ROWS", 1)
+    shadow = store.create_shadow_store()
+    shadow.insert_documents(documents("boiler room", "roof access", "fire exit", "lift"))
+    store.promote(shadow.collection_name)
+
+    store.delete_by_pks([3, 4, 2])
+
+    assert store.resolve_collection() != shadow.collection_name
+    assert store.count_documents() == 1
+    assert [doc.metadata["pk"] for doc in store.iter_documents()] == [1]
+    # Deleted keys are never handed out again, also after reopening the compacted folder
+    assert store.insert_documents(documents("roof access")) == [5]
+    reopened = LocalVectorStore(store.root_dir, "kb", store.embedding_function)
+    assert reopened.insert_documents(documents("fire exit")) == [6]
+    assert sorted(doc.metadata["pk"] for doc in reopened.iter_documents()) == [1, 5, 6]
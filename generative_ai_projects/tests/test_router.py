@@ -0,0 +1,197 @@
+"""
+Tests for the LLM router using fake completion functions instead of a provider
+"""
+
+import asyncio
+import itertools
+import time
+
+import pytest
+
+import src.llm.router as router_module
+from config.constant_config import Config
+from src.llm.router import Deployment, LLMRouter
+
+
+_names = itertools.count()
+
+
+class ProviderError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"provider returned {status_code}")
+        self.status_code = status_code
+
+
+def deployments(*labels):
+    """Deployments with unique names, circuit breakers are process-wide per name"""
+    run = next(_names)
+    return [Deployment(f"{label}-{run}", f"fake/{label}") for label in labels]
+
+
+def fake_completion(behaviour: dict, calls: list):
+    """completion_fn answering per model: a number sleeps then answers, an exception is raised"""
+    def completion(model, messages, **kwargs):
+        calls.append(model)
+        outcome = behaviour[model]
+        if isinstance(outcome, Exception):
+            raise outcome
+        time.sleep(outcome)
+        return f"answer from {model}"
+    return completion
+
+
+def fake_acompletion(behaviour: dict, calls: list):
+    async def acompletion(model, messages, **kwargs):
+        calls.append(model)
+        outcome = behaviour[model]
+        if isinstance(outcome, Exception):
+            raise outcome
+        await asyncio.sleep(outcome)
+        return f"answer from {model}"
+    return acompletion
+
+
+MESSAGES = [{"role": "user", "content": "Is the AC in room 12 fixed?"}]
+
+
+def test_rank_explores_unmeasured_then_prefers_fast_then_unhealthy():
+    slow, fast, streamed, unmeasured, failing = deployments("slow", "fast", "streamed", "unmeasured", "failing")
+    for _ in range(5):
+        slow.record(0.8, True)
+        fast.record(0.1, True)
+        # Streams record outcomes without latency, enough of them count as explored
+        streamed.record(None, True)
+        failing.record(None, False)
+
+    router = LLMRouter([slow, fast, streamed, unmeasured, failing], completion_fn=lambda **kwargs: None)
+
+    assert router.rank() == [unmeasured, fast, slow, streamed, failing]
+
+
+def test_fresh_secondary_is_explored_and_kept_once_measured_faster():
+    primary, secondary = deployments("primary", "secondary")
+    for _ in range(5):
+        primary.record(0.8, True)
+    calls = []
+    behaviour = {primary.model: 0.05, secondary.model: 0}
+    router = LLMRouter([primary, secondary], completion_fn=fake_completion(behaviour, calls))
+
+    assert router.rank() == [secondary, primary]
+    for _ in range(6):
+        router.complete(MESSAGES)
+
+    assert calls == [secondary.model] * 6
+    assert secondary.percentile(0.95) < primary.percentile(0.95)
+    assert router.rank() == [secondary, primary]
+
+
+def test_complete_falls_back_on_server_error():
+    primary, secondary = deployments("primary", "secondary")
+    calls = []
+    behaviour = {primary.model: ProviderError(503), secondary.model: 0}
+    router = LLMRouter([primary, secondary], completion_fn=fake_completion(behaviour, calls))
+
+    assert router.complete(MESSAGES) == f"answer from {secondary.model}"
+    assert calls == [primary.model, secondary.model]
+    assert router.fallbacks == 1
+    # A provider failure counts against the deployment's health
+    assert [ok for _, _, ok in primary._recent()] == [False]
+
+
+def test_acomplete_falls_back_on_server_error():
+    primary, secondary = deployments("primary", "secondary")
+    calls = []
+    behaviour = {primary.model: ProviderError(500), secondary.model: 0}
+    router = LLMRouter([primary, secondary], acompletion_fn=fake_acompletion(behaviour, calls))
+
+    assert asyncio.run(router.acomplete(MESSAGES)) == f"answer from {secondary.model}"
+    assert calls == [primary.model, secondary.model]
+    assert router.fallbacks == 1
+
+
+@pytest.mark.parametrize("status_code", [400, 413, 422])
+def test_request_errors_do_not_fall_back(status_code):
+    primary, secondary = deployments("primary", "secondary")
+    calls = []
+    behaviour = {primary.model: ProviderError(status_code), secondary.model: 0}
+    router = LLMRouter([primary, secondary], completion_fn=fake_completion(behaviour, calls),
+                       acompletion_fn=fake_acompletion(behaviour, calls))
+
+    with pytest.raises(ProviderError):
+        router.complete(MESSAGES)
+    with pytest.raises(ProviderError):
+        asyncio.run(router.acomplete(MESSAGES))
+
+    assert calls == [primary.model, primary.model]
+    assert router.fallbacks == 0
+    # The request was at fault, so the deployment's health is not penalised
+    assert all(ok for _, _, ok in primary._recent())
+
+
+def test_complete_hedges_slow_deployment():
+    slow, fast = deployments("slow", "fast")
+    calls = []
+    behaviour = {slow.model: 0.5, fast.model: 0}
+    router = LLMRouter([slow, fast], completion_fn=fake_completion(behaviour, calls),
+                       hedging=True, hedge_after_seconds=0.05)
+
+    started = time.perf_counter()
+    assert router.complete(MESSAGES) == f"answer from {fast.model}"
+    assert time.perf_counter() - started < 0.4
+    assert calls == [slow.model, fast.model]
+    assert (router.hedges, router.hedge_wins) == (1, 1)
+
+
+def test_acomplete_hedges_and_cancels_the_loser():
+    slow, fast = deployments("slow", "fast")
+    calls = []
+    behaviour = {slow.model: 5, fast.model: 0}
+    router = LLMRouter([slow, fast], acompletion_fn=fake_acompletion(behaviour, calls),
+                       hedging=True, hedge_after_seconds=0.05)
+
+    started = time.perf_counter()
+    assert asyncio.run(router.acomplete(MESSAGES)) == f"answer from {fast.model}"
+    assert time.perf_counter() - started < 1
+    assert (router.hedges, router.hedge_wins) == (1, 1)
+
+
+def test_no_hedge_without_hedging():
+    slow, fast = deployments("slow", "fast")
+    calls = []
+    behaviour = {slow.model: 0.1, fast.model: 0}
+    router = LLMRouter([slow, fast], completion_fn=fake_completion(behaviour, calls), hedge_after_seconds=0.01)
+
+    assert router.complete(MESSAGES) == f"answer from {slow.model}"
+    assert calls == [slow.model]
+    assert router.hedges == 0
+
+
+def test_stream_falls_back_before_first_chunk():
+    primary, secondary = deployments("primary", "secondary")
+    calls = []
+
+    def completion(model, messages, stream=False, **kwargs):
+        calls.append(model)
+        if model == primary.model:
+            raise ProviderError(502)
+        return iter(["a", "b"])
+
+    router = LLMRouter([primary, secondary], completion_fn=completion)
+
+    assert list(router.stream(MESSAGES)) == ["a", "b"]
+    assert calls == [primary.model, secondary.model]
+
+
+@pytest.mark.parametrize("explicit", [False, True])
+def test_hedging_only_between_explicit_deployments(monkeypatch, explicit):
+    specs = [{"model": "azure/gpt-4o", "api_key": "test"}, {"model": "gemini/gemini-2.5-flash"}]
+    monkeypatch.setattr(router_module, "_router", None)
+    monkeypatch.setattr(Config, "LLM_HEDGING", True)
+    monkeypatch.setattr(Config, "LLM_DEPLOYMENTS", specs if explicit else None)
+    monkeypatch.setattr(Config, "AZURE_DEPLOYMENT", "gpt-4o")
+    monkeypatch.setenv("GOOGLE_API_KEY", "test")
+
+    router = router_module.get_llm_router()
+
+    assert len(router.deployments) == 2
+    assert router.hedging is explicit
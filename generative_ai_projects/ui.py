@@ -6,6 +6,7 @@ import os
 import dotenv
 from datetime import datetime
 import json
+import uuid
 
 from src.utils.state_utils import initialize_session_state
 from src.rag.rag_core import FacilitiesRAGSystem 
@@ -1055,7 +1056,8 @@ def dashboard():
                     st.session_state.messages = []
                     st.session_state.current_conversation_id = None
                     if st.session_state.rag_system:
-                        st.session_state.rag_system.chat_history = []
+                        st.session_state.rag_system.clear_conversation(st.session_state.memory_conversation_id)
+                    st.session_state.memory_conversation_id = str(uuid.uuid4())
                     st.rerun()
             
                 if len(st.session_state.messages) > 0:
@@ -1905,6 +1907,64 @@ def render_chat_history_sidebar(user_id):
                             st.session_state.messages, st.session_state.current_conversation_id = [], None
                         st.toast("Chat deleted!", icon="🗑️"); time.sleep(1); st.rerun()
 
+def iter_sse_events(response):
+    """Parse a server-sent events response into (event, data) pairs"""
+    event, data_lines = "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if not line:
+            if data_lines:
+                yield event, json.loads("\n".join(data_lines))
+            event, data_lines = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[len("data:"):].strip())
+
+
+def stream_rag_answer(prompt, user_id):
+    """Render the facilities answer incrementally from the streaming Q&A endpoint
+
+    Request errors raised before any token is shown propagate so the caller can
+    answer in-process; once tokens are on screen they become an error message instead.
+    """
+    result = {"sources": [], "error": None, "rendered": False}
+
+    def token_stream(response):
+        try:
+            for event, data in iter_sse_events(response):
+                if event == "sources":
+                    result["sources"] = data.get("sources", [])
+                elif event == "token":
+                    result["rendered"] = True
+                    yield data.get("content", "")
+                elif event == "error":
+                    result["error"] = data.get("message", "Failed to generate response")
+                    result["rendered"] = True
+                    yield result["error"]
+        except requests.exceptions.RequestException as e:
+            if not result["rendered"]:
+                raise
+            print(f"[UI] Stream interrupted after tokens were shown: {str(e)}")
+            result["error"] = "⚠️ The connection was lost while the answer was streaming. Please try again."
+            yield f"\n\n{result['error']}"
+
+    with requests.post(
+        f"{Config.API_URL}/api/v1/facility_qna/stream",
+        json={
+            "message": prompt,
+            "user_id": user_id,
+            "conversation_id": st.session_state.memory_conversation_id,
+        },
+        stream=True,
+        timeout=(5, 120),
+    ) as response:
+        response.raise_for_status()
+        with st.chat_message("assistant"):
+            answer = st.write_stream(token_stream(response))
+
+    return answer, result["sources"], result["error"]
+
+
 def process_message(prompt, user_id, user_role="user"):
     """Process user message with intelligent agent routing"""
     if not st.session_state.get('rag_system'):
@@ -2069,9 +2129,36 @@ def process_message(prompt, user_id, user_role="user"):
     
     # 3. RAG SYSTEM (General queries)
     else:
+        try:
+            answer, sources, error = stream_rag_answer(prompt, user_id)
+            
+            if not error:
+                st.session_state.messages.append({
+                    "role": "assistant",
+                    "content": answer,
+                    "sources": [
+                        {
+                            'title': source.get('title', 'Unknown'),
+                            'content': source.get('content', '')
+                        }
+                        for source in sources
+                    ]
+                })
+            else:
+                st.session_state.messages.append({
+                    "role": "assistant",
+                    "content": answer or error
+                })
+            return
+        except requests.exceptions.RequestException as e:
+            print(f"[UI] Streaming endpoint unavailable, answering in-process: {str(e)}")
+        
         with st.spinner("Thinking..."):
             try:
-                response = st.session_state.rag_system.generate_response(prompt)
+                response = st.session_state.rag_system.generate_response(
+                    prompt,
+                    conversation_id=st.session_state.memory_conversation_id,
+                )
                 
                 if not response.get('error', False):
                     st.session_state.messages.append({